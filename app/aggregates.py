@@ -0,0 +1,232 @@
+"""
+Incrementally maintained history aggregates behind the `summary` command.
+
+Per operator and over all rows: count, sum, mean, min and max of the
+results, plus how many were NaN or infinite. `HistoryBuffer` builds them on
+first use and then updates them on every append (O(1)) and truncate (O(rows
+removed)), so a summary costs the same for 10 rows or 10M rows, and undo,
+redo, clear and load leave them exactly as a fresh scan would.
+
+Finite results are summed as integers in units of 2**-1074 (the smallest
+float), so removing a row subtracts exactly what adding it added; min and
+max keep a stack of the (position, value) records set so far, which a
+truncate pops. The first build is vectorized with NumPy (imported there).
+"""
+from __future__ import annotations
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+_SHIFT = 1075  # x == n / 2**k  ->  n << (1074 - k) units of 2**-1074; k + 1 == d.bit_length()
+_SCALE = 1 << 1074
+_BULK_MIN = 64  # smaller operator groups are built row by row
+_BIN_ROWS = 1 << 26  # rows per exact float64 bincount (26-bit halves sum below 2**53)
+
+class Aggregate:
+    __slots__ = ("count", "nan", "pinf", "ninf", "_sum", "_min_pos", "_min", "_max_pos", "_max")
+
+    def __init__(self):
+        self.count = self.nan = self.pinf = self.ninf = 0
+        self._sum = 0
+        self._min_pos: List[int] = []
+        self._min: List[float] = []
+        self._max_pos: List[int] = []
+        self._max: List[float] = []
+
+    def add(self, pos: int, x: float):
+        self.count += 1
+        if x - x == 0:  # finite
+            n, d = x.as_integer_ratio()
+            self._sum += n << (_SHIFT - d.bit_length())
+        elif x != x:
+            self.nan += 1
+            return  # NaN never sets a min or max
+        elif x > 0:
+            self.pinf += 1
+        else:
+            self.ninf += 1
+        if not self._min or x < self._min[-1]:
+            self._min_pos.append(pos)
+            self._min.append(x)
+        if not self._max or x > self._max[-1]:
+            self._max_pos.append(pos)
+            self._max.append(x)
+
+    def remove(self, start: int, x: float):
+        """Take back row value `x` as part of truncating the history to `start` rows."""
+        self.count -= 1
+        if x - x == 0:
+            n, d = x.as_integer_ratio()
+            self._sum -= n << (_SHIFT - d.bit_length())
+        elif x != x:
+            self.nan -= 1
+        elif x > 0:
+            self.pinf -= 1
+        else:
+            self.ninf -= 1
+        while self._min_pos and self._min_pos[-1] >= start:
+            self._min_pos.pop()
+            self._min.pop()
+        while self._max_pos and self._max_pos[-1] >= start:
+            self._max_pos.pop()
+            self._max.pop()
+
+    @property
+    def sum(self) -> float:
+        if self.nan or (self.pinf and self.ninf):
+            return math.nan
+        if self.pinf or self.ninf:
+            return math.inf if self.pinf else -math.inf
+        try:
+            return self._sum / _SCALE  # int / int rounds correctly
+        except OverflowError:
+            return math.inf if self._sum > 0 else -math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+    @property
+    def min(self) -> float:
+        return self._min[-1] if self._min else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._max[-1] if self._max else math.nan
+
+    def fill(self, positions: "np.ndarray", values: "np.ndarray"):
+        """Vectorized `add` of every row into an empty Aggregate (positions ascending)."""
+        import numpy as np
+        finite = np.isfinite(values)
+        self.count = len(values)
+        self.nan = int(np.isnan(values).sum())
+        self.pinf = int(np.isposinf(values).sum())
+        self.ninf = self.count - self.nan - self.pinf - int(finite.sum())
+        self._sum = _exact_sum(values[finite])
+        ordered = ~np.isnan(values)
+        pos, vals = positions[ordered], values[ordered]
+        for acc, stack_pos, stack in ((np.minimum, self._min_pos, self._min), (np.maximum, self._max_pos, self._max)):
+            if len(vals):
+                best = acc.accumulate(vals)
+                keep = np.empty(len(vals), dtype=bool)
+                keep[0] = True
+                np.not_equal(best[1:], best[:-1], out=keep[1:])  # a new record
+                stack_pos.extend(pos[keep].tolist())
+                stack.extend(vals[keep].tolist())
+
+    def copy(self) -> "Aggregate":
+        agg = Aggregate()
+        agg.count, agg.nan, agg.pinf, agg.ninf, agg._sum = self.count, self.nan, self.pinf, self.ninf, self._sum
+        agg._min_pos, agg._min = self._min_pos[:], self._min[:]
+        agg._max_pos, agg._max = self._max_pos[:], self._max[:]
+        return agg
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "nan": self.nan,
+            "inf": self.pinf + self.ninf,
+        }
+
+def _exact_sum(values: "np.ndarray") -> int:
+    """Exact sum of finite float64 values in units of 2**-1074."""
+    import numpy as np
+    total = 0
+    for start in range(0, len(values), _BIN_ROWS):
+        mantissa, exponent = np.frexp(values[start:start + _BIN_ROWS])
+        digits = np.ldexp(mantissa, 53).astype(np.int64)  # value == digits * 2**(exponent - 53)
+        bins = exponent + 1073  # 0 for the smallest subnormal
+        high = np.bincount(bins, weights=digits >> 26)
+        low = np.bincount(bins, weights=digits & ((1 << 26) - 1))
+        for k in np.flatnonzero(high.astype(bool) | low.astype(bool)).tolist():
+            part = (int(high[k]) << 26) + int(low[k])
+            shift = k - 52  # (k - 1073 - 53) + 1074
+            total += part << shift if shift >= 0 else part >> -shift  # exact: low bits are zero there
+    return total
+
+class HistoryAggregates:
+    """An `Aggregate` over all rows (`total`) and one per operator."""
+    __slots__ = ("total", "by_operator")
+
+    def __init__(self):
+        self.total = Aggregate()
+        self.by_operator: Dict[str, Aggregate] = {}
+
+    @staticmethod
+    def build(operators: Sequence[str], results: Sequence[float],
+              index: Optional[Dict[str, List[int]]] = None) -> "HistoryAggregates":
+        """
+        Aggregates of the given columns; `index` ({operator: ascending
+        positions}, e.g. `HistoryBuffer.operator_index()`) saves a pass.
+        """
+        import numpy as np
+        aggs = HistoryAggregates()
+        values = getattr(results, "values", None)  # a mapped ResultColumn
+        values = np.asarray(results if values is None else values, dtype=np.float64)
+        if len(values) < _BULK_MIN:
+            aggs.extend(0, operators, values.tolist())
+            return aggs
+        if index is None:
+            index = {}
+            for i, operator in enumerate(operators):
+                index.setdefault(operator, []).append(i)
+        aggs.total.fill(np.arange(len(values)), values)
+        for operator, positions in index.items():
+            agg = aggs.by_operator[operator] = Aggregate()
+            if len(positions) < _BULK_MIN:
+                for i in positions:
+                    agg.add(i, float(values[i]))
+            else:
+                positions = np.asarray(positions)
+                agg.fill(positions, values[positions])
+        return aggs
+
+    def add(self, pos: int, operator: str, x: float):
+        self.total.add(pos, x)
+        agg = self.by_operator.get(operator)
+        if agg is None:
+            agg = self.by_operator[operator] = Aggregate()
+        agg.add(pos, x)
+
+    def extend(self, start: int, operators: Iterable[str], results: Iterable[float]):
+        total, by_operator = self.total, self.by_operator
+        for pos, (operator, x) in enumerate(zip(operators, results), start):
+            total.add(pos, x)
+            agg = by_operator.get(operator)
+            if agg is None:
+                agg = by_operator[operator] = Aggregate()
+            agg.add(pos, x)
+
+    def truncate(self, start: int, operators: Iterable[str], results: Iterable[float]):
+        """Remove rows start.. given their operators and results."""
+        total, by_operator = self.total, self.by_operator
+        for operator, x in zip(operators, results):
+            total.remove(start, x)
+            agg = by_operator[operator]
+            agg.remove(start, x)
+            if not agg.count:
+                del by_operator[operator]
+
+    def copy(self) -> "HistoryAggregates":
+        aggs = HistoryAggregates()
+        aggs.total = self.total.copy()
+        aggs.by_operator = {op: agg.copy() for op, agg in self.by_operator.items()}
+        return aggs
+
+    def stats(self, top: Optional[int] = None) -> Dict[str, object]:
+        """
+        {"all": stats, "by_operator": {operator: stats}}, JSON-serializable;
+        with `top`, only the most frequent operators (ties by name).
+        """
+        ranked = sorted(self.by_operator.items(), key=lambda item: (-item[1].count, item[0]))
+        return {
+            "all": self.total.stats(),
+            "by_operator": {op: agg.stats() for op, agg in ranked[:top]},
+            "operators": len(ranked),
+        }
@@ -0,0 +1,93 @@
+"""
+Debounced background autosave for History.
+
+The writer is a subscriber on History's event bus (see `events`) with a
+one-slot "coalesce" queue, so a mutation only publishes a small event and
+never waits on disk: while one write is in flight, every later change folds
+into the single queued event. Each delivery waits out `interval` seconds so
+a burst of commands is written once, then snapshots the history and writes
+it atomically (temp file + rename, see `HistoryBuffer.write_file`). Command
+latency therefore no longer depends on history size or disk speed.
+
+Pending changes are written by `flush()`, by `close()` (REPL `exit`/EOF) and
+at interpreter shutdown via atexit. A write error is kept and re-raised by
+the next `flush()`/`close()`, and the history stays dirty so it is retried.
+"""
+from __future__ import annotations
+import atexit
+import threading
+from typing import Callable, Optional
+from .events import EventBus, Subscription
+
+class BackgroundAutosave:
+    def __init__(self, snapshot: Callable[[], "HistoryBuffer"], path: str, interval: float = 0.5,
+                 events: Optional[EventBus] = None):
+        self.snapshot = snapshot
+        self.path = path
+        self.interval = interval
+        self.writes = 0
+        self.error: Optional[BaseException] = None
+        self._pending = False  # marked by `mark_dirty`, not yet picked up by the writer
+        self._dirty = False  # a change the writer could not deliver or write; written by `flush`
+        self._hurry = False
+        self._closing = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # one write at a time; the later snapshot wins
+        if events is None:  # standalone: only `mark_dirty` wakes the writer
+            self.subscription = Subscription(self._on_change, maxsize=1, policy="coalesce", name="history-autosave")
+        else:
+            self.subscription = events.subscribe(self._on_change, maxsize=1, policy="coalesce",
+                                                 name="history-autosave")
+        atexit.register(self.close)
+
+    def mark_dirty(self):
+        """Schedule a write without a History change, e.g. for `save`."""
+        if self._pending:
+            return  # the writer has not picked up the previous mark yet
+        self._pending = True
+        if not self.subscription.publish(None):  # closed: left for the next flush
+            self._pending = False
+            self._dirty = True
+
+    def _on_change(self, event):
+        with self._cond:
+            self._cond.wait_for(lambda: self._hurry or self._closing, timeout=self.interval)
+            self._pending = False
+        self._write()
+
+    def _write(self):
+        with self._write_lock:
+            try:
+                self.snapshot().write_file(self.path)
+                self.writes += 1
+            except Exception as exc:  # kept for flush()/close(); the writer keeps running
+                self.error = exc
+                self._dirty = True
+
+    def flush(self):
+        """Write pending changes now (or wait for an in-flight write) and surface write errors."""
+        with self._cond:
+            self._hurry = True
+            self._cond.notify_all()
+        try:
+            self.subscription.flush()
+        finally:
+            with self._cond:
+                self._hurry = False
+        error, self.error = self.error, None
+        if error is None:
+            dirty, self._dirty = self._dirty, False
+            if dirty:
+                self._write()
+                error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Stop the writer thread and write any pending changes."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self.subscription.close()  # a queued change is written without waiting out the interval
+        atexit.unregister(self.close)
+        self.flush()
@@ -1,24 +1,97 @@
-
 """
 Configuration management using environment variables and python-dotenv.
 """
 from __future__ import annotations
 import os
 from dataclasses import dataclass
-from dotenv import load_dotenv
+from typing import Optional
 from .exceptions import ConfigurationError
 
-load_dotenv()
+_dotenv_loaded = False
+
+def _load_dotenv():
+    """Read .env once, on the first Config.load() rather than at import time."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+def _optional_positive_int(name: str) -> Optional[int]:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"{name} must be a positive integer") from exc
+    if value < 1:
+        raise ConfigurationError(f"{name} must be a positive integer")
+    return value
+
+def _non_negative_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"{name} must be a non-negative integer") from exc
+    if value < 0:
+        raise ConfigurationError(f"{name} must be a non-negative integer")
+    return value
 
 @dataclass
 class Config:
     history_csv: str
     autosave: bool = True
+    undo_max_depth: Optional[int] = None
+    undo_max_bytes: Optional[int] = None
+    autosave_mode: str = "snapshot"
+    journal_fsync: str = "always"
+    journal_max_bytes: int = 1 << 20
+    autosave_interval_ms: int = 500
+    cache_size: int = 0
+    expr_cache_size: int = 256
+    parallel_workers: int = 0  # 0 = one per CPU
+    parallel_chunk_size: int = 10_000
+    metrics: bool = True
+    history_backend: str = "csv"
+    history_db: str = "history.sqlite3"
 
     @staticmethod
     def load() -> "Config":
+        _load_dotenv()
         csv = os.getenv("HISTORY_CSV", "history.csv")
         autosave_str = os.getenv("AUTOSAVE", "true").lower()
         if autosave_str not in {"true", "false"}:
             raise ConfigurationError("AUTOSAVE must be 'true' or 'false'")
-        return Config(history_csv=csv, autosave=(autosave_str == "true"))
+        mode = os.getenv("AUTOSAVE_MODE", "snapshot").lower()
+        if mode not in {"snapshot", "journal", "background"}:
+            raise ConfigurationError("AUTOSAVE_MODE must be 'snapshot', 'journal' or 'background'")
+        fsync = os.getenv("JOURNAL_FSYNC", "always").lower()
+        if fsync not in {"always", "periodic", "never"}:
+            raise ConfigurationError("JOURNAL_FSYNC must be 'always', 'periodic' or 'never'")
+        backend = os.getenv("HISTORY_BACKEND", "csv").lower()
+        if backend not in {"csv", "sqlite"}:
+            raise ConfigurationError("HISTORY_BACKEND must be 'csv' or 'sqlite'")
+        metrics_str = os.getenv("METRICS", "true").lower()
+        if metrics_str not in {"true", "false"}:
+            raise ConfigurationError("METRICS must be 'true' or 'false'")
+        return Config(
+            history_csv=csv,
+            autosave=(autosave_str == "true"),
+            undo_max_depth=_optional_positive_int("UNDO_MAX_DEPTH"),
+            undo_max_bytes=_optional_positive_int("UNDO_MAX_BYTES"),
+            autosave_mode=mode,
+            journal_fsync=fsync,
+            journal_max_bytes=_optional_positive_int("JOURNAL_MAX_BYTES") or 1 << 20,
+            autosave_interval_ms=_non_negative_int("AUTOSAVE_INTERVAL_MS", 500),
+            cache_size=_non_negative_int("CACHE_SIZE", 0),
+            expr_cache_size=_non_negative_int("EXPR_CACHE_SIZE", 256),
+            parallel_workers=_non_negative_int("PARALLEL_WORKERS", 0),
+            parallel_chunk_size=_optional_positive_int("PARALLEL_CHUNK_SIZE") or 10_000,
+            metrics=(metrics_str == "true"),
+            history_backend=backend,
+            history_db=os.getenv("HISTORY_DB", "history.sqlite3"),
+        )
@@ -1,16 +1,32 @@
-
 """
-Memento pattern for storing/restoring history DataFrame states.
+Memento pattern for storing/restoring history states.
+
+History records compact deltas (rows appended, results overwritten in
+place, whole-history replace on clear/load) instead of a full snapshot per change, so undo/redo cost is
+proportional to the change rather than to the history size.
 """
 from __future__ import annotations
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional, List
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Deque, Mapping, Optional, Protocol, Sequence, Tuple
 from .exceptions import UndoRedoError
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+ROW_OVERHEAD = 64  # rough per-row cost (operator, result, containers) in bytes
+
+def estimate_nbytes(rows: Sequence[Tuple[str, Sequence[float], float]]) -> int:
+    return sum(ROW_OVERHEAD + 8 * len(ops) for _, ops, _ in rows)
+
+class HistoryChange(Protocol):
+    nbytes: int
+    def undo(self, history: Any) -> None: ...
+    def redo(self, history: Any) -> None: ...
+
 @dataclass(frozen=True)
 class HistoryMemento:
-    snapshot_csv: str  # serialize df as CSV string 
+    snapshot_csv: str  # serialize df as CSV string
 
     @staticmethod
     def from_df(df: pd.DataFrame) -> "HistoryMemento":
@@ -18,37 +34,128 @@ class HistoryMemento:
 
     def to_df(self) -> pd.DataFrame:
         from io import StringIO
+        import pandas as pd
         return pd.read_csv(StringIO(self.snapshot_csv)) if self.snapshot_csv else pd.DataFrame(columns=["operator","operands","result"])
 
+    @property
+    def nbytes(self) -> int:
+        return len(self.snapshot_csv)
+
+@dataclass(frozen=True)
+class AppendDelta:
+    """
+    Rows appended at position `start`, kept column-wise; undo truncates back
+    to `start`. Operand sequences are shared with History and never mutated.
+    `notes` maps positions relative to `start` to the rows' notes, if any.
+    """
+    start: int
+    operators: Sequence[str]
+    operands: Sequence[Sequence[float]]
+    results: Sequence[float]
+    nbytes: int = 0
+    notes: Optional[Mapping[int, str]] = None
+
+    @staticmethod
+    def of(start: int, rows, notes: Optional[Mapping[int, str]] = None) -> "AppendDelta":
+        rows = [(op, tuple(ops), res) for op, ops, res in rows]
+        operators, operands, results = zip(*rows) if rows else ((), (), ())
+        return AppendDelta(start, operators, operands, results, nbytes=estimate_nbytes(rows), notes=notes or None)
+
+    @property
+    def rows(self):
+        return zip(self.operators, self.operands, self.results)
+
+    def undo(self, history) -> None:
+        history._truncate(self.start)
+
+    def redo(self, history) -> None:
+        history._truncate(self.start)
+        history._extend_columns(self.operators, self.operands, self.results, self.notes)
+
+@dataclass(frozen=True)
+class ResultsDelta:
+    """
+    Results overwritten at `positions` (e.g. by `recompute`); undo writes
+    `before` back, redo `after`. Operators and operands are unchanged.
+    """
+    positions: Sequence[int]
+    before: Sequence[float]
+    after: Sequence[float]
+    nbytes: int = 0
+
+    def undo(self, history) -> None:
+        history._set_results(self.positions, self.before)
+
+    def redo(self, history) -> None:
+        history._set_results(self.positions, self.after)
+
+@dataclass(frozen=True)
+class ReplaceDelta:
+    """
+    Whole-history replacement (clear/load). Both sides are kept as full
+    checkpoints, so undo/redo restore them directly.
+    """
+    before: Any
+    after: Any
+    nbytes: int = 0
+
+    def undo(self, history) -> None:
+        history._restore(self.before)
+
+    def redo(self, history) -> None:
+        history._restore(self.after)
+
 class Caretaker:
     """
     Caretaker keeps stacks for undo/redo.
-    The top of _undo_stack is the *current* state.
+    The top of _undo_stack is the most recent change. The undo stack is
+    bounded by `max_depth` entries and/or `max_bytes`, evicting oldest first.
     """
-    def __init__(self):
-        self._undo_stack: List[HistoryMemento] = []
-        self._redo_stack: List[HistoryMemento] = []
+    def __init__(self, max_depth: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self._undo_stack: Deque[HistoryChange] = deque()
+        self._redo_stack: Deque[HistoryChange] = deque()
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of the undo stack in bytes."""
+        return self._nbytes
 
-    def push(self, mem: HistoryMemento):
+    @property
+    def undo_depth(self) -> int:
+        return len(self._undo_stack)
+
+    @property
+    def redo_depth(self) -> int:
+        return len(self._redo_stack)
+
+    def push(self, mem):
         self._undo_stack.append(mem)
+        self._nbytes += getattr(mem, "nbytes", 0)
         self._redo_stack.clear()
+        self._evict()
 
-    def undo(self, current: HistoryMemento | None = None) -> HistoryMemento:
+    def _evict(self):
+        while self._undo_stack and (
+            (self.max_depth is not None and len(self._undo_stack) > self.max_depth)
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            self._nbytes -= getattr(self._undo_stack.popleft(), "nbytes", 0)
+
+    def undo(self, current=None):
         if not self._undo_stack:
-            raise UndoRedoError("Nothing to undo")  # pragma: no cover
-        if current is not None:
-            last = self._undo_stack.pop()
-            self._redo_stack.append(current)
-            return last
-        if len(self._undo_stack) < 2:
-            raise UndoRedoError("Nothing to undo")  # pragma: no cover
-        popped_current = self._undo_stack.pop()
-        self._redo_stack.append(popped_current)
-        return self._undo_stack[-1]
-
-    def redo(self, current: HistoryMemento | None = None) -> HistoryMemento:
+            raise UndoRedoError("Nothing to undo")
+        last = self._undo_stack.pop()
+        self._nbytes -= getattr(last, "nbytes", 0)
+        self._redo_stack.append(current if current is not None else last)
+        return last
+
+    def redo(self, current=None):
         if not self._redo_stack:
-            raise UndoRedoError("Nothing to redo")  # pragma: no cover
+            raise UndoRedoError("Nothing to redo")
         mem = self._redo_stack.pop()
         self._undo_stack.append(mem)
+        self._nbytes += getattr(mem, "nbytes", 0)
         return mem
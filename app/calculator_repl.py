@@ -3,43 +3,623 @@
 Command-line REPL acting as a Facade to the calculator internals.
 """
 from __future__ import annotations
+import argparse
+import json
 import sys
-from typing import List
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import islice
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, TextIO
+from .aggregates import Aggregate
 from .calculator_config import Config
-from .history import History
-from .operations import operation_factory
+from .history import History, HistoryBuffer
+from .operations import operation_factory, Batch, BatchResult
+from .calculator_memento import ROW_OVERHEAD
+from .result_cache import ResultCache, cache_key
+from .metrics import CommandProfiler, Metrics, profile_request
+from .expression import compile_expression, looks_like_expression, operands_for
+from .operand_stream import OperandStream, is_stream
+from .parallel import ParallelResult, run_parallel
+from .ragged import RaggedColumn
+from .recompute import DEFAULT_ATOL, DEFAULT_RTOL, RecomputeReport, recompute
+from .sweep import RECORD_MODES, Sweep, SweepResult
 from .calculation import Calculation
-from .input_validators import parse_command, parse_operation_args
+from .input_validators import (parse_command, parse_history_args, parse_operation_args, parse_parallel_args,
+                               parse_recompute_args, parse_summary_args, parse_sweep_args)
 from .exceptions import CalculatorError, OperationError, ValidationError, UndoRedoError
 
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
 HELP_TEXT = """\
 Commands:
   +, -, *, /, ^, root <operands...>   perform operation
-  history                              show history
-  save [path]                          save history to CSV
-  load <path>                          load history from CSV
+  +, -, *, / @file | @-                ... over numbers streamed from a file/stdin (.f64/.bin: raw float64)
+  <expression> | eval <expression>     evaluate infix, e.g. 2 ^ (3 + 4) / root 2 9
+  history [N] [--offset K]             show history rows (all, or N from row K)
+  history tail [N]                     show the last N rows (default 10)
+     [--op OP] [--min X] [--max Y]     ... only rows with this operator / result range
+     [--out PATH]                      ... write the matching rows to a CSV instead
+  save [path]                          save history to CSV (.hcol: binary columnar)
+  load <path>                          load history from CSV or .hcol
   undo | redo                          undo/redo last history change
   clear                                clear history
+  cache [clear]                        show result-cache stats / empty it
+  stats [json [path] | reset]          per-command latency (count, p50/p95/p99, max)
+  summary [last N]                     count/sum/mean/min/max and error rate per operator
+  sweep <op> <x|start:stop[:step]>...   evaluate op over an operand grid, e.g. sweep ^ 0:1e6 2
+     [--record summary|rows|none]      ... history gets one summary row (default), every row, or none
+     [--out PATH] [--quiet]            ... write the rows to a CSV / print only the totals
+  recompute [--rtol R] [--atol A]      re-evaluate every stored result, report mismatches
+     [--fix]                           ... and rewrite them as one undoable change
+  profile <N> | profile off            cProfile the next N commands, then print top functions
+  parallel <file> [workers] [chunk]    evaluate an operations file on all cores
   help                                 show this help
   exit                                 quit
+
+Batch mode: python -m app.calculator_repl --batch FILE|- [--defer-autosave]
+Parallel:   python -m app.calculator_repl --parallel FILE [--workers N] [--chunk-size M]
 """
 
+SUMMARY_TOP = 20  # operators listed by `summary`, most frequent first
+RECOMPUTE_SHOWN = 20  # mismatches and errors listed by `recompute`
+
+def _real(result) -> float:
+    """`result`, or OperationError for a complex one (e.g. an odd root of a negative number)."""
+    if isinstance(result, complex):
+        raise OperationError("Result is not a real number")
+    return result
+
 class CalculatorFacade:
+    """
+    One facade may be shared by many threads: parsing, strategy execution
+    and the result cache run in parallel, and History serializes the
+    appends, undo/redo and load in one order. `ans` is the latest result
+    of any thread; `profile` is for the interactive REPL only.
+    """
     def __init__(self, config: Config):
         self.config = config
-        self.history = History(csv_path=config.history_csv, autosave=config.autosave)
+        storage = None
+        if config.history_backend == "sqlite":
+            from .history_sqlite import SqliteStorage  # sqlite3 is only imported when selected
+            storage = SqliteStorage(config.history_db, autosave=config.autosave, fsync=config.journal_fsync)
+        self.history = History(
+            storage=storage,
+            csv_path=config.history_csv,
+            autosave=config.autosave,
+            max_undo=config.undo_max_depth,
+            max_undo_bytes=config.undo_max_bytes,
+            autosave_mode=config.autosave_mode,
+            journal_fsync=config.journal_fsync,
+            journal_max_bytes=config.journal_max_bytes,
+            autosave_interval_ms=config.autosave_interval_ms,
+        )
+        self.cache: Optional[ResultCache] = ResultCache(config.cache_size) if config.cache_size else None
+        self.compile = lru_cache(maxsize=config.expr_cache_size)(compile_expression)
+        self.last_result: Optional[float] = None
+        self.metrics: Optional[Metrics] = Metrics() if config.metrics else None
+        self.history.metrics = self.metrics
+        self._stage_series: Dict[str, tuple] = {}  # command -> its stage histograms
+        self.profiler: Optional[CommandProfiler] = None
+
+    @property
+    def failures(self) -> Dict[str, int]:
+        """Operator -> failed calls since the last clear/load (for `summary`)."""
+        return self.history.failures()
+
+    def _failed(self, operator: str, count: int = 1):
+        self.history.record_failures(operator, count)
 
     def perform(self, operator: str, args: List[str]) -> float:
-        operands = parse_operation_args(args)
-        strategy = operation_factory(operator)
-        calc = Calculation(operator=operator, operands=operands, strategy=strategy)
-        result = calc.perform()
+        try:
+            if is_stream(args):
+                return self.perform_stream(operator, args)
+            t0 = perf_counter_ns()
+            operands = parse_operation_args(args)
+            t1 = perf_counter_ns()
+            result = self._compute(operator, operands)
+            t2 = perf_counter_ns()
+        except CalculatorError:
+            self._failed(operator)
+            raise
         self.history.add_record(operator, operands, result)
+        if self.metrics is not None:
+            self._record_stages(operator, ("parse", "compute", "history"), t0, t1, t2, perf_counter_ns())
+        self.last_result = result
+        return result
+
+    def perform_stream(self, operator: str, args: List[str]) -> float:
+        """
+        `perform` over operands read chunk by chunk from `@path` (see
+        `operand_stream`). History records a `stream` row without operands;
+        its note holds the operator, the source and the value count.
+        """
+        if len(args) != 1:
+            raise ValidationError("Streamed operands take a single @source argument")
+        stream = OperandStream(args[0])
+        result = operation_factory(operator).reduce_stream(stream.chunks())
+        self.history.add_record("stream", [], result, note=f"{operator} {stream.spec} ({stream.count} values)")
+        self.last_result = result
+        return result
+
+    def evaluate(self, source: str) -> float:
+        """
+        Evaluate an infix expression; it is recorded as one `eval` history row
+        with the values it read as operands and its source as the row's note.
+        """
+        t0 = perf_counter_ns()
+        compiled = self.compile(source.strip())
+        env = {"ans": self.last_result}
+        t1 = perf_counter_ns()
+        result = compiled.run(env)
+        t2 = perf_counter_ns()
+        self.history.add_record("eval", operands_for(compiled, env), result, note=compiled.source)
+        if self.metrics is not None:
+            self._record_stages("eval", ("compile", "compute", "history"), t0, t1, t2, perf_counter_ns())
+        self.last_result = result
+        return result
+
+    def _record_stages(self, command: str, stages, t0: int, t1: int, t2: int, t3: int):
+        series = self._stage_series.get(command)
+        if series is None:
+            series = self._stage_series[command] = tuple(self.metrics.series(command, s) for s in stages)
+        series[0].add(t1 - t0)
+        series[1].add(t2 - t1)
+        series[2].add(t3 - t2)
+
+    def _compute(self, operator: str, operands: List[float]) -> float:
+        if self.cache is None:
+            return _real(Calculation(operator=operator, operands=operands, strategy=operation_factory(operator)).perform())
+        key = cache_key(operator, operands)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        strategy = operation_factory(operator)  # unknown symbols are not cached
+        try:
+            result = _real(Calculation(operator=operator, operands=operands, strategy=strategy).perform())
+        except OperationError as exc:
+            self.cache.put_error(key, exc)
+            raise
+        self.cache.put(key, result)
         return result
 
+    def perform_many(self, operator: str, rows: Batch, record: bool = True) -> BatchResult:
+        """
+        Vectorized `perform` over many operand rows. Failed rows are reported in
+        `BatchResult.errors` and, like failed `perform` calls, not recorded;
+        the successful rows are appended to history as one change.
+        """
+        strategy = operation_factory(operator)
+        batch = strategy.execute_batch(rows)
+        if batch.errors:
+            self._failed(operator, len(batch.errors))
+        if record:
+            import numpy as np
+            if isinstance(rows, np.ndarray):
+                kept = np.ascontiguousarray(rows[batch.ok] if batch.errors else rows, dtype=np.float64)
+                offsets = np.arange(len(kept) + 1, dtype=np.int64) * kept.shape[1]  # equal-width rows
+                operands = RaggedColumn.from_arrays(offsets, kept.ravel())
+                nbytes = len(kept) * ROW_OVERHEAD + 8 * kept.size
+            else:
+                keep = batch.ok
+                operands = [[float(x) for x in r] for r, k in zip(rows, keep) if k]
+                nbytes = None
+            results = batch.results[batch.ok].tolist() if batch.errors else batch.results.tolist()
+            if results:
+                self.history.add_columns([operator] * len(results), operands, results, nbytes=nbytes)
+        return batch
+
+    def perform_file(self, path: str, workers: Optional[int] = None, chunk_size: Optional[int] = None) -> ParallelResult:
+        """Evaluate an operations file on a process pool; results land in history as one change."""
+        try:
+            fh = open(path, "r", encoding="utf-8")
+        except OSError as exc:
+            raise ValidationError(f"Cannot read operations from {path}: {exc.strerror}") from exc
+        with fh:
+            return run_parallel(
+                self.history, fh,
+                workers=workers or self.config.parallel_workers or None,
+                chunk_size=chunk_size or self.config.parallel_chunk_size,
+            )
+
+    def sweep(self, operator: str, specs: List[str], record: str = "summary",
+              emit: Optional[Callable[[int, "np.ndarray", BatchResult], None]] = None) -> SweepResult:
+        """
+        Evaluate `operator` over the operand grid `specs` (see `sweep`) in
+        vectorized chunks, handing each to `emit(first point, rows, results)`.
+        History gets one `sweep` row holding the last result, noted
+        "<op> <specs> (N points)" ("summary"), every successful point as one
+        bulk append ("rows"), or nothing ("none"). Failed points count as failed calls.
+        """
+        if record not in RECORD_MODES:
+            raise ValidationError(f"Unknown sweep record mode: {record!r}")
+        start = time.perf_counter()
+        sweep = Sweep(operator, specs)
+        kept_rows, kept_results = [], []
+        errors, last = 0, None
+        for first, rows, batch in sweep.chunks():
+            if emit is not None:
+                emit(first, rows, batch)
+            results = batch.results
+            if batch.errors:
+                errors += len(batch.errors)
+                ok = batch.ok
+                rows, results = rows[ok], results[ok]
+            if len(results):
+                last = float(results[-1])
+            if record == "rows":
+                kept_rows.append(rows)
+                kept_results.append(results)
+        if errors:
+            self._failed(operator, errors)
+        recorded = 0
+        if record == "rows" and last is not None:
+            import numpy as np
+            rows = np.concatenate(kept_rows)
+            results = np.concatenate(kept_results).tolist()
+            offsets = np.arange(0, rows.size + 1, rows.shape[1], dtype=np.int64)  # every row has one value per axis
+            self.history.add_columns([operator] * len(results), RaggedColumn.from_arrays(offsets, rows.ravel()),
+                                     results, nbytes=len(results) * ROW_OVERHEAD + 8 * rows.size)
+            recorded = len(results)
+        elif record == "summary" and last is not None:
+            self.history.add_record("sweep", [], last, note=f"{operator} {sweep.spec} ({sweep.points} points)")
+            recorded = 1
+        if last is not None:
+            self.last_result = last
+        return SweepResult(sweep.points, errors, time.perf_counter() - start, recorded)
+
+    def recompute(self, rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL, rewrite: bool = False) -> RecomputeReport:
+        """Check every stored result against its strategy (see `recompute`)."""
+        return recompute(self.history, rtol=rtol, atol=atol, rewrite=rewrite)
+
+    def summary(self, last: Optional[int] = None, top: Optional[int] = SUMMARY_TOP) -> Dict[str, object]:
+        """
+        `History.summary` plus, for the whole history, each operator's failed
+        calls ("errors", kept with the history state, so clear/load reset
+        them and undo restores them) and errors / (rows + errors).
+        """
+        summary = self.history.summary(last)
+        by_operator = summary["by_operator"]
+        if last is None:
+            failures = self.history.failures()
+            for op in sorted(failures.keys() - by_operator.keys()):  # every call failed
+                by_operator[op] = Aggregate().stats()
+            summary["operators"] = len(by_operator)
+            groups = [(summary["all"], sum(failures.values()))]
+            groups += [(stats, failures.get(op, 0)) for op, stats in summary["by_operator"].items()]
+            for stats, errors in groups:
+                attempts = stats["count"] + errors
+                stats["errors"] = errors
+                stats["error_rate"] = errors / attempts if attempts else 0.0
+        summary["by_operator"] = dict(islice(by_operator.items(), top))
+        return summary
+
+    def close(self):
+        self.history.close()
+
+OPERATORS = {"+", "-", "*", "/", "^", "root"}
+COMMANDS = OPERATORS | {"history", "save", "load", "undo", "redo", "clear", "parallel", "eval", "cache",
+                        "stats", "profile", "summary", "recompute", "sweep", "help"}
+OUTPUT_CHUNK = 4096  # batch output lines buffered per write
+
+def handle(calc: CalculatorFacade, cmd: str, args: List[str], out: Optional[TextIO] = None) -> str:
+    """
+    Run one (non-exit) command and return the text to print. Commands with
+    long output (`history`) stream all but the tail of it to `out` if given.
+    """
+    prefix = ""
+    profiler = calc.profiler
+    if profiler is not None and profiler.done:  # the window closed on a failing command
+        calc.profiler, profiler, prefix = None, None, profiler.report() + "\n"
+    if profiler is not None and cmd != "profile":
+        text = profiler.run(_timed, calc, cmd, args, out)
+        if profiler.done:
+            calc.profiler = None
+            text = f"{text}\n{profiler.report()}"
+        return prefix + text
+    return prefix + _timed(calc, cmd, args, out)
+
+def _timed(calc: CalculatorFacade, cmd: str, args: List[str], out: Optional[TextIO] = None) -> str:
+    if calc.metrics is None:
+        return _dispatch(calc, cmd, args, out)
+    start = perf_counter_ns()
+    text = _dispatch(calc, cmd, args, out)
+    name = cmd if cmd in COMMANDS else "expression" if looks_like_expression(cmd) else "unknown"
+    calc.metrics.record(name, "total", perf_counter_ns() - start)
+    return text
+
+def _dispatch(calc: CalculatorFacade, cmd: str, args: List[str], out: Optional[TextIO] = None) -> str:
+    if cmd in OPERATORS:
+        return str(calc.perform(cmd, args))
+    if cmd == "history":
+        return history_command(calc, args, out)
+    if cmd == "save":
+        path = args[0] if args else None
+        try:
+            calc.history.save(path)
+        except OSError as exc:  # reported without the temp file name `write_file` failed on
+            raise ValidationError(f"Cannot save history to {path or calc.history.csv_path}: "
+                                  f"{exc.strerror or exc}") from exc
+        return "Saved."
+    if cmd == "load":
+        if not args:
+            return "Usage: load <path>"
+        try:
+            calc.history.load(args[0])
+        except OSError as exc:
+            raise ValidationError(f"Cannot load history from {args[0]}: {exc.strerror or exc}") from exc
+        return "Loaded."
+    if cmd == "undo":
+        calc.history.undo()
+        return "Undone."
+    if cmd == "redo":
+        calc.history.redo()
+        return "Redone."
+    if cmd == "clear":
+        calc.history.clear()
+        return "Cleared."
+    if cmd == "parallel":
+        if not args:
+            return "Usage: parallel <file> [workers] [chunk_size]"
+        path, sizes = parse_parallel_args(args)
+        report = calc.perform_file(path, *sizes)
+        return format_parallel(report)
+    if cmd == "eval":
+        return str(calc.evaluate(" ".join(args)))
+    if cmd == "cache":
+        if args and args[0] == "clear":
+            calc.compile.cache_clear()
+            if calc.cache is not None:
+                calc.cache.clear()
+            return "Cache cleared."
+        info = calc.compile.cache_info()
+        lines = [f"expressions: size={info.currsize}/{info.maxsize} hits={info.hits} misses={info.misses}"]
+        if calc.cache is None:
+            lines.append("results: disabled (set CACHE_SIZE to enable)")
+        else:
+            st = calc.cache.stats()
+            lines.append(f"results: size={st['size']}/{st['maxsize']} hits={st['hits']} misses={st['misses']} "
+                         f"evictions={st['evictions']} hit_rate={st['hit_rate']:.1%}")
+        return "\n".join(lines)
+    if cmd == "stats":
+        return stats_command(calc, args)
+    if cmd == "summary":
+        return summary_command(calc, args)
+    if cmd == "recompute":
+        return recompute_command(calc, args)
+    if cmd == "sweep":
+        return sweep_command(calc, args, out)
+    if cmd == "profile":
+        commands = profile_request(args)
+        if commands is None:
+            profiler, calc.profiler = calc.profiler, None
+            return profiler.report() if profiler is not None else "Profiling is off."
+        calc.profiler = CommandProfiler(commands)
+        return f"Profiling the next {commands} command(s)."
+    if cmd == "help":
+        return HELP_TEXT
+    if looks_like_expression(cmd):
+        return str(calc.evaluate(" ".join([cmd] + args)))
+    return "Unknown command. Type 'help'."
+
+HISTORY_HEADER = f"{'#':>7}  {'operator':<8} {'operands':<24} result"
+TAIL_DEFAULT = 10
+
+def _format_row(position: int, operator: str, operands, result: float, note: Optional[str] = None) -> str:
+    line = f"{position:>7}  {operator:<8} {str(list(operands)):<24} {result!r}"
+    return line if note is None else f"{line}  # {note}"
+
+def history_command(calc: CalculatorFacade, args: List[str], out: Optional[TextIO] = None) -> str:
+    """
+    Page, filter and print history rows one at a time; nothing is rendered
+    for rows outside the page. `--out PATH` writes the matching rows to a CSV
+    instead. With `out`, full chunks of lines are written there as they fill.
+    """
+    query = parse_history_args(args)
+    path = query.pop("out", None)
+    if query["tail"]:
+        query.setdefault("limit", TAIL_DEFAULT)
+    rows = calc.history.select(**query, notes=True)
+    shown = 0
+    if path is not None:
+        notes = calc.history.has_notes()
+
+        def counted():
+            nonlocal shown
+            for _, operator, operands, result, note in rows:
+                shown += 1
+                yield (operator, operands, result, note) if notes else (operator, operands, result)
+        with _open_output(path) as fh:
+            HistoryBuffer.write_csv_rows(fh, counted(), notes=notes)
+        return f"Wrote {shown} row(s) to {path}."
+    lines = [HISTORY_HEADER]
+    for row in rows:
+        lines.append(_format_row(*row))
+        shown += 1
+        if out is not None and len(lines) >= OUTPUT_CHUNK:
+            out.write("\n".join(lines) + "\n")
+            lines.clear()
+    lines.append(f"({shown} of {len(calc.history)} row(s))")
+    return "\n".join(lines)
+
+def _open_output(path: str) -> TextIO:
+    """Open `path` for a command's `--out`, as a per-line error if it cannot be created."""
+    try:
+        return open(path, "w", encoding="utf-8", newline="")
+    except OSError as exc:
+        raise ValidationError(f"Cannot write to {path}: {exc.strerror}") from exc
+
+def stats_command(calc: CalculatorFacade, args: List[str]) -> str:
+    if calc.metrics is None:
+        return "Metrics are disabled (set METRICS=true to enable)."
+    if args and args[0] == "reset":
+        calc.metrics.reset()
+        return "Stats reset."
+    if args and args[0] == "json":
+        text = json.dumps(calc.metrics.snapshot(), indent=2)
+        if len(args) < 2:
+            return text
+        with _open_output(args[1]) as fh:
+            fh.write(text + "\n")
+        return f"Exported {len(calc.metrics)} series to {args[1]}."
+    return calc.metrics.format()
+
+SUMMARY_HEADER = (f"{'operator':<12} {'count':>9} {'sum':>12} {'mean':>12} {'min':>12} {'max':>12} "
+                  f"{'nan/inf':>8}  errors")
+
+def summary_command(calc: CalculatorFacade, args: List[str]) -> str:
+    last = parse_summary_args(args)
+    summary = calc.summary(last, SUMMARY_TOP)
+
+    def line(name: str, s: Dict[str, float]) -> str:
+        errors = f"{s['errors']} ({s['error_rate']:.1%})" if "errors" in s else "-"
+        return (f"{name[:12]:<12} {s['count']:>9} {s['sum']:>12.6g} {s['mean']:>12.6g} {s['min']:>12.6g} "
+                f"{s['max']:>12.6g} {s['nan'] + s['inf']:>8}  {errors}")
+
+    lines = [f"Last {last} row(s):" if last is not None else "All rows:", SUMMARY_HEADER]
+    lines += [line(op, stats) for op, stats in summary["by_operator"].items()]
+    hidden = summary["operators"] - len(summary["by_operator"])
+    if hidden:
+        lines.append(f"({hidden} more operator(s))")
+    lines.append(line("all", summary["all"]))
+    return "\n".join(lines)
+
+def sweep_command(calc: CalculatorFacade, args: List[str], out: Optional[TextIO] = None) -> str:
+    """
+    Run `sweep` and print one line per grid point (failed points show their
+    error), or with `--out PATH` write the successful points as a history
+    CSV, which `load` reads back. With `out`, full chunks of lines are
+    written there as they fill, so a sweep of any size streams.
+    """
+    options = parse_sweep_args(args)
+    operator, path, quiet = options["operator"], options["out"], options["quiet"]
+    lines = [] if quiet or path is not None else [HISTORY_HEADER]
+    fh = _open_output(path) if path is not None else None
+
+    def emit(first: int, rows, batch):
+        if fh is not None:
+            kept = zip(rows[batch.ok].tolist(), batch.results[batch.ok].tolist()) if batch.errors else \
+                zip(rows.tolist(), batch.results.tolist())
+            HistoryBuffer.write_csv_rows(fh, ((operator, ops, res) for ops, res in kept), header=not first)
+            return
+        if quiet:
+            return
+        errors = batch.errors
+        for i, (ops, res) in enumerate(zip(rows.tolist(), batch.results.tolist())):
+            message = errors.get(i) if errors else None
+            lines.append(_format_row(first + i, operator, ops, res) if message is None else
+                         f"{first + i:>7}  {operator:<8} {str(ops):<24} error: {message}")
+        if out is not None and len(lines) >= OUTPUT_CHUNK:
+            out.write("\n".join(lines) + "\n")
+            lines.clear()
+
+    try:
+        report = calc.sweep(operator, options["specs"], options["record"], emit)
+    finally:
+        if fh is not None:
+            fh.close()
+    lines.append(f"Swept {report.points} point(s) ({report.errors} errors) in {report.seconds:.3f}s; "
+                 f"{report.recorded} history row(s) added" + (f"; rows written to {path}" if path is not None else ""))
+    return "\n".join(lines)
+
+def recompute_command(calc: CalculatorFacade, args: List[str]) -> str:
+    report = calc.recompute(**parse_recompute_args(args))
+    lines = [f"Checked {report.checked} row(s) in {report.seconds:.3f}s ({report.skipped} skipped): "
+             f"{len(report.mismatches)} mismatch(es), {len(report.errors)} now failing"]
+    if report.mismatches:
+        lines.append(f"{'#':>7}  {'operator':<8} {'stored':<24} recomputed")
+        lines += [f"{i:>7}  {op:<8} {old!r:<24} {new!r}" for i, op, old, new in report.mismatches[:RECOMPUTE_SHOWN]]
+        if len(report.mismatches) > RECOMPUTE_SHOWN:
+            lines.append(f"  ... {len(report.mismatches) - RECOMPUTE_SHOWN} more")
+    lines += [f"  row {i}: {msg}" for i, msg in islice(report.errors.items(), RECOMPUTE_SHOWN)]
+    if len(report.errors) > RECOMPUTE_SHOWN:
+        lines.append(f"  ... {len(report.errors) - RECOMPUTE_SHOWN} more")
+    if report.rewritten:
+        lines.append(f"Rewrote {report.rewritten} result(s); 'undo' restores them.")
+    return "\n".join(lines)
+
+def format_parallel(report: ParallelResult, max_errors: int = 10) -> str:
+    rate = report.operations / report.seconds if report.seconds else 0.0
+    lines = [f"{report.operations} operations ({len(report.errors)} errors) in {report.seconds:.3f}s "
+             f"on {report.workers} workers ({rate:.0f} ops/s)"]
+    lines += [f"  line {n}: {msg}" for n, msg in report.errors[:max_errors]]
+    if len(report.errors) > max_errors:
+        lines.append(f"  ... {len(report.errors) - max_errors} more")
+    return "\n".join(lines)
+
+def run_batch(calc: CalculatorFacade, lines: Iterable[str], out: TextIO, defer: bool = False) -> Dict[str, float]:
+    """
+    Stream commands from `lines` without prompts, writing results to `out` in
+    chunks. Errors are reported per line and do not stop the batch. With
+    `defer`, history autosave/observers run once per run of records instead of
+    after every record.
+    """
+    pending: List[str] = []
+    count = errors = 0
+    start = time.perf_counter()
+    with calc.history.deferred() if defer else nullcontext():
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            count += 1
+            try:
+                cmd, args = parse_command(line)
+                if cmd == "exit":
+                    break
+                if cmd in ("history", "sweep"):  # streams straight to `out`, after what is already pending
+                    if pending:
+                        out.write("\n".join(pending) + "\n")
+                        pending.clear()
+                    pending.append(handle(calc, cmd, args, out))
+                else:
+                    pending.append(handle(calc, cmd, args))
+            except (OperationError, ValidationError, UndoRedoError, CalculatorError) as e:
+                errors += 1
+                pending.append(f"Error: {e}")
+            if len(pending) >= OUTPUT_CHUNK:
+                out.write("\n".join(pending) + "\n")
+                pending.clear()
+    if pending:
+        out.write("\n".join(pending) + "\n")
+    out.flush()
+    elapsed = time.perf_counter() - start
+    return {"commands": count, "errors": errors, "seconds": elapsed,
+            "per_second": count / elapsed if elapsed else 0.0}
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.calculator_repl")
+    parser.add_argument("--batch", metavar="FILE", help="run commands from FILE ('-' for stdin) without prompts")
+    parser.add_argument("--defer-autosave", action="store_true",
+                        help="in batch mode, autosave history once at the end instead of per command")
+    parser.add_argument("--parallel", metavar="FILE", help="evaluate an operations file on a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --parallel")
+    parser.add_argument("--chunk-size", type=int, default=None, help="lines per worker task for --parallel")
+    return parser.parse_args(argv)
+
 def main(argv=None):  # pragma: no cover - interactive shell
+    opts = _parse_args(argv)
     cfg = Config.load()
     calc = CalculatorFacade(cfg)
+    if opts.parallel:
+        try:
+            print(format_parallel(calc.perform_file(opts.parallel, opts.workers, opts.chunk_size)), file=sys.stderr)
+        finally:
+            calc.close()
+        return
+    if opts.batch:
+        src = sys.stdin if opts.batch == "-" else open(opts.batch, "r", encoding="utf-8")
+        try:
+            stats = run_batch(calc, src, sys.stdout, defer=opts.defer_autosave)
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            calc.close()
+        print(f"{stats['commands']} commands ({stats['errors']} errors) in {stats['seconds']:.3f}s "
+              f"({stats['per_second']:.0f} cmd/s)", file=sys.stderr)
+        return
     print("Enhanced Calculator. Type 'help' for commands.")
     while True:
         try:
@@ -47,41 +627,16 @@ def main(argv=None):  # pragma: no cover - interactive shell
             if not line:
                 continue
             cmd, args = parse_command(line)
-            if cmd in {"+", "-", "*", "/", "^", "root"}:
-                res = calc.perform(cmd, args)
-                print(res)
-            elif cmd == "history":
-                print(calc.history.df.to_string(index=False))
-            elif cmd == "save":
-                path = args[0] if args else None
-                calc.history.save(path)
-                print("Saved.")
-            elif cmd == "load":
-                if not args:
-                    print("Usage: load <path>")
-                    continue
-                calc.history.load(args[0])
-                print("Loaded.")
-            elif cmd == "undo":
-                calc.history.undo()
-                print("Undone.")
-            elif cmd == "redo":
-                calc.history.redo()
-                print("Redone.")
-            elif cmd == "clear":
-                calc.history.clear()
-                print("Cleared.")
-            elif cmd == "help":
-                print(HELP_TEXT)
-            elif cmd == "exit":
+            if cmd == "exit":
                 print("Bye!")
+                calc.close()
                 break
-            else:
-                print("Unknown command. Type 'help'.")
+            print(handle(calc, cmd, args, sys.stdout))
         except (OperationError, ValidationError, UndoRedoError, CalculatorError) as e:
             print(f"Error: {e}")
         except EOFError:
             print("\nBye!")
+            calc.close()
             break
         except KeyboardInterrupt:
             print("\nInterrupted. Type 'exit' to quit.")
@@ -0,0 +1,180 @@
+"""
+Non-blocking change notifications for History.
+
+History publishes one small `HistoryEvent` per change (rows appended, undo,
+redo, clear, load, results rewritten) to an `EventBus` instead of handing
+each observer the whole DataFrame. Every subscription has its own bounded
+queue and worker thread, so a slow observer delays only itself; what a full
+queue does to the publisher is the subscription's overflow policy:
+
+    block     wait for room (backpressure on the calculation)
+    drop      discard the new event and count it in `dropped`
+    coalesce  replace the newest queued event with it, counted in `coalesced`;
+              for observers that only need the latest state (autosave)
+
+`flush()` waits until everything published so far has been delivered and
+re-raises the first error an observer raised; `close()` drains the queue
+(or discards it) and stops the worker. Callbacks run on the worker thread
+and must not wait on History's lock while a "block" publisher may be full.
+"""
+from __future__ import annotations
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, List, Optional, Tuple
+from .exceptions import ConfigurationError
+
+POLICIES = ("block", "drop", "coalesce")
+
+@dataclass(frozen=True)
+class HistoryEvent:
+    """
+    `op` is the History mutation ("add_record", "add_columns", "deferred",
+    "undo", "redo", "clear", "load", "set_results"); `change` the delta it
+    applied, or reverted if `reverse`; `length` the row count after it.
+    """
+    op: str
+    version: int
+    length: int
+    change: Any = None
+    reverse: bool = False
+
+class Subscription:
+    def __init__(self, callback: Callable[[Any], None], maxsize: int = 1024, policy: str = "block",
+                 name: str = "history-observer"):
+        if policy not in POLICIES:
+            raise ConfigurationError(f"Unknown overflow policy: {policy!r}")
+        if maxsize < 1:
+            raise ConfigurationError("Subscription queue size must be at least 1")
+        self.callback = callback
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self.delivered = self.dropped = self.coalesced = 0
+        self.error: Optional[BaseException] = None
+        self._queue: Deque[Any] = deque()
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, event: Any) -> bool:
+        """Queue `event` for the callback; False if it was dropped or the subscription is closed."""
+        with self._cond:
+            if self._closed:
+                return False
+            queue = self._queue
+            if len(queue) >= self.maxsize:
+                if self.policy == "drop":
+                    self.dropped += 1
+                    return False
+                if self.policy == "coalesce":
+                    queue.pop()
+                    self.coalesced += 1
+                elif threading.current_thread() is not self._thread:  # the callback itself never waits
+                    self._cond.wait_for(lambda: len(queue) < self.maxsize or self._closed)
+                    if self._closed:
+                        return False
+            queue.append(event)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return True
+
+    def _run(self):
+        cond, queue = self._cond, self._queue
+        while True:
+            with cond:
+                cond.wait_for(lambda: queue or self._closed)
+                if not queue:
+                    return  # closed and drained
+                event = queue.popleft()
+                self._busy = True
+                cond.notify_all()  # room for a blocked publisher
+            try:
+                self.callback(event)
+            except Exception as exc:  # kept for flush(); the worker keeps running
+                if self.error is None:
+                    self.error = exc
+            with cond:
+                self._busy = False
+                self.delivered += 1
+                cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event is delivered (False on timeout); re-raise a callback error."""
+        with self._cond:
+            done = self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+        return done
+
+    def close(self, drain: bool = True):
+        """Stop accepting events, deliver (or with `drain=False` discard) the queued ones, stop the worker."""
+        with self._cond:
+            self._closed = True
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            self._thread = None
+        self.flush()
+
+class EventBus:
+    """Publishes each event to every subscription's queue; never calls an observer itself."""
+
+    def __init__(self):
+        self._subscriptions: Tuple[Subscription, ...] = ()  # replaced, never mutated: publish needs no lock
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._subscriptions)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, callback: Callable[[Any], None], maxsize: int = 1024, policy: str = "block",
+                  name: str = "history-observer") -> Subscription:
+        subscription = Subscription(callback, maxsize, policy, name)
+        with self._lock:
+            self._subscriptions += (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, drain: bool = True):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        subscription.close(drain)
+
+    def publish(self, event: Any):
+        for subscription in self._subscriptions:
+            subscription.publish(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """`Subscription.flush` on every subscription; the first callback error is re-raised."""
+        done = True
+        errors: List[BaseException] = []
+        for subscription in self._subscriptions:
+            try:
+                done = subscription.flush(timeout) and done
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+        return done
+
+    def close(self, drain: bool = True):
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, ()
+        errors: List[BaseException] = []
+        for subscription in subscriptions:
+            try:
+                subscription.close(drain)
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
@@ -0,0 +1,196 @@
+"""
+Infix expression language compiled onto the operation strategies.
+
+Grammar (lowest to highest precedence):
+    expr   := term (('+' | '-') term)*
+    term   := unary (('*' | '/') unary)*
+    unary  := '-' unary | power
+    power  := atom ('^' unary)?            # right-associative
+    atom   := NUMBER | 'ans' | '(' expr ')' | 'root' unary unary
+
+`ans` is the previous result. Source text is parsed into an AST, constant
+subtrees are folded, and the rest is emitted as a small postfix program
+evaluated on a stack. Binary operators run through the `_FACTORY` strategies.
+"""
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import List, Mapping, Optional, Sequence, Tuple, Union
+from .exceptions import OperationError, ValidationError
+from .operations import operation_factory
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|(root|ans)\b|([-+*/^()]))")
+
+@dataclass(frozen=True)
+class Num:
+    value: float
+
+@dataclass(frozen=True)
+class Var:
+    name: str
+
+@dataclass(frozen=True)
+class Neg:
+    operand: "Node"
+
+@dataclass(frozen=True)
+class BinOp:
+    symbol: str
+    left: "Node"
+    right: "Node"
+
+Node = Union[Num, Var, Neg, BinOp]
+
+def tokenize(source: str) -> List[Tuple[str, int]]:
+    tokens, pos = [], 0
+    source = source.rstrip()
+    while pos < len(source):
+        m = _TOKEN.match(source, pos)
+        if not m:
+            raise ValidationError(f"Unexpected character at position {pos + 1}: {source[pos:].lstrip()[:1]!r}")
+        tokens.append((m.group(m.lastindex), m.start(m.lastindex)))
+        pos = m.end()
+    if not tokens:
+        raise ValidationError("Empty expression")
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, int]]):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def take(self) -> str:
+        if self.i >= len(self.tokens):
+            raise ValidationError("Unexpected end of expression")
+        tok = self.tokens[self.i][0]
+        self.i += 1
+        return tok
+
+    def parse(self) -> Node:
+        node = self.expr()
+        if self.i < len(self.tokens):
+            tok, pos = self.tokens[self.i]
+            raise ValidationError(f"Unexpected {tok!r} at position {pos + 1}")
+        return node
+
+    def expr(self) -> Node:
+        node = self.term()
+        while self.peek() in ("+", "-"):
+            node = BinOp(self.take(), node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while self.peek() in ("*", "/"):
+            node = BinOp(self.take(), node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        if self.peek() == "-":
+            self.take()
+            return Neg(self.unary())
+        return self.power()
+
+    def power(self) -> Node:
+        node = self.atom()
+        if self.peek() == "^":
+            node = BinOp(self.take(), node, self.unary())
+        return node
+
+    def atom(self) -> Node:
+        tok = self.take()
+        if tok == "(":
+            node = self.expr()
+            if self.take() != ")":
+                raise ValidationError("Expected ')'")
+            return node
+        if tok == "root":
+            return BinOp("root", self.unary(), self.unary())
+        if tok == "ans":
+            return Var(tok)
+        if tok in "+-*/^)":
+            raise ValidationError(f"Unexpected {tok!r}")
+        return Num(float(tok))
+
+def _apply(symbol: str, a: float, b: float) -> float:
+    try:
+        result = operation_factory(symbol).execute([a, b])
+    except OperationError:
+        raise
+    except Exception as exc:  # float power overflow / zero to a negative power
+        raise OperationError(str(exc)) from exc
+    if isinstance(result, complex):
+        raise OperationError("Result is not a real number")
+    return result
+
+def fold(node: Node) -> Node:
+    """Replace constant subtrees by their value; failing subtrees are left to fail at run time."""
+    if isinstance(node, Neg):
+        inner = fold(node.operand)
+        return Num(-inner.value) if isinstance(inner, Num) else Neg(inner)
+    if isinstance(node, BinOp):
+        left, right = fold(node.left), fold(node.right)
+        if isinstance(left, Num) and isinstance(right, Num):
+            try:
+                return Num(_apply(node.symbol, left.value, right.value))
+            except OperationError:
+                pass
+        return BinOp(node.symbol, left, right)
+    return node
+
+Instruction = Tuple[str, object]
+
+def _emit(node: Node, code: List[Instruction]):
+    if isinstance(node, Num):
+        code.append(("const", node.value))
+    elif isinstance(node, Var):
+        code.append(("load", node.name))
+    elif isinstance(node, Neg):
+        _emit(node.operand, code)
+        code.append(("neg", None))
+    else:
+        _emit(node.left, code)
+        _emit(node.right, code)
+        code.append(("op", node.symbol))
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    source: str
+    code: Tuple[Instruction, ...]
+    names: Tuple[str, ...]
+
+    def run(self, env: Optional[Mapping[str, Optional[float]]] = None) -> float:
+        stack: List[float] = []
+        for kind, arg in self.code:
+            if kind == "const":
+                stack.append(arg)
+            elif kind == "load":
+                value = (env or {}).get(arg)
+                if value is None:
+                    raise ValidationError(f"{arg!r} is not defined yet")
+                stack.append(float(value))
+            elif kind == "neg":
+                stack.append(-stack.pop())
+            else:
+                b = stack.pop()
+                stack.append(_apply(arg, stack.pop(), b))
+        return stack[0]
+
+def compile_expression(source: str) -> CompiledExpression:
+    tokens = tokenize(source)
+    code: List[Instruction] = []
+    _emit(fold(_Parser(tokens).parse()), code)
+    names = tuple(sorted({arg for kind, arg in code if kind == "load"}))
+    return CompiledExpression(source=" ".join(tok for tok, _ in tokens), code=tuple(code), names=names)
+
+def looks_like_expression(line: str) -> bool:
+    """True for input that is not a prefix command: starts with a number, '(', '-<x>' or 'ans'."""
+    line = line.lstrip()
+    return line[:1].isdigit() or line[:1] in ("(", ".", "-") or line.startswith("ans")
+
+def operands_for(compiled: CompiledExpression, env: Mapping[str, Optional[float]]) -> Sequence[float]:
+    """Values of the variables an expression read, recorded as its history operands."""
+    return [float(env[name]) for name in compiled.names]
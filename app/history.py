@@ -1,15 +1,329 @@
-
 """
 History management using pandas and Observer pattern.
+
+pandas is imported lazily: the column buffers are read and written as CSV
+with the standard library, and a DataFrame is only built when `df` is used.
 """
 from __future__ import annotations
+import csv
+import errno
+import math
 import os
-from typing import Callable, List, Optional
-import pandas as pd
-from .calculator_memento import HistoryMemento, Caretaker
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+from itertools import islice
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+from .aggregates import HistoryAggregates
+from .calculator_memento import AppendDelta, ReplaceDelta, ResultsDelta, Caretaker, ROW_OVERHEAD
+from .events import EventBus, HistoryEvent, Subscription
+from .history_storage import CsvStorage, HistoryStorage
+from .metrics import Metrics
+from . import history_binary
+from .ragged import RaggedColumn
 from .exceptions import ValidationError
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+COLUMNS = ["operator", "operands", "result"]
+NOTE_COLUMN = "note"  # optional fourth CSV column, only written when some row has a note
+_PARSE_CHUNK = 1 << 16  # CSV operand strings parsed per batch
+_SELECT_CHUNK = 256  # rows `select` reads per lock acquisition
+
+def _reorder(reader, header: List[str], notes: Dict[int, str]) -> Iterator[List[str]]:
+    """CSV rows in `COLUMNS` order ("" for a missing column); non-empty notes go to `notes`."""
+    pos = [header.index(col) if col in header else None for col in COLUMNS]
+    note = header.index(NOTE_COLUMN) if NOTE_COLUMN in header else None
+    for n, row in enumerate(reader):
+        if note is not None and row[note]:
+            notes[n] = row[note]
+        yield ["" if i is None else row[i] for i in pos]
+
+class HistoryBuffer:
+    """
+    Append-optimized column store backing History.
+    Operators and results are growable Python lists and operands a ragged
+    float64 column (`ragged.RaggedColumn`), so appends are amortized O(1);
+    the DataFrame view is only materialized on demand. A buffer read from a
+    binary `.hcol` file holds read-only mapped column views instead, which
+    are copied into growable columns on the first mutation.
+
+    `operator_index()` maps each operator to its row positions and
+    `aggregates()` holds per-operator result statistics. Both are built on
+    first use and then kept up to date by append/extend/truncate, so repeated
+    lookups by operator and summaries never rescan the columns.
+
+    `notes` maps row positions to free text kept beside the columns, e.g.
+    the source of an expression recorded under the `eval` operator; most
+    rows have none, so it is sparse and the operator column stays a small
+    set of symbols and tags.
+
+    `failures` counts each operator's failed calls, which leave no row, for
+    the error rates in `summary`. They belong to this state of the history:
+    a clear or load starts from none and undoing it brings the old counts
+    back. They are not persisted.
+    """
+    __slots__ = ("operators", "operands", "results", "notes", "failures", "_mapped", "_index", "_aggregates")
+
+    def __init__(self):
+        self.operators: List[str] = []
+        self.operands: RaggedColumn = RaggedColumn()
+        self.results: List[float] = []
+        self.notes: Dict[int, str] = {}
+        self.failures: Dict[str, int] = {}
+        self._mapped = False
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._aggregates: Optional[HistoryAggregates] = None
+
+    def _materialize(self):
+        self.operators = list(self.operators)
+        self.operands = RaggedColumn.from_arrays(self.operands.offsets, self.operands.flat)
+        self.results = list(self.results)
+        self._mapped = False
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self):
+        return zip(self.operators, self.operands, self.results)
+
+    def append(self, operator: str, operands, result: float, note: Optional[str] = None):
+        if self._mapped:
+            self._materialize()
+        result = float(result)
+        if note:
+            self.notes[len(self.operators)] = note
+        if self._index is not None:
+            self._index.setdefault(operator, []).append(len(self.operators))
+        if self._aggregates is not None:
+            self._aggregates.add(len(self.operators), operator, result)
+        self.operators.append(operator)
+        self.operands.append(operands)
+        self.results.append(result)
+
+    def clear(self):
+        self.operators, self.operands, self.results = [], RaggedColumn(), []
+        self.notes = {}
+        self._mapped = False
+        self._index = None
+        self._aggregates = None
+
+    def truncate(self, n: int):
+        if self._mapped:
+            self._materialize()
+        if self._index is not None:
+            for operator in set(self.operators[n:]):
+                positions = self._index[operator]
+                while positions and positions[-1] >= n:
+                    positions.pop()
+                if not positions:
+                    del self._index[operator]
+        if self._aggregates is not None:
+            self._aggregates.truncate(n, self.operators[n:], self.results[n:])
+        notes = self.notes
+        if notes:
+            cut = range(n, len(self)) if len(self) - n < len(notes) else [i for i in notes if i >= n]
+            for i in cut:
+                notes.pop(i, None)
+        del self.operators[n:]
+        self.operands.truncate(n)
+        del self.results[n:]
+
+    def set_results(self, positions: Iterable[int], values: Iterable[float]):
+        """Overwrite the results at `positions` (operators and operands stay)."""
+        if self._mapped:
+            self._materialize()
+        results = self.results
+        for i, value in zip(positions, values):
+            results[i] = float(value)
+        self._aggregates = None  # min/max stacks cannot take a changed value; rebuilt on use
+
+    def extend(self, rows, notes: Optional[Dict[int, str]] = None):
+        """Append (operator, operands, result) rows; `notes` positions count from the first of them."""
+        start = len(self)
+        for operator, operands, result in rows:
+            self.append(operator, operands, result)
+        self._add_notes(start, notes)
+
+    def extend_columns(self, operators, operands, results, notes: Optional[Dict[int, str]] = None):
+        if self._mapped:
+            self._materialize()
+        self._add_notes(len(self.operators), notes)
+        if self._index is not None:
+            index = self._index
+            for i, operator in enumerate(operators, len(self.operators)):
+                index.setdefault(operator, []).append(i)
+        if self._aggregates is not None:
+            self._aggregates.extend(len(self.operators), operators, results)
+        self.operators.extend(operators)
+        self.operands.extend(operands)
+        self.results.extend(results)
+
+    def _add_notes(self, start: int, notes: Optional[Dict[int, str]]):
+        if notes:
+            self.notes.update((start + i, note) for i, note in notes.items())
+
+    def rows(self, start: int = 0, stop: Optional[int] = None):
+        return list(zip(self.operators[start:stop], self.operands[start:stop], self.results[start:stop]))
+
+    def notes_from(self, start: int) -> Dict[int, str]:
+        """Notes of the rows from `start` on, keyed by position relative to `start`."""
+        return {i - start: note for i, note in self.notes.items() if i >= start}
+
+    def operator_index(self) -> Dict[str, List[int]]:
+        """{operator: ascending row positions}; treat the lists as read-only."""
+        if self._index is None:
+            if self._mapped:
+                self._index = self.operators.positions()
+            else:
+                index: Dict[str, List[int]] = {}
+                for i, operator in enumerate(self.operators):
+                    index.setdefault(operator, []).append(i)
+                self._index = index
+        return self._index
+
+    def aggregates(self) -> HistoryAggregates:
+        """Per-operator and overall result statistics; treat them as read-only."""
+        if self._aggregates is None:
+            self._aggregates = HistoryAggregates.build(self.operators, self.results, self.operator_index())
+        return self._aggregates
+
+    def copy(self) -> "HistoryBuffer":
+        buf = HistoryBuffer()
+        buf.notes = dict(self.notes)
+        buf.failures = dict(self.failures)
+        if self._aggregates is not None:  # so undo of clear/load needs no rebuild
+            buf._aggregates = self._aggregates.copy()
+        if self._mapped:  # read-only views can be shared
+            buf.operators, buf.operands, buf.results = self.operators, self.operands, self.results
+            buf._mapped = True
+            return buf
+        buf.operators = list(self.operators)
+        buf.operands = self.operands.copy()
+        buf.results = list(self.results)
+        return buf
+
+    def nbytes(self) -> int:
+        return ROW_OVERHEAD * len(self) + 8 * len(self.operands.flat)
+
+    @staticmethod
+    def write_csv_rows(fh: TextIO, rows: Iterable[Tuple], header: bool = True, notes: bool = False):
+        """
+        Write a header and (operator, operands, result) rows in the `write_csv`
+        format; with `notes`, rows carry a fourth item (None for no note) for
+        the note column.
+        """
+        writer = csv.writer(fh, lineterminator="\n")
+        if header:
+            writer.writerow(COLUMNS + [NOTE_COLUMN] if notes else COLUMNS)
+        if notes:
+            writer.writerows(
+                (op, str(list(ops)), "" if math.isnan(res) else repr(res), note or "")
+                for op, ops, res, note in rows
+            )
+            return
+        writer.writerows(
+            (op, str(list(ops)), "" if math.isnan(res) else repr(res))
+            for op, ops, res in rows
+        )
+
+    def write_csv(self, fh: TextIO):
+        """Write the same CSV as `to_frame().to_csv(index=False)`, without pandas."""
+        notes = self.notes
+        if not notes:
+            self.write_csv_rows(fh, self)
+            return
+        rows = ((op, ops, res, notes.get(i)) for i, (op, ops, res) in enumerate(self))
+        self.write_csv_rows(fh, rows, notes=True)
+
+    @staticmethod
+    def read_csv(path: str) -> "HistoryBuffer":
+        """Inverse of `write_csv`; operands are parsed into the float64 operands column."""
+        buf = HistoryBuffer()
+        texts: List[str] = []
+        add_operator, add_text, add_result = buf.operators.append, texts.append, buf.results.append
+        nan = math.nan
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            reader = csv.reader(fh)
+            header = next(reader, COLUMNS)
+            if header != COLUMNS:  # a note column, other column order, or missing columns
+                reader = _reorder(reader, header, buf.notes)
+            for operator, operands, result in reader:
+                add_operator(operator)
+                add_text(operands)
+                add_result(float(result) if result else nan)
+                if len(texts) >= _PARSE_CHUNK:
+                    buf.operands.extend_text(texts)
+                    texts.clear()
+        buf.operands.extend_text(texts)
+        return buf
+
+    def write_binary(self, fh: BinaryIO):
+        history_binary.write_binary(fh, self.operators, self.operands, self.results, self.notes)
+
+    @staticmethod
+    def read_binary(path: str) -> "HistoryBuffer":
+        """Map a `.hcol` file; constant time regardless of its size."""
+        buf = HistoryBuffer()
+        buf.operators, buf.operands, buf.results, buf.notes = history_binary.read_binary(path)
+        buf._mapped = True
+        return buf
+
+    @staticmethod
+    def read_file(path: str) -> "HistoryBuffer":
+        """Read CSV or, for a `.hcol` path, the binary columnar format."""
+        if history_binary.is_binary(path):
+            return HistoryBuffer.read_binary(path)
+        return HistoryBuffer.read_csv(path)
+
+    def write_file(self, path: str):
+        """
+        Write CSV (or binary, for a `.hcol` path) to a temp file and rename it
+        over `path`: readers never see a partial file, and a history mapped
+        from `path` keeps its old contents.
+        """
+        binary = history_binary.is_binary(path)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique per writer thread
+        try:
+            with open(tmp, "wb") if binary else open(tmp, "w", encoding="utf-8", newline="") as fh:
+                if binary:
+                    self.write_binary(fh)
+                else:
+                    self.write_csv(fh)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def to_frame(self) -> pd.DataFrame:
+        import pandas as pd
+        data = {"operator": list(self.operators), "operands": list(self.operands), "result": list(self.results)}
+        if not self.notes:
+            return pd.DataFrame(data, columns=COLUMNS)
+        data[NOTE_COLUMN] = [self.notes.get(i) for i in range(len(self))]
+        return pd.DataFrame(data, columns=COLUMNS + [NOTE_COLUMN])
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame) -> "HistoryBuffer":
+        buf = HistoryBuffer()
+        for col in COLUMNS:
+            if col not in df.columns:
+                df = df.assign(**{col: None})  # pragma: no cover
+        buf.operators = df["operator"].tolist()
+        buf.operands = RaggedColumn(df["operands"].tolist())
+        buf.results = df["result"].tolist()
+        if NOTE_COLUMN in df.columns:
+            buf.notes = {i: note for i, note in enumerate(df[NOTE_COLUMN].tolist()) if isinstance(note, str) and note}
+        return buf
+
 class Observable:
+    """
+    Synchronous observers, called with the whole DataFrame under the history
+    lock after every change. Kept for existing callers; `History.subscribe`
+    delivers small events on the observer's own thread instead.
+    """
     def __init__(self):
         self._observers: List[Callable[[pd.DataFrame], None]] = []
 
@@ -21,60 +335,377 @@ class Observable:
             obs(df)
 
 class History(Observable):
-    def __init__(self, csv_path: Optional[str] = None, autosave: bool = True):
+    """
+    Rows live in memory (`HistoryBuffer`); `storage` (see `history_storage`)
+    persists them, by default the CSV at `csv_path` per `autosave_mode`.
+    Every change is published as a `HistoryEvent` on `events` (see `events`).
+
+    Thread safety: every mutation (append, clear, load, undo, redo, save)
+    runs under one re-entrant lock together with its storage record and
+    observer notification, so concurrent producers never lose
+    rows and each undo/redo reverts or replays the latest change in lock
+    order. Callers parse and compute before calling in, which keeps the
+    critical section to a buffer append and an undo-stack push.
+    """
+    def __init__(self, csv_path: Optional[str] = None, autosave: bool = True,
+                 max_undo: Optional[int] = None, max_undo_bytes: Optional[int] = None,
+                 autosave_mode: str = "snapshot", journal_fsync: str = "always",
+                 journal_max_bytes: int = 1 << 20, autosave_interval_ms: int = 500,
+                 storage: Optional[HistoryStorage] = None):
         super().__init__()
-        self.csv_path = csv_path
+        self.events = EventBus()
+        if storage is None and csv_path:
+            storage = CsvStorage(csv_path, autosave, autosave_mode, journal_fsync, journal_max_bytes,
+                                 autosave_interval_ms, snapshot=self._snapshot, events=self.events)
+        self.storage = storage
+        self.csv_path = storage.path if storage is not None else csv_path
         self.autosave = autosave
-        self.df = pd.DataFrame(columns=["operator", "operands", "result"])
-        self.caretaker = Caretaker()
-        self.caretaker.push(HistoryMemento.from_df(self.df))
-        if self.csv_path and os.path.exists(self.csv_path):  # pragma: no cover
-            self.load(self.csv_path)  
+        self._buffer = HistoryBuffer()
+        self._df_cache: Optional[pd.DataFrame] = None
+        self.caretaker = Caretaker(max_depth=max_undo, max_bytes=max_undo_bytes)
+        self._deferring = 0  # open `deferred()` blocks
+        self._pending_start: Optional[int] = None
+        self._lock = threading.RLock()  # serializes mutations and snapshots (see class docstring)
+        self._loaded = storage is None
+        self.metrics: Optional[Metrics] = None  # set to time storage/publish/notify per mutation
+        self.version = 0  # bumped by every change; see `versioned_copy`
+
+    def _ensure_loaded(self):
+        """Load the stored history (and replay the journal) on first use instead of at construction."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return  # pragma: no cover - another thread loaded it while we waited
+            buf = self.storage.load()
+            if buf is not None:
+                self._buffer = buf
+                self.caretaker.push(ReplaceDelta(before=HistoryBuffer(), after=buf.copy(), nbytes=buf.nbytes()))
+            self._loaded = True
+
+    # Lazily materialized DataFrame view over the column buffers
+    @property
+    def df(self) -> pd.DataFrame:
+        self._ensure_loaded()
+        with self._lock:
+            if self._df_cache is None:
+                self._df_cache = self._buffer.to_frame()
+            return self._df_cache
+
+    @df.setter
+    def df(self, frame: pd.DataFrame):
+        self._ensure_loaded()
+        with self._lock:
+            self._buffer = HistoryBuffer.from_frame(frame)
+            self._df_cache = None
+            self.version += 1
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._buffer)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None):
+        """(operator, operands, result) tuples without building the DataFrame."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._buffer.rows(start, stop)
+
+    def select(self, operator: Optional[str] = None, min_result: Optional[float] = None,
+               max_result: Optional[float] = None, offset: int = 0, limit: Optional[int] = None,
+               tail: bool = False, notes: bool = False) -> Iterator[Tuple]:
+        """
+        Lazily yield (position, operator, operands, result) for the rows
+        matching `operator` and min_result <= result <= max_result, skipping
+        `offset` matches and stopping after `limit`. With `tail`, offset and
+        limit count back from the newest row; rows still come out oldest first.
+        An operator filter is served from the buffer's operator index. With
+        `notes`, each row ends with its note (None for most rows).
+
+        Rows are read under the history lock a chunk at a time, so paging
+        alongside other threads never sees a torn row; rows an undo removes
+        meanwhile end the iteration early.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            buf = self._buffer
+            positions = buf.operator_index().get(operator, []) if operator is not None else range(len(buf))
+            if min_result is None and max_result is None:
+                if tail:
+                    stop = max(len(positions) - offset, 0)
+                    chosen = positions[0 if limit is None else max(stop - limit, 0):stop]
+                else:
+                    chosen = positions[offset:None if limit is None else offset + limit]
+        if min_result is not None or max_result is not None:
+            lo = -math.inf if min_result is None else min_result
+            hi = math.inf if max_result is None else max_result
+            results = buf.results
+
+            def matches():
+                for i in reversed(positions) if tail else positions:
+                    try:
+                        if lo <= results[i] <= hi:
+                            yield i
+                    except IndexError:
+                        return  # truncated by another thread
+
+            chosen = islice(matches(), offset, None if limit is None else offset + limit)
+            if tail:
+                chosen = reversed(list(chosen))
+        chosen = iter(chosen)
+        while True:
+            batch = list(islice(chosen, _SELECT_CHUNK))
+            if not batch:
+                return
+            with self._lock:
+                n, operators, operands, results = len(buf), buf.operators, buf.operands, buf.results
+                first, last = batch[0], batch[-1]
+                if last - first == len(batch) - 1 and last < n:  # positions ascend, so this is a run
+                    rows = list(zip(batch, operators[first:last + 1], operands[first:last + 1],
+                                    results[first:last + 1]))
+                else:
+                    rows = [(i, operators[i], list(operands[i]), results[i]) for i in batch if i < n]
+                if notes:
+                    get = buf.notes.get
+                    rows = [row + (get(row[0]),) for row in rows]
+            yield from rows
+            if len(rows) < len(batch):
+                return
+
+    def has_notes(self) -> bool:
+        """Whether any row has a note (see `HistoryBuffer.notes`)."""
+        self._ensure_loaded()
+        with self._lock:
+            return bool(self._buffer.notes)
+
+    def summary(self, last: Optional[int] = None, top: Optional[int] = None) -> Dict[str, object]:
+        """
+        Result statistics overall and per operator (see `aggregates`): for
+        the whole history straight from the incrementally kept aggregates,
+        or, with `last`, for the newest `last` rows in O(last).
+        """
+        self._ensure_loaded()
+        with self._lock:
+            buf = self._buffer
+            if last is None:
+                return buf.aggregates().stats(top)
+            start = max(len(buf) - last, 0)
+            operators, results = buf.operators[start:], buf.results[start:]
+        return HistoryAggregates.build(operators, results).stats(top)
+
+    def record_failures(self, operator: str, count: int = 1):
+        """Count failed calls of `operator` (see `HistoryBuffer.failures`); not a change, not undoable."""
+        self._ensure_loaded()
+        with self._lock:
+            failures = self._buffer.failures
+            failures[operator] = failures.get(operator, 0) + count
+
+    def failures(self) -> Dict[str, int]:
+        """{operator: failed calls} for the current history state."""
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._buffer.failures)
 
-        if self.autosave and self.csv_path:  
-            self.attach(self._csv_autosave)  # pragma: no cover
+    # Delta targets used by the memento classes
+    def _truncate(self, n: int):
+        self._buffer.truncate(n)
 
-    # Observer
-    def _csv_autosave(self, df: pd.DataFrame):
-        if self.csv_path: # pragma: no cover
-            df.to_csv(self.csv_path, index=False) 
+    def _extend_columns(self, operators, operands, results, notes=None):
+        self._buffer.extend_columns(operators, operands, results, notes)
 
-    def add_record(self, operator: str, operands, result: float):
+    def _set_results(self, positions, values):
+        self._buffer.set_results(positions, values)
+
+    def _restore(self, buf: HistoryBuffer):
+        self._buffer = buf.copy()
+
+    def _snapshot(self) -> HistoryBuffer:
+        """Consistent copy of the buffer for writing from another thread."""
+        with self._lock:
+            return self._buffer.copy()
+
+    def versioned_copy(self) -> Tuple[HistoryBuffer, int]:
+        """A copy of the rows to work on outside the lock, and the `version` it was taken at."""
+        self._ensure_loaded()
+        with self._lock:
+            self._flush_pending()
+            return self._buffer.copy(), self.version
+
+    def _replace(self, buf: HistoryBuffer, op: str):
+        self._ensure_loaded()
+        with self._lock:
+            self._flush_pending()
+            before = self._buffer
+            self._buffer = buf
+            delta = ReplaceDelta(before=before, after=buf.copy(), nbytes=before.nbytes() + buf.nbytes())
+            self.caretaker.push(delta)
+            self._changed(delta, op=op)
+
+    def _changed(self, change, reverse: bool = False, op: str = "change"):
+        self._df_cache = None
+        self.version += 1
+        metrics = self.metrics
+        if self.storage is not None:
+            start = perf_counter_ns()
+            self.storage.record(change, reverse, self._buffer)
+            if metrics is not None:
+                metrics.record(f"history.{op}", self.storage.stage, perf_counter_ns() - start)
+        if self.events:
+            start = perf_counter_ns()
+            self.events.publish(HistoryEvent(op, self.version, len(self._buffer), change, reverse))
+            if metrics is not None:
+                metrics.record(f"history.{op}", "publish", perf_counter_ns() - start)
+        if self._observers:
+            start = perf_counter_ns()
+            self.notify(self.df)
+            if metrics is not None:
+                metrics.record(f"history.{op}", "notify", perf_counter_ns() - start)
+
+    def subscribe(self, callback: Callable[[HistoryEvent], None], maxsize: int = 1024,
+                  policy: str = "block", name: str = "history-observer") -> Subscription:
+        """
+        Call `callback` with a `HistoryEvent` after each change, on its own
+        worker thread behind a queue of `maxsize` events; `policy` says what a
+        full queue does to the producer ("block", "drop" or "coalesce"). Use
+        `events.flush()` to wait for delivery and `events.unsubscribe` to stop.
+        """
+        return self.events.subscribe(callback, maxsize, policy, name)
+
+    @contextmanager
+    def deferred(self):
+        """
+        Hold back autosave/notify for records added inside the block and emit
+        them as one change when it ends (or before any other mutation).
+        Undo stays per record. Blocks may nest or overlap across threads;
+        the change is emitted when the last one ends.
+        """
+        with self._lock:
+            self._deferring += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferring -= 1
+                if not self._deferring:
+                    self._flush_pending()
+
+    def _flush_pending(self):
+        if self._pending_start is None:
+            return
+        start, self._pending_start = self._pending_start, None
+        buf = self._buffer
+        self._changed(AppendDelta.of(start, buf.rows(start), buf.notes_from(start)), op="deferred")
+
+    def add_record(self, operator: str, operands, result: float, note: Optional[str] = None):
+        """Append one row; `note` is free text kept beside it (see `HistoryBuffer.notes`)."""
         if operator is None:
             raise ValidationError("operator cannot be None")
-        new_row = {"operator": operator, "operands": list(operands), "result": float(result)}
-        self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-        self.caretaker.push(HistoryMemento.from_df(self.df))
-        self.notify(self.df)
+        if not self._loaded:
+            self._ensure_loaded()
+        operands = tuple(operands)
+        nbytes = ROW_OVERHEAD + 8 * len(operands)
+        with self._lock:
+            delta = AppendDelta(len(self._buffer), (operator,), (operands,), (float(result),), nbytes=nbytes,
+                                notes={0: note} if note else None)
+            self._buffer.append(operator, operands, result, note)
+            self._appended(delta, "add_record")
+
+    def add_records(self, records):
+        """Bulk append of (operator, operands, result) rows as one change."""
+        rows = [(op, list(ops), float(res)) for op, ops, res in records]
+        if rows:
+            self.add_columns(*zip(*rows))
+
+    def add_columns(self, operators, operands, results, nbytes: Optional[int] = None,
+                    notes: Optional[Dict[int, str]] = None):
+        """
+        Column-wise bulk append as one change. `operands` rows are stored as
+        given and must not be mutated afterwards; `notes` positions count
+        from the first new row.
+        """
+        if None in operators:
+            raise ValidationError("operator cannot be None")
+        self._ensure_loaded()
+        if nbytes is None:
+            nbytes = sum(ROW_OVERHEAD + 8 * len(ops) for ops in operands)
+        with self._lock:
+            delta = AppendDelta(len(self._buffer), operators, operands, results, nbytes=nbytes, notes=notes or None)
+            self._buffer.extend_columns(operators, operands, results, notes)
+            self._appended(delta, "add_columns")
+
+    def _appended(self, delta: AppendDelta, op: str):
+        self.caretaker.push(delta)
+        if self._deferring:
+            if self._pending_start is None:
+                self._pending_start = delta.start
+            self._df_cache = None
+            self.version += 1
+            return
+        self._changed(delta, op=op)
+
+    def set_results(self, positions: Sequence[int], values: Sequence[float], version: Optional[int] = None):
+        """
+        Overwrite the results at `positions` as one undoable change. With
+        `version` (from `versioned_copy`), refuse if the history changed since.
+        """
+        self._ensure_loaded()
+        positions, values = tuple(positions), tuple(float(v) for v in values)
+        with self._lock:
+            self._flush_pending()
+            if version is not None and version != self.version:
+                raise ValidationError("History changed meanwhile; nothing was rewritten")
+            results = self._buffer.results
+            delta = ResultsDelta(positions, tuple(results[i] for i in positions), values, nbytes=24 * len(positions))
+            self._buffer.set_results(positions, values)
+            self.caretaker.push(delta)
+            self._changed(delta, op="set_results")
 
     def clear(self):
-        self.df = pd.DataFrame(columns=["operator", "operands", "result"])
-        self.caretaker.push(HistoryMemento.from_df(self.df))
-        self.notify(self.df)
+        self._replace(HistoryBuffer(), "clear")
 
     def undo(self):
-        mem = self.caretaker.undo() 
-        self.df = mem.to_df()
-        self.notify(self.df)
+        self._ensure_loaded()
+        with self._lock:
+            self._flush_pending()
+            change = self.caretaker.undo()
+            change.undo(self)
+            self._changed(change, reverse=True, op="undo")
 
     def redo(self):
-        mem = self.caretaker.redo()
-        self.df = mem.to_df()
-        self.notify(self.df)
+        self._ensure_loaded()
+        with self._lock:
+            self._flush_pending()
+            change = self.caretaker.redo()
+            change.redo(self)
+            self._changed(change, op="redo")
 
     def load(self, path: str):
         if not os.path.exists(path):
-            raise FileNotFoundError(path) # pragma: no cover
-        self.df = pd.read_csv(path)
-        for col in ["operator", "operands", "result"]:
-            if col not in self.df.columns:
-                self.df[col] = None # pragma: no cover
-        self.caretaker.push(HistoryMemento.from_df(self.df))
-        self.notify(self.df)
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        self._replace(HistoryBuffer.read_file(path), "load")
 
     def save(self, path: Optional[str] = None):
+        """Write to `path`, or bring the configured storage up to date."""
+        storage = self.storage
         if path is None:
             path = self.csv_path
-        if not path: 
+        if not path:
             raise ValidationError("CSV path not configured")
-        self.df.to_csv(path, index=False)
+        self._ensure_loaded()
+        with self._lock:
+            self._flush_pending()
+            if storage is None or path != storage.path:
+                self._buffer.write_file(path)
+                return
+            storage.save(self._buffer)
+        storage.sync()  # outside the lock: a background writer takes it to snapshot the buffer
+
+    def flush(self):
+        """Wait until storage has written every change so far (autosave runs on a writer thread)."""
+        if self.storage is not None:
+            self.storage.sync()
+
+    def close(self):
+        """Flush and release storage resources, then deliver pending events and stop their workers."""
+        if self.storage is not None:
+            self.storage.close()
+        self.events.close()
@@ -0,0 +1,184 @@
+"""
+Binary columnar history format (`.hcol`), memory-mapped on load.
+
+Layout, every section 8-byte aligned, little-endian:
+    magic    b"CALCHST1"
+    uint64   length of the JSON header
+    header   {"rows": n, "operands": m, "operators": [distinct operator strings],
+              "notes": {position: text}}   (notes only if some row has one)
+    codes    uint32[n]     index into "operators"
+    results  float64[n]
+    offsets  int64[n + 1]  row i's operands are flat[offsets[i]:offsets[i + 1]]
+    flat     float64[m]
+
+Loading maps the file and wraps the sections in read-only column views, so
+opening a history of any size takes constant time; rows are decoded only
+when read. NumPy is imported by these functions, not by the module.
+"""
+from __future__ import annotations
+import json
+import os
+import struct
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, List, Mapping, Optional, Tuple
+from .exceptions import ValidationError
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+SUFFIX = ".hcol"
+MAGIC = b"CALCHST1"
+_ITER_CHUNK = 4096  # rows decoded per step when iterating a view
+
+def is_binary(path: str) -> bool:
+    return path.lower().endswith(SUFFIX)
+
+def parse_operands(text) -> List[float]:
+    """Operands as written in the CSV ("[1.0, 2.5]"); NaN/inf and bare ints are accepted."""
+    if not isinstance(text, str):
+        return [float(x) for x in text]
+    body = text.strip()
+    if body.startswith(("[", "(")) and body.endswith(("]", ")")):
+        body = body[1:-1]
+    try:
+        return [float(x) for x in body.split(",") if x.strip()]
+    except ValueError as exc:
+        raise ValidationError(f"Cannot convert operands {text!r} to numbers") from exc
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+class _Column(Sequence):
+    """Read-only column over mapped arrays; integer indexing and contiguous slices decode on demand."""
+    __slots__ = ()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self._item(j) for j in range(start, stop, step)]
+            return self._slice(start, max(start, stop))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("history row out of range")
+        return self._item(i)
+
+    def __iter__(self) -> Iterator:
+        for start in range(0, len(self), _ITER_CHUNK):
+            yield from self._slice(start, min(start + _ITER_CHUNK, len(self)))
+
+class OperatorColumn(_Column):
+    __slots__ = ("codes", "table")
+
+    def __init__(self, codes: "np.ndarray", table: List[str]):
+        self.codes, self.table = codes, table
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _item(self, i: int) -> str:
+        return self.table[self.codes[i]]
+
+    def _slice(self, start: int, stop: int) -> List[str]:
+        table = self.table
+        return [table[c] for c in self.codes[start:stop].tolist()]
+
+    def positions(self) -> Dict[str, List[int]]:
+        """{operator: ascending row positions}, one vectorized pass per distinct operator."""
+        import numpy as np
+        return {self.table[code]: np.flatnonzero(self.codes == code).tolist() for code in np.unique(self.codes).tolist()}
+
+class OperandColumn(_Column):
+    __slots__ = ("offsets", "flat")
+
+    def __init__(self, offsets: "np.ndarray", flat: "np.ndarray"):
+        self.offsets, self.flat = offsets, flat
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _item(self, i: int) -> List[float]:
+        return self.flat[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def _slice(self, start: int, stop: int) -> List[List[float]]:
+        bounds = self.offsets[start:stop + 1].tolist()  # start <= stop <= len, so never empty
+        values = self.flat[bounds[0]:bounds[-1]].tolist()
+        base = bounds[0]
+        return [values[a - base:b - base] for a, b in zip(bounds, bounds[1:])]
+
+class ResultColumn(_Column):
+    __slots__ = ("values",)
+
+    def __init__(self, values: "np.ndarray"):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _item(self, i: int) -> float:
+        return float(self.values[i])
+
+    def _slice(self, start: int, stop: int) -> List[float]:
+        return self.values[start:stop].tolist()
+
+def _encode(operators: Sequence, operands: Sequence, results: Sequence):
+    import numpy as np
+    from .ragged import RaggedColumn  # imports this module
+    if isinstance(operators, OperatorColumn):
+        table, codes = operators.table, operators.codes
+    else:
+        index = {}
+        codes = np.fromiter((index.setdefault(op, len(index)) for op in operators), np.uint32, len(operators))
+        table = list(index)
+    if isinstance(operands, OperandColumn):
+        offsets, flat = operands.offsets, operands.flat
+    else:
+        if not isinstance(operands, RaggedColumn):
+            operands = RaggedColumn(operands)
+        offsets = np.frombuffer(operands.offsets, dtype=np.int64)
+        flat = np.frombuffer(operands.flat, dtype=np.float64)
+    values = results.values if isinstance(results, ResultColumn) else np.asarray(results, dtype=np.float64)
+    return table, codes, values, offsets, flat
+
+def write_binary(fh: BinaryIO, operators: Sequence, operands: Sequence, results: Sequence,
+                 notes: Optional[Mapping[int, str]] = None):
+    """Write the three history columns, and the sparse row notes, to a binary file object."""
+    table, codes, values, offsets, flat = _encode(operators, operands, results)
+    header = {"rows": len(values), "operands": len(flat), "operators": table}
+    if notes:
+        header["notes"] = {str(i): note for i, note in sorted(notes.items())}
+    header = json.dumps(header).encode("utf-8")
+    fh.write(MAGIC + struct.pack("<Q", len(header)) + header + b"\0" * _pad(len(header)))
+    fh.write(codes.astype("<u4", copy=False).tobytes() + b"\0" * _pad(4 * len(codes)))
+    for arr, dtype in ((values, "<f8"), (offsets, "<i8"), (flat, "<f8")):
+        fh.write(arr.astype(dtype, copy=False).tobytes())
+
+def read_binary(path: str) -> Tuple[OperatorColumn, OperandColumn, ResultColumn, Dict[int, str]]:
+    """Map `path` read-only and return views over its columns, and its row notes."""
+    import numpy as np
+    if os.path.getsize(path) < 16:
+        raise ValidationError(f"{path} is not a binary history file")
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if raw[:8].tobytes() != MAGIC:
+        raise ValidationError(f"{path} is not a binary history file")
+    (size,) = struct.unpack("<Q", raw[8:16].tobytes())
+    header = json.loads(raw[16:16 + size].tobytes())
+    n, m = header["rows"], header["operands"]
+    pos = 16 + size + _pad(size)
+
+    def take(dtype: str, count: int) -> "np.ndarray":
+        nonlocal pos
+        end = pos + np.dtype(dtype).itemsize * count
+        if end > len(raw):
+            raise ValidationError(f"{path} is truncated")
+        arr = raw[pos:end].view(dtype)
+        pos = end + _pad(end)
+        return arr
+
+    codes = take("<u4", n)
+    results = take("<f8", n)
+    offsets = take("<i8", n + 1)
+    flat = take("<f8", m)
+    notes = {int(i): note for i, note in header.get("notes", {}).items()}
+    return OperatorColumn(codes, header["operators"]), OperandColumn(offsets, flat), ResultColumn(results), notes
@@ -0,0 +1,194 @@
+"""
+Append-only journal autosave for History.
+
+Each mutation appends one JSON line to `<csv>.journal` instead of rewriting
+the CSV. When the journal grows past `max_bytes` it is rotated to a numbered
+segment (`<csv>.journal.1`, `.2`, ...) and compacted into the snapshot CSV on
+a background thread.
+
+Compaction commits in two phases so a crash at any point is recoverable:
+the snapshot is written to `<csv>.tmp`, then `<csv>.journal.commit` listing
+the folded segments is created atomically (the commit point), then the temp
+file replaces the CSV and the segments are removed. On startup a commit file
+means "finish the commit"; segments without one are replayed.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from . import history_binary
+from .calculator_memento import AppendDelta, ResultsDelta
+from .exceptions import ConfigurationError
+
+FSYNC_POLICIES = {"always", "periodic", "never"}
+PERIODIC_FSYNC_SECONDS = 1.0
+
+def _row(operator, operands, result):
+    return [operator, [float(x) for x in operands], result]
+
+def _notes(rec: Dict[str, Any]) -> Optional[Dict[int, str]]:
+    """A record's row notes ({"position": text} in JSON), if it has any."""
+    notes = rec.get("notes")
+    return {int(i): note for i, note in notes.items()} if notes else None
+
+class HistoryJournal:
+    def __init__(self, csv_path: str, fsync: str = "always", max_bytes: int = 1 << 20):
+        if fsync not in FSYNC_POLICIES:
+            raise ConfigurationError(f"Unknown journal fsync policy: {fsync!r}")
+        self.csv_path = csv_path
+        self.path = csv_path + ".journal"
+        self.commit_path = self.path + ".commit"
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self._fh = None
+        self._size = 0
+        self._last_sync = 0.0
+        self._compactor: Optional[threading.Thread] = None
+
+    def segments(self) -> List[str]:
+        """Rotated, not yet compacted journal segments in write order."""
+        folder = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + "."
+        found = []
+        for name in os.listdir(folder):
+            m = re.fullmatch(re.escape(prefix) + r"(\d+)", name)
+            if m:
+                found.append((int(m.group(1)), os.path.join(folder, name)))
+        return [path for _, path in sorted(found)]
+
+    # ---- recovery -------------------------------------------------------
+    def finish_pending(self):
+        """Complete a compaction that crashed after its commit point."""
+        if not os.path.exists(self.commit_path):
+            return
+        with open(self.commit_path, "r", encoding="utf-8") as fh:
+            folded = json.load(fh)
+        if os.path.exists(self.csv_path + ".tmp"):
+            os.replace(self.csv_path + ".tmp", self.csv_path)
+        for path in folded:
+            if os.path.exists(path):
+                os.remove(path)
+        os.remove(self.commit_path)
+
+    def replay(self, buffer) -> int:
+        """Apply rotated segments and the live journal onto `buffer` (loaded from the snapshot)."""
+        applied = 0
+        for path in self.segments() + [self.path]:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # torn tail from a crash: never acknowledged
+                    self.apply(buffer, rec)
+                    applied += 1
+        return applied
+
+    @staticmethod
+    def apply(buffer, rec: Dict[str, Any]):
+        op = rec["op"]
+        if op == "add":
+            buffer.truncate(rec["i"])
+            buffer.extend(rec["rows"], _notes(rec))
+        elif op == "truncate":
+            buffer.truncate(rec["n"])
+        elif op == "results":
+            buffer.set_results(rec["positions"], rec["results"])
+        elif op == "replace":
+            buffer.clear()
+            buffer.extend(rec["rows"], _notes(rec))
+        else:
+            raise ValueError(f"Unknown journal record: {op!r}")  # pragma: no cover
+
+    def open(self, buffer):
+        """Start journaling on top of the recovered state in `buffer`."""
+        if self.segments():
+            self.compact(buffer)  # left over from a crash; fold them in now
+            return
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._size = self._fh.tell()
+
+    # ---- writing --------------------------------------------------------
+    def record(self, change, reverse: bool, buffer):
+        if isinstance(change, AppendDelta):
+            if reverse:
+                rec = {"op": "truncate", "n": change.start}
+            else:
+                rec = {"op": "add", "i": change.start, "rows": [_row(*r) for r in change.rows]}
+                if change.notes:
+                    rec["notes"] = change.notes
+        elif isinstance(change, ResultsDelta):
+            rec = {"op": "results", "positions": list(change.positions),
+                   "results": list(change.before if reverse else change.after)}
+        else:
+            rec = {"op": "replace", "rows": [_row(*r) for r in buffer]}
+            if buffer.notes:
+                rec["notes"] = buffer.notes
+        self._write(json.dumps(rec) + "\n")
+        if self._size > self.max_bytes:
+            self.compact(buffer, background=True)
+
+    def _write(self, line: str):
+        self._fh.write(line)
+        self._fh.flush()
+        self._size += len(line)
+        if self.fsync == "always" or (
+            self.fsync == "periodic" and time.monotonic() - self._last_sync >= PERIODIC_FSYNC_SECONDS
+        ):
+            os.fsync(self._fh.fileno())
+            self._last_sync = time.monotonic()
+
+    # ---- compaction -----------------------------------------------------
+    def compact(self, buffer, background: bool = False):
+        """Fold the journal into the snapshot CSV for the state in `buffer`."""
+        self.wait()
+        if self._fh is not None:
+            self._fh.close()
+        segments = self.segments()
+        if os.path.exists(self.path):
+            seq = int(segments[-1].rsplit(".", 1)[1]) + 1 if segments else 1
+            segments.append(f"{self.path}.{seq}")
+            os.replace(self.path, segments[-1])
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+        snapshot = buffer.copy()
+        if background:
+            self._compactor = threading.Thread(
+                target=self._write_snapshot, args=(snapshot, segments), name="history-compactor"
+            )
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot, segments)
+
+    def _write_snapshot(self, snapshot, segments: List[str]):
+        tmp = self.csv_path + ".tmp"
+        binary = history_binary.is_binary(self.csv_path)
+        with open(tmp, "wb") if binary else open(tmp, "w", encoding="utf-8", newline="") as fh:
+            if binary:
+                snapshot.write_binary(fh)
+            else:
+                snapshot.write_csv(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        with open(self.commit_path + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(segments, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(self.commit_path + ".tmp", self.commit_path)
+        self.finish_pending()
+
+    def wait(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        self.wait()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,189 @@
+"""
+SQLite history storage (`HISTORY_BACKEND=sqlite`), standard library only.
+
+Rows live in one table keyed by an increasing `seq`, with operands packed as
+float64 bytes and indexes on operator and timestamp:
+
+    rows(seq INTEGER PRIMARY KEY, operator TEXT, operands BLOB, result REAL, ts REAL, note TEXT)
+    state(lo, hi)    the live history is seq in [lo, hi); row i is seq lo + i
+
+Every change is one transaction of batched statements, and undo/redo move
+row ranges instead of rewriting the history:
+    append      insert at hi                 undo: delete seq >= lo + start
+    results     update those rows            undo: update them back
+    clear/load  insert the new rows at hi    undo: delete seq >= lo, then
+                and move lo up to them             move lo back down
+so the rows a clear or load replaced stay in the table, below lo, until the
+next `save` or restart drops them (and are written back from memory if an
+undo needs them after that). Clear and its undo are O(1) on disk.
+
+The database runs in WAL mode, so other processes can read the `history`
+view while the calculator writes; only one process should write at a time.
+History still keeps every row in memory once loaded.
+"""
+from __future__ import annotations
+import math
+import sqlite3
+import time
+from array import array
+from itertools import accumulate, islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping, Optional, Sequence
+from .calculator_memento import AppendDelta, ResultsDelta
+from .exceptions import ConfigurationError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .history import HistoryBuffer
+
+SYNCHRONOUS = {"always": "FULL", "periodic": "NORMAL", "never": "OFF"}  # by JOURNAL_FSYNC policy
+_LOAD_CHUNK = 1 << 16  # rows fetched per step on load
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    seq INTEGER PRIMARY KEY,
+    operator TEXT NOT NULL,
+    operands BLOB NOT NULL,
+    result REAL,
+    ts REAL NOT NULL,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS rows_operator ON rows (operator);
+CREATE INDEX IF NOT EXISTS rows_ts ON rows (ts);
+CREATE TABLE IF NOT EXISTS state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    lo INTEGER NOT NULL,
+    hi INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO state VALUES (0, 0, 0);
+"""
+_VIEW = """
+CREATE VIEW IF NOT EXISTS history AS
+    SELECT seq - state.lo AS position, operator, operands, result, ts, note
+    FROM rows, state WHERE seq >= state.lo AND seq < state.hi;
+"""
+
+def _blobs(operands: Sequence) -> Iterator[bytes]:
+    """Each row's operands as little-endian float64 bytes."""
+    offsets, flat = getattr(operands, "offsets", None), getattr(operands, "flat", None)
+    if offsets is None:  # plain rows, e.g. an AppendDelta's tuples
+        for row in operands:
+            yield array("d", row).tobytes()
+        return
+    bounds = list(offsets)  # a RaggedColumn or mapped OperandColumn
+    for a, b in zip(bounds, bounds[1:]):
+        yield flat[a:b].tobytes()
+
+class SqliteStorage:
+    stage = "sqlite"
+
+    def __init__(self, path: str, autosave: bool = True, fsync: str = "always"):
+        if fsync not in SYNCHRONOUS:
+            raise ConfigurationError(f"Unknown journal fsync policy: {fsync!r}")
+        self.path = path
+        self.autosave = autosave
+        self.fsync = fsync
+        self.lo = self.hi = 0
+        self._floor = 0  # lowest seq still stored
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # History serializes every call, which may come from any thread.
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.fsync]}")
+            with conn:
+                conn.executescript(_SCHEMA)
+                if "note" not in [col[1] for col in conn.execute("PRAGMA table_info(rows)")]:
+                    # created before row notes: add the column and rebuild the view over it
+                    conn.execute("ALTER TABLE rows ADD COLUMN note TEXT")
+                    conn.execute("DROP VIEW IF EXISTS history")
+                conn.executescript(_VIEW)
+            self._conn = conn
+        return self._conn
+
+    def load(self) -> Optional["HistoryBuffer"]:
+        from .history import HistoryBuffer  # imports this module
+        conn = self._connect()
+        self.lo, self.hi = conn.execute("SELECT lo, hi FROM state").fetchone()
+        with conn:  # rows replaced in an earlier session are unreachable by undo
+            conn.execute("DELETE FROM rows WHERE seq < ? OR seq >= ?", (self.lo, self.hi))
+        self._floor = self.lo
+        if self.hi == self.lo:
+            return None
+        buf = HistoryBuffer()
+        flat, offsets = buf.operands.flat, buf.operands.offsets
+        cursor = conn.execute("SELECT operator, operands, result, note FROM rows WHERE seq >= ? ORDER BY seq",
+                              (self.lo,))
+        while True:
+            chunk = cursor.fetchmany(_LOAD_CHUNK)
+            if not chunk:
+                break
+            operators, blobs, results, notes = zip(*chunk)
+            buf.notes.update((i, note) for i, note in enumerate(notes, len(buf.operators)) if note is not None)
+            buf.operators.extend(operators)
+            flat.frombytes(b"".join(blobs))
+            offsets.extend(islice(accumulate((len(b) >> 3 for b in blobs), initial=offsets[-1]), 1, None))
+            buf.results.extend(math.nan if r is None else r for r in results)  # SQLite stores NaN as NULL
+        return buf
+
+    def _insert(self, seq: int, operators: Sequence[str], operands: Sequence, results: Iterable[float],
+                notes: Optional[Mapping[int, str]] = None):
+        """Insert rows from `seq` on; `notes` positions count from the first row."""
+        ts = time.time()
+        note = (notes or {}).get
+        rows = zip(_blobs(operands), range(seq, seq + len(operators)), operators, results)
+        self._conn.executemany(
+            "INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)",
+            ((s, op, blob, res, ts, note(s - seq)) for blob, s, op, res in rows))
+
+    def _set_range(self, lo: int, hi: int):
+        self._conn.execute("UPDATE state SET lo = ?, hi = ?", (lo, hi))
+        self.lo, self.hi = lo, hi
+
+    def record(self, change, reverse: bool, buffer: "HistoryBuffer"):
+        if not self.autosave:
+            return
+        conn = self._connect()
+        with conn:
+            if isinstance(change, AppendDelta):
+                end = self.lo + change.start
+                conn.execute("DELETE FROM rows WHERE seq >= ?", (end,))
+                if not reverse:
+                    self._insert(end, change.operators, change.operands, change.results, change.notes)
+                    end += len(change.operators)
+                self._set_range(self.lo, end)
+            elif isinstance(change, ResultsDelta):
+                lo = self.lo
+                conn.executemany("UPDATE rows SET result = ? WHERE seq = ?",
+                                 zip(change.before if reverse else change.after, (lo + p for p in change.positions)))
+            elif not reverse:  # clear/load, or its redo: the new rows go on top
+                self._insert(self.hi, buffer.operators, buffer.operands, buffer.results, buffer.notes)
+                self._set_range(self.hi, self.hi + len(buffer))
+            else:  # back to the replaced rows just below lo
+                conn.execute("DELETE FROM rows WHERE seq >= ?", (self.lo,))
+                lo = self.lo - len(buffer)
+                if lo < self._floor:  # dropped by `save` or a restart: write them back
+                    conn.execute("DELETE FROM rows")
+                    self._insert(lo, buffer.operators, buffer.operands, buffer.results, buffer.notes)
+                    self._floor = lo
+                self._set_range(lo, self.lo)
+
+    def save(self, buffer: "HistoryBuffer"):
+        """Drop replaced rows and checkpoint the WAL; without autosave, store `buffer` first."""
+        conn = self._connect()
+        with conn:
+            if not self.autosave:
+                conn.execute("DELETE FROM rows")
+                self._insert(0, buffer.operators, buffer.operands, buffer.results, buffer.notes)
+                self._set_range(0, len(buffer))
+            conn.execute("DELETE FROM rows WHERE seq < ?", (self.lo,))
+        self._floor = self.lo
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def sync(self):
+        pass  # `save` is synchronous
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,101 @@
+"""
+Pluggable persistence behind History.
+
+A `HistoryStorage` loads the stored history once, on first use, and is then
+told about every change (an `AppendDelta`, `ResultsDelta` or `ReplaceDelta`,
+applied or reversed) while History holds its lock. History keeps the rows in memory
+either way; the backend decides how they reach disk.
+
+`CsvStorage` is the default: the CSV (or `.hcol`) file written as a whole
+snapshot, through the append-only journal, or by the background writer
+(`AUTOSAVE_MODE`). `history_sqlite.SqliteStorage` keeps the rows in an
+indexed SQLite table instead (`HISTORY_BACKEND=sqlite`).
+"""
+from __future__ import annotations
+import os
+from typing import TYPE_CHECKING, Any, Callable, Optional, Protocol
+from .autosave import BackgroundAutosave
+from .events import EventBus
+from .history_journal import HistoryJournal
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .history import HistoryBuffer
+
+class HistoryStorage(Protocol):
+    path: str
+    stage: str  # metrics stage name for `record`
+
+    def load(self) -> Optional["HistoryBuffer"]:
+        """The stored history, or None if nothing is stored yet."""
+
+    def record(self, change: Any, reverse: bool, buffer: "HistoryBuffer") -> None:
+        """Persist `change` (undone if `reverse`); `buffer` is the state after it."""
+
+    def save(self, buffer: "HistoryBuffer") -> None:
+        """Make the stored copy agree with `buffer` (the `save` command)."""
+
+    def sync(self) -> None:
+        """Wait for pending writes (autosave, `save`); called outside the History lock."""
+
+    def close(self) -> None:
+        """Flush and release files, threads and connections."""
+
+class CsvStorage:
+    """
+    The CSV or `.hcol` file at `path`, kept current per `mode`: "journal"
+    appends each change to `HistoryJournal`; "snapshot" and "background"
+    rewrite the whole file from a `BackgroundAutosave` subscribed to
+    History's `events` bus, as soon as the writer is free or once per
+    `interval_ms` burst. Neither blocks the calculation; `save`, `close` and
+    interpreter exit flush them. With `autosave` off the file is only read
+    on load and written by `save`.
+    """
+    def __init__(self, path: str, autosave: bool = True, mode: str = "snapshot",
+                 fsync: str = "always", max_bytes: int = 1 << 20, interval_ms: int = 500,
+                 snapshot: Optional[Callable[[], "HistoryBuffer"]] = None, events: Optional[EventBus] = None):
+        self.path = path
+        self.journal: Optional[HistoryJournal] = None
+        self.autosaver: Optional[BackgroundAutosave] = None
+        self._unopened_journal: Optional[HistoryJournal] = None
+        if autosave and mode == "journal":
+            self._unopened_journal = HistoryJournal(path, fsync=fsync, max_bytes=max_bytes)
+        elif autosave:
+            interval = interval_ms / 1000 if mode == "background" else 0.0
+            self.autosaver = BackgroundAutosave(snapshot, path, interval, events)
+        self.stage = "journal" if self._unopened_journal is not None else "autosave"
+
+    def load(self) -> Optional["HistoryBuffer"]:
+        from .history import HistoryBuffer  # imports this module
+        if self._unopened_journal is None:
+            return HistoryBuffer.read_file(self.path) if os.path.exists(self.path) else None
+        # Rebuild state from the snapshot plus the journal tail, then journal every change.
+        journal, self._unopened_journal = self._unopened_journal, None
+        journal.finish_pending()
+        buf = HistoryBuffer.read_file(self.path) if os.path.exists(self.path) else HistoryBuffer()
+        journal.replay(buf)
+        journal.open(buf)
+        self.journal = journal
+        return buf
+
+    def record(self, change, reverse: bool, buffer: "HistoryBuffer"):
+        if self.journal is not None:
+            self.journal.record(change, reverse, buffer)
+        # snapshot/background: the change event published right after this wakes the writer
+
+    def save(self, buffer: "HistoryBuffer"):
+        if self.autosaver is not None:
+            self.autosaver.mark_dirty()  # written by `sync`, in order with the writer thread
+        elif self.journal is not None:
+            self.journal.compact(buffer)  # the snapshot must agree with the journal
+        else:
+            buffer.write_file(self.path)
+
+    def sync(self):
+        if self.autosaver is not None:
+            self.autosaver.flush()  # the writer thread takes the History lock to snapshot
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.autosaver is not None:
+            self.autosaver.close()
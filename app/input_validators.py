@@ -3,7 +3,7 @@
 Input validation helpers demonstrating LBYL and EAFP styles.
 """
 from __future__ import annotations
-from typing import Tuple, List
+from typing import Any, Dict, List, Optional, Tuple
 from .exceptions import ValidationError
 
 def parse_command(line: str) -> Tuple[str, List[str]]:
@@ -21,3 +21,95 @@ def parse_operation_args(args: List[str]) -> List[float]:
         return [float(x) for x in args]
     except ValueError as exc:
         raise ValidationError("All operands must be numeric") from exc
+
+_HISTORY_OPTIONS = {"--offset": "offset", "--op": "operator", "--min": "min_result", "--max": "max_result",
+                    "--out": "out"}
+
+def parse_history_args(args: List[str]) -> Dict[str, Any]:
+    """
+    Parse `history [tail] [N] [--offset K] [--op OP] [--min X] [--max Y] [--out PATH]`
+    into `History.select` keyword arguments plus "out".
+    """
+    query: Dict[str, Any] = {"tail": bool(args) and args[0] == "tail"}
+    rest = args[1:] if query["tail"] else list(args)
+    while rest:
+        arg = rest.pop(0)
+        if arg in _HISTORY_OPTIONS:
+            if not rest:
+                raise ValidationError(f"{arg} needs a value")
+            query[_HISTORY_OPTIONS[arg]] = rest.pop(0)
+        elif "limit" not in query:
+            query["limit"] = arg
+        else:
+            raise ValidationError(f"Unexpected history argument: {arg!r}")
+    for key in ("limit", "offset"):
+        if key in query and not query[key].isdigit():
+            raise ValidationError(f"history {key} must be a non-negative integer")
+        if key in query:
+            query[key] = int(query[key])
+    for key in ("min_result", "max_result"):
+        if key in query:
+            try:
+                query[key] = float(query[key])
+            except ValueError as exc:
+                raise ValidationError(f"history --{key[:3]} must be numeric") from exc
+    return query
+
+def parse_summary_args(args: List[str]) -> Optional[int]:
+    """Parse `summary [last N]` into the window size (None for the whole history)."""
+    if not args:
+        return None
+    if len(args) != 2 or args[0] != "last" or not args[1].isdigit() or int(args[1]) == 0:
+        raise ValidationError("Usage: summary [last N] (N a positive integer)")
+    return int(args[1])
+
+def parse_parallel_args(args: List[str]) -> Tuple[str, List[int]]:
+    """Parse `parallel <file> [workers] [chunk_size]` into the path and the given sizes."""
+    if not 1 <= len(args) <= 3 or not all(a.isdigit() for a in args[1:]):
+        raise ValidationError("Usage: parallel <file> [workers] [chunk_size] (non-negative integers)")
+    return args[0], [int(a) for a in args[1:]]
+
+def parse_recompute_args(args: List[str]) -> Dict[str, Any]:
+    """Parse `recompute [--rtol R] [--atol A] [--fix]` into `recompute` keyword arguments."""
+    options: Dict[str, Any] = {}
+    rest = list(args)
+    while rest:
+        arg = rest.pop(0)
+        if arg == "--fix":
+            options["rewrite"] = True
+        elif arg in ("--rtol", "--atol") and rest:
+            try:
+                value = float(rest.pop(0))
+            except ValueError as exc:
+                raise ValidationError(f"recompute {arg} must be numeric") from exc
+            if not value >= 0:
+                raise ValidationError(f"recompute {arg} must be non-negative")
+            options[arg[2:]] = value
+        else:
+            raise ValidationError("Usage: recompute [--rtol R] [--atol A] [--fix]")
+    return options
+
+def parse_sweep_args(args: List[str]) -> Dict[str, Any]:
+    """
+    Parse `sweep <operator> <operand|start:stop[:step]>... [--record summary|rows|none]
+    [--out PATH] [--quiet]`; the operand specs are checked by `sweep.Axis`.
+    """
+    usage = "Usage: sweep <operator> <operand|start:stop[:step]>... [--record summary|rows|none] [--out PATH] [--quiet]"
+    options: Dict[str, Any] = {"specs": [], "record": "summary", "out": None, "quiet": False}
+    rest = list(args)
+    if not rest:
+        raise ValidationError(usage)
+    options["operator"] = rest.pop(0)
+    while rest:
+        arg = rest.pop(0)
+        if arg in ("--record", "--out") and rest:
+            options[arg[2:]] = rest.pop(0)
+        elif arg == "--quiet":
+            options["quiet"] = True
+        elif arg.startswith("--"):
+            raise ValidationError(usage)
+        else:
+            options["specs"].append(arg)
+    if options["record"] not in ("summary", "rows", "none"):
+        raise ValidationError("sweep --record must be 'summary', 'rows' or 'none'")
+    return options
@@ -0,0 +1,168 @@
+"""
+Low-overhead latency instrumentation for the REPL.
+
+Call sites time a stage with two `perf_counter_ns()` reads and hand the
+duration to `Metrics.record(command, stage, ns)` (hot paths keep the
+`Histogram` from `Metrics.series` and call `add` directly). Durations are
+buffered and folded in bulk into a log-bucketed histogram (16 buckets per
+power of two, so percentiles are within ~6% and memory stays bounded
+however many commands run). Histograms may be fed from several threads.
+"""
+from __future__ import annotations
+import io
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+_SUB_BITS = 4  # 2**4 buckets per octave
+_FOLD_AT = 1024  # raw samples buffered before they are bucketed
+
+class Histogram:
+    __slots__ = ("_count", "_total", "_max", "_buckets", "_pending", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._count = 0
+        self._total = 0
+        self._max = 0
+        self._buckets: Dict[int, int] = {}
+        self._pending: List[int] = []
+
+    def add(self, ns: int):
+        pending = self._pending
+        pending.append(ns)  # atomic, so concurrent adds need no lock
+        if len(pending) >= _FOLD_AT:
+            self._fold()
+
+    def _fold(self):
+        with self._lock:
+            pending = self._pending
+            samples = pending[:]
+            del pending[:len(samples)]  # keeps samples appended meanwhile
+            buckets = self._buckets
+            for ns in samples:
+                bits = ns.bit_length()
+                key = ns if bits <= _SUB_BITS + 1 else (bits << _SUB_BITS) | ((ns >> (bits - _SUB_BITS - 1)) & 15)
+                buckets[key] = buckets.get(key, 0) + 1
+            if samples:
+                self._count += len(samples)
+                self._total += sum(samples)
+                self._max = max(self._max, max(samples))
+
+    @property
+    def count(self) -> int:
+        return self._count + len(self._pending)
+
+    @property
+    def max(self) -> int:
+        self._fold()
+        return self._max
+
+    @staticmethod
+    def _upper(key: int) -> int:
+        if key < 1 << (_SUB_BITS + 1):
+            return key
+        bits, sub = key >> _SUB_BITS, key & 15
+        return ((17 + sub) << (bits - _SUB_BITS - 1)) - 1
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-th percentile, capped at the observed max."""
+        self._fold()
+        if not self._count:
+            return 0
+        rank = max(1, -(-self._count * q // 100))
+        seen = 0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen >= rank:
+                return min(self._upper(key), self._max)
+        return self._max  # pragma: no cover - rank <= count always lands in a bucket
+
+    def summary(self) -> Dict[str, float]:
+        self._fold()
+        us = 1e-3
+        return {
+            "count": self._count,
+            "mean_us": self._total / self._count * us if self._count else 0.0,
+            "p50_us": self.percentile(50) * us,
+            "p95_us": self.percentile(95) * us,
+            "p99_us": self.percentile(99) * us,
+            "max_us": self._max * us,
+        }
+
+class Metrics:
+    """Histograms keyed by (command, stage)."""
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], Histogram] = {}
+
+    def series(self, command: str, stage: str) -> Histogram:
+        series = self._series.get((command, stage))
+        if series is None:
+            series = self._series.setdefault((command, stage), Histogram())  # one winner across threads
+        return series
+
+    def record(self, command: str, stage: str, ns: int):
+        self.series(command, stage).add(ns)
+
+    def __len__(self) -> int:
+        return sum(1 for series in self._series.values() if series.count)
+
+    def reset(self):
+        """Forget all samples; histograms handed out by `series` stay in use."""
+        for series in self._series.values():
+            series.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{command: {stage: summary}}, JSON-serializable."""
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (command, stage), series in sorted(self._series.items()):
+            if series.count:
+                out.setdefault(command, {})[stage] = series.summary()
+        return out
+
+    def format(self) -> str:
+        if not len(self):
+            return "No timings recorded yet."
+        lines = [f"{'command':<20} {'stage':<10} {'count':>7} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for command, stages in self.snapshot().items():
+            for stage, s in stages.items():
+                lines.append(f"{command[:20]:<20} {stage:<10} {s['count']:>7} {s['p50_us']:>9.1f} "
+                             f"{s['p95_us']:>9.1f} {s['p99_us']:>9.1f} {s['max_us']:>9.1f}")
+        return "\n".join(lines)
+
+class CommandProfiler:
+    """Runs the next `commands` commands under one cProfile session."""
+    def __init__(self, commands: int, top: int = 20):
+        import cProfile
+        self.commands = commands
+        self.remaining = commands
+        self.top = top
+        self._profile = cProfile.Profile()
+
+    @property
+    def done(self) -> bool:
+        return self.remaining <= 0
+
+    def run(self, fn: Callable, *args):
+        try:
+            return self._profile.runcall(fn, *args)
+        finally:
+            self.remaining -= 1
+
+    def report(self, sort: str = "cumulative") -> str:
+        import pstats
+        profiled = self.commands - max(self.remaining, 0)
+        if not profiled:
+            return "Profile of 0 command(s): nothing was run."
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).strip_dirs().sort_stats(sort).print_stats(self.top)
+        body: List[str] = [line for line in out.getvalue().splitlines() if line.strip()]
+        return "\n".join([f"Profile of {profiled} command(s):"] + body)
+
+def profile_request(args: List[str]) -> Optional[int]:
+    """Parse `profile N` / `profile off`; None means stop."""
+    if args and args[0] in ("off", "stop"):
+        return None
+    return int(args[0]) if args and args[0].isdigit() and int(args[0]) > 0 else 1
@@ -0,0 +1,106 @@
+"""
+Streamed operands for variadic operations: `+ @values.txt`.
+
+`@path` names a text file of numbers separated by whitespace, commas or
+newlines; `@-` reads the same format from stdin; a `.f64`/`.bin` file holds
+raw little-endian float64 values. The source is read in fixed-size chunks
+of NumPy arrays, so a reduction over tens of millions of values runs in
+constant memory, and a bad value is reported by its position.
+"""
+from __future__ import annotations
+import os
+import re
+import sys
+from typing import TYPE_CHECKING, Iterator, List, Sequence, TextIO
+from .exceptions import ValidationError
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+CHUNK = 1 << 16  # values per chunk (text is read in blocks of about as many numbers)
+RAW_SUFFIXES = (".f64", ".bin")
+_CHARS_PER_VALUE = 16
+_SEPARATOR_CHARS = frozenset(" \t\r\n\f\v,")
+_TOKEN = re.compile(r"[^\s,]+")
+
+def is_stream(args: Sequence[object]) -> bool:
+    """True if `args` is an `@source` operand; numeric operands passed by embedding code are not."""
+    return bool(args) and isinstance(args[0], str) and args[0].startswith("@")
+
+class OperandStream:
+    """One pass over the values of an `@source`, chunk by chunk; `count` is the number read so far."""
+    def __init__(self, spec: str, chunk: int = CHUNK):
+        if not spec.startswith("@") or len(spec) == 1:
+            raise ValidationError("Streamed operands must be given as @path (or @- for stdin)")
+        self.spec = spec
+        self.path = spec[1:]
+        self.chunk = chunk
+        self.count = 0
+
+    @property
+    def name(self) -> str:
+        return "stdin" if self.path == "-" else os.path.basename(self.path)
+
+    def chunks(self) -> Iterator["np.ndarray"]:
+        if self.path == "-":
+            yield from self._text(sys.stdin)
+        elif self.path.lower().endswith(RAW_SUFFIXES):
+            yield from self._raw()
+        else:
+            try:
+                fh = open(self.path, "r", encoding="utf-8")
+            except OSError as exc:
+                raise ValidationError(f"Cannot read operands from {self.path}: {exc.strerror}") from exc
+            with fh:
+                yield from self._text(fh)
+
+    def _raw(self) -> Iterator["np.ndarray"]:
+        import numpy as np
+        try:
+            size = os.path.getsize(self.path)
+        except OSError as exc:
+            raise ValidationError(f"Cannot read operands from {self.path}: {exc.strerror}") from exc
+        if size % 8:
+            raise ValidationError(f"{self.name}: raw float64 input is truncated at byte {size - size % 8}")
+        with open(self.path, "rb") as fh:
+            while True:
+                arr = np.fromfile(fh, dtype="<f8", count=self.chunk)
+                if not len(arr):
+                    return
+                self.count += len(arr)
+                yield arr
+
+    def _text(self, fh: TextIO) -> Iterator["np.ndarray"]:
+        size = self.chunk * _CHARS_PER_VALUE
+        carry = ""
+        line = 1  # line number at the start of `text`
+        while True:
+            block = fh.read(size)
+            text = carry + block
+            cut = len(text)
+            if block:  # hold back a number that may continue in the next block
+                while cut and text[cut - 1] not in _SEPARATOR_CHARS:
+                    cut -= 1
+            text, carry = text[:cut], text[cut:]
+            tokens = text.replace(",", " ").split()
+            if tokens:
+                yield self._convert(tokens, text, line)
+            if not block:
+                return
+            line += text.count("\n")
+
+    def _convert(self, tokens: List[str], text: str, line: int) -> "np.ndarray":
+        import numpy as np
+        try:
+            arr = np.array(tokens, dtype=np.float64)
+        except ValueError:
+            for i, match in enumerate(_TOKEN.finditer(text)):
+                try:
+                    float(match.group())
+                except ValueError:
+                    lineno = line + text.count("\n", 0, match.start())
+                    raise ValidationError(f"{self.name}: operand {self.count + i + 1} (line {lineno}) "
+                                          f"is not numeric: {match.group()!r}") from None
+            raise  # pragma: no cover - numpy and float() accept the same spellings
+        self.count += len(arr)
+        return arr
@@ -2,34 +2,140 @@
 """
 Operation strategies and a factory to create them.
 Implements the Strategy and Factory patterns.
+
+numpy is only imported by the vectorized batch paths, so scalar use starts fast.
 """
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Protocol
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple, Union
 from .exceptions import OperationError
 
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+Batch = Union["np.ndarray", Sequence[Sequence[float]]]
+
+@dataclass
+class BatchResult:
+    """Results of `execute_batch`; rows that failed hold NaN and an error message."""
+    results: np.ndarray
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> np.ndarray:
+        import numpy as np
+        mask = np.ones(len(self.results), dtype=bool)
+        mask[list(self.errors)] = False
+        return mask
+
 class OperationStrategy(Protocol):
     name: str
     symbol: str
     def execute(self, operands: List[float]) -> float: ...
+    def execute_batch(self, rows: Batch) -> BatchResult: ...
+    def reduce_stream(self, chunks: Iterable[np.ndarray]) -> float: ...
+
+def _fail(errors: Dict[int, str], mask: np.ndarray, message: str):
+    import numpy as np
+    for i in np.flatnonzero(mask):
+        errors.setdefault(int(i), message)
 
 class _Base(ABC):
     name: str = ""
     symbol: str = ""
+    arity: Optional[int] = None  # fixed operand count; None for the variadic reductions
+    _ufunc: str = ""  # NumPy ufunc that folds operands left to right
+    _identity: Optional[float] = None  # start value; None starts from the first operand
     @abstractmethod
     def execute(self, operands):
         raise NotImplementedError # pragma: no cover
 
+    def execute_batch(self, rows: Batch) -> BatchResult:
+        """
+        Evaluate many operand rows at once. `rows` is a 2-D array (one row per
+        calculation) or a ragged sequence of operand sequences, which is
+        evaluated in groups of equal length.
+        """
+        import numpy as np
+        if isinstance(rows, np.ndarray) and rows.ndim == 2:
+            results, errors = self._batch(rows.astype(np.float64, copy=False))
+            return BatchResult(results, errors)
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i, row in enumerate(rows):
+            groups[len(row)].append(i)
+        results = np.empty(len(rows), dtype=np.float64)
+        errors: Dict[int, str] = {}
+        for width, idx in groups.items():
+            block = np.array([rows[i] for i in idx], dtype=np.float64).reshape(len(idx), width)
+            res, errs = self._batch(block)
+            results[idx] = res
+            errors.update({idx[j]: msg for j, msg in errs.items()})
+        return BatchResult(results, dict(sorted(errors.items())))
+
+    @abstractmethod
+    def _batch(self, arr: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+        raise NotImplementedError # pragma: no cover
+
+    def reduce_stream(self, chunks: Iterable[np.ndarray]) -> float:
+        """
+        One calculation over operands arriving as float64 chunks (see
+        `operand_stream`), folded chunk by chunk in constant memory. Fixed-arity
+        operations read at most one operand more than they take.
+        """
+        import numpy as np
+        if self.arity is not None:
+            values: List[float] = []
+            for chunk in chunks:
+                values += chunk[:self.arity + 1 - len(values)].tolist()
+                if len(values) > self.arity:
+                    break
+            return self.execute(values)
+        ufunc = getattr(np, self._ufunc)
+        acc = self._identity
+        position = 0  # operands folded so far
+        for chunk in chunks:
+            if acc is None and len(chunk):
+                acc, chunk, position = float(chunk[0]), chunk[1:], 1
+            self._check_chunk(chunk, position)
+            with np.errstate(all="ignore"):
+                acc = float(ufunc.reduce(chunk, initial=acc))
+            position += len(chunk)
+        if not position:
+            raise OperationError(f"{self.name.capitalize()} requires at least one operand")
+        return acc
+
+    def _check_chunk(self, chunk: np.ndarray, position: int):
+        """Raise for an invalid operand in `chunk`, whose first value is operand `position + 1`."""
+
+    @staticmethod
+    def _require_operands(arr: np.ndarray, message: str):
+        import numpy as np
+        if arr.shape[1] == 0:
+            return np.full(arr.shape[0], np.nan), {i: message for i in range(arr.shape[0])}
+        return None
+
 class Add(_Base):
     name, symbol = "addition", "+"
+    _ufunc, _identity = "add", 0.0
     def execute(self, operands):
         total = 0.0
         for x in operands:
             total += float(x)
         return total
 
+    def _batch(self, arr):
+        import numpy as np
+        # column by column, so rounding matches the scalar left-to-right loop
+        total = np.zeros(arr.shape[0])
+        for j in range(arr.shape[1]):
+            total += arr[:, j]
+        return total, {}
+
 class Subtract(_Base):
     name, symbol = "subtraction", "-"
+    _ufunc = "subtract"
     def execute(self, operands):
         if not operands:
             raise OperationError("Subtraction requires at least one operand")  # pragma: no cover
@@ -39,8 +145,19 @@ class Subtract(_Base):
             result -= float(x)
         return result
 
+    def _batch(self, arr):
+        import numpy as np
+        empty = self._require_operands(arr, "Subtraction requires at least one operand")
+        if empty:
+            return empty
+        result = arr[:, 0].copy()
+        for j in range(1, arr.shape[1]):
+            result -= arr[:, j]
+        return result, {}
+
 class Multiply(_Base):
     name, symbol = "multiplication", "*"
+    _ufunc, _identity = "multiply", 1.0
     def execute(self, operands):
         if not operands:
             raise OperationError("Multiplication requires at least one operand")  # pragma: no cover
@@ -49,8 +166,19 @@ class Multiply(_Base):
             result *= float(x)
         return result
 
+    def _batch(self, arr):
+        import numpy as np
+        empty = self._require_operands(arr, "Multiplication requires at least one operand")
+        if empty:
+            return empty
+        result = np.ones(arr.shape[0])
+        for j in range(arr.shape[1]):
+            result *= arr[:, j]
+        return result, {}
+
 class Divide(_Base):
     name, symbol = "division", "/"
+    _ufunc = "divide"
     def execute(self, operands):
         if not operands:
             raise OperationError("Division requires at least one operand")  # pragma: no cover
@@ -63,16 +191,45 @@ class Divide(_Base):
             result /= x
         return result
 
+    def _batch(self, arr):
+        import numpy as np
+        empty = self._require_operands(arr, "Division requires at least one operand")
+        if empty:
+            return empty
+        result = arr[:, 0].copy()
+        bad = (arr[:, 1:] == 0.0).any(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for j in range(1, arr.shape[1]):
+                result /= arr[:, j]
+        result[bad] = np.nan
+        errors: Dict[int, str] = {}
+        _fail(errors, bad, "Division by zero")
+        return result, errors
+
+    def _check_chunk(self, chunk, position):
+        import numpy as np
+        zeros = np.flatnonzero(chunk == 0.0)
+        if len(zeros):
+            raise OperationError(f"Division by zero (operand {position + int(zeros[0]) + 1})")
+
 class Power(_Base):
     name, symbol = "power", "^"
+    arity = 2
     def execute(self, operands):
         if len(operands) != 2:
             raise OperationError("Power requires exactly two operands")  # pragma: no cover
         base, exp = map(float, operands)
         return base ** exp
 
+    def _batch(self, arr):
+        import numpy as np
+        if arr.shape[1] != 2:
+            return np.full(arr.shape[0], np.nan), {i: "Power requires exactly two operands" for i in range(arr.shape[0])}
+        return _real_power(arr[:, 0], arr[:, 1])
+
 class Root(_Base):
     name, symbol = "root", "root"
+    arity = 2
     def execute(self, operands):
         if len(operands) != 2:
             raise OperationError("Root requires exactly two operands: degree, value")  # pragma: no cover
@@ -83,6 +240,39 @@ class Root(_Base):
             raise OperationError("Even-degree root of negative number is not real")  # pragma: no cover
         return value ** (1.0 / degree)
 
+    def _batch(self, arr):
+        import numpy as np
+        if arr.shape[1] != 2:
+            message = "Root requires exactly two operands: degree, value"
+            return np.full(arr.shape[0], np.nan), {i: message for i in range(arr.shape[0])}
+        degree, value = arr[:, 0], arr[:, 1]
+        errors: Dict[int, str] = {}
+        zero = degree == 0
+        even_negative = ~zero & (value < 0) & (np.fmod(degree, 2) == 0)
+        _fail(errors, zero, "Root degree cannot be zero")
+        _fail(errors, even_negative, "Even-degree root of negative number is not real")
+        with np.errstate(divide="ignore"):
+            exp = np.where(zero, np.nan, 1.0 / np.where(zero, 1.0, degree))
+        result, more = _real_power(value, exp)
+        for i, msg in more.items():
+            errors.setdefault(i, msg)
+        result[zero | even_negative] = np.nan
+        return result, dict(sorted(errors.items()))
+
+def _real_power(base: np.ndarray, exp: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+    """Vectorized `base ** exp` that flags the rows where Python float power would fail."""
+    import numpy as np
+    with np.errstate(all="ignore"):
+        result = np.power(base, exp)
+    errors: Dict[int, str] = {}
+    finite_in = np.isfinite(base) & np.isfinite(exp)
+    _fail(errors, (base == 0) & (exp < 0), "0.0 cannot be raised to a negative power")
+    _fail(errors, finite_in & np.isnan(result), "Result is not a real number")
+    _fail(errors, finite_in & np.isinf(result), "Numerical result out of range")
+    if errors:
+        result[list(errors)] = np.nan
+    return result, errors
+
 _FACTORY = {
     Add.symbol: Add,
     Subtract.symbol: Subtract,
@@ -92,11 +282,17 @@ _FACTORY = {
     Root.symbol: Root,
 }
 
+_INSTANCES: Dict[str, OperationStrategy] = {}
+
 def operation_factory(symbol: str) -> OperationStrategy:
     """
     Factory that returns a strategy instance by symbol.
+    Strategies are stateless, so one shared instance per symbol is reused.
     """
-    cls = _FACTORY.get(symbol)
-    if not cls:
-        raise OperationError(f"Unknown operation symbol: {symbol!r}")
-    return cls()
+    strategy = _INSTANCES.get(symbol)
+    if strategy is None:
+        cls = _FACTORY.get(symbol)
+        if not cls:
+            raise OperationError(f"Unknown operation symbol: {symbol!r}")
+        strategy = _INSTANCES[symbol] = cls()
+    return strategy
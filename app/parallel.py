@@ -0,0 +1,117 @@
+"""
+Multi-core evaluation of large operation files.
+
+The input is split into chunks of lines that worker processes evaluate with
+the operation strategies. This module deliberately imports only the strategy
+and validation code, so workers start without pandas or History. Chunk
+results come back in input order and are merged into History with a single
+bulk append.
+"""
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+from .exceptions import CalculatorError
+from .input_validators import parse_command, parse_operation_args
+from .operations import operation_factory
+
+OPERATORS = {"+", "-", "*", "/", "^", "root"}
+
+@dataclass
+class ChunkResult:
+    """Column-wise results of one chunk; errors hold (line number, message)."""
+    operators: List[str] = field(default_factory=list)
+    operands: List[List[float]] = field(default_factory=list)
+    results: List[float] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+@dataclass
+class ParallelResult:
+    operations: int
+    errors: List[Tuple[int, str]]
+    seconds: float
+    workers: int
+
+def evaluate_chunk(first_line: int, lines: List[str]) -> ChunkResult:
+    """Evaluate `lines` (numbered from `first_line`); runs inside a worker."""
+    out = ChunkResult()
+    for n, line in enumerate(lines, start=first_line):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            cmd, args = parse_command(line)
+            if cmd not in OPERATORS:
+                raise CalculatorError(f"Not an operation: {cmd!r}")
+            operands = parse_operation_args(args)
+            result = operation_factory(cmd).execute(operands)
+            if isinstance(result, complex):
+                raise CalculatorError("Result is not a real number")
+        except Exception as exc:  # CalculatorError, or float power overflow / 0.0 ** -x
+            out.errors.append((n, str(exc)))
+            continue
+        out.operators.append(cmd)
+        out.operands.append(operands)
+        out.results.append(float(result))
+    return out
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[Tuple[int, List[str]]]:
+    it = iter(lines)
+    first = 1
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield first, chunk
+        first += len(chunk)
+
+def evaluate_lines(lines: Iterable[str], workers: Optional[int] = None, chunk_size: int = 10_000,
+                   executor: Optional[Executor] = None) -> Iterator[ChunkResult]:
+    """
+    Yield chunk results in input order. At most two chunks per worker are in
+    flight, so memory stays bounded however long the input is.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 and executor is None:
+        for first, chunk in _chunks(lines, chunk_size):
+            yield evaluate_chunk(first, chunk)
+        return
+    pool = executor
+    if pool is None:
+        from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; only when needed
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending: Deque[Future] = deque()
+        for first, chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(evaluate_chunk, first, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
+
+def run_parallel(history, lines: Iterable[str], workers: Optional[int] = None,
+                 chunk_size: int = 10_000) -> ParallelResult:
+    """Evaluate `lines` on a process pool and append all results to `history` at once."""
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    merged = ChunkResult()
+    for chunk in evaluate_lines(lines, workers=workers, chunk_size=chunk_size):
+        merged.operators.extend(chunk.operators)
+        merged.operands.extend(chunk.operands)
+        merged.results.extend(chunk.results)
+        merged.errors.extend(chunk.errors)
+    if merged.results:
+        history.add_columns(merged.operators, merged.operands, merged.results)
+    return ParallelResult(
+        operations=len(merged.results) + len(merged.errors),
+        errors=merged.errors,
+        seconds=time.perf_counter() - start,
+        workers=workers,
+    )
@@ -0,0 +1,156 @@
+"""
+Ragged float64 storage for the history operands column.
+
+All operands live in one contiguous `array('d')`, and row i spans
+flat[offsets[i]:offsets[i + 1]], so a row costs 8 bytes per operand plus one
+8-byte offset instead of a list of boxed floats. Indexing a row returns an
+`OperandRow` view; slices and iteration decode to plain lists, like the
+mapped `.hcol` columns in `history_binary`.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate, islice
+from typing import Iterable, Iterator, List
+from .history_binary import OperandColumn, parse_operands
+
+_ITER_CHUNK = 4096  # rows decoded per step when iterating
+
+class OperandRow(Sequence):
+    """Read-only view of one row's operands; compares equal to a list or tuple of the same floats."""
+    __slots__ = ("_flat", "_start", "_stop")
+
+    def __init__(self, flat: array, start: int, stop: int):
+        self._flat, self._start, self._stop = flat, start, stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        return self.tolist()[i]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.tolist())
+
+    def tolist(self) -> List[float]:
+        return self._flat[self._start:self._stop].tolist()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (OperandRow, list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(self.tolist())  # the CSV form, "[1.0, 2.5]"
+
+class RaggedColumn(Sequence):
+    """Growable operands column: append/extend amortized O(1) per operand, truncate O(1)."""
+    __slots__ = ("flat", "offsets")
+
+    def __init__(self, rows: Iterable = ()):
+        self.flat = array("d")
+        self.offsets = array("q", [0])
+        self.extend(rows)
+
+    @staticmethod
+    def from_arrays(offsets, flat) -> "RaggedColumn":
+        """Copy contiguous int64 offsets (starting at 0) and float64 values, e.g. a mapped `.hcol` column."""
+        column = RaggedColumn()
+        column.offsets = array("q")
+        column.offsets.frombytes(memoryview(offsets).cast("B"))
+        column.flat.frombytes(memoryview(flat).cast("B"))
+        return column
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        n = len(self.offsets) - 1
+        if isinstance(i, slice):
+            start, stop, step = i.indices(n)
+            if step != 1:
+                return [self[j].tolist() for j in range(start, stop, step)]
+            return self._slice(start, max(start, stop))
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("history row out of range")
+        return OperandRow(self.flat, self.offsets[i], self.offsets[i + 1])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (RaggedColumn, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def _slice(self, start: int, stop: int) -> List[List[float]]:
+        bounds = self.offsets[start:stop + 1].tolist()
+        values = self.flat[bounds[0]:bounds[-1]].tolist()
+        base = bounds[0]
+        return [values[a - base:b - base] for a, b in zip(bounds, bounds[1:])]
+
+    def __iter__(self) -> Iterator[List[float]]:
+        n = len(self)
+        for start in range(0, n, _ITER_CHUNK):
+            yield from self._slice(start, min(start + _ITER_CHUNK, n))
+
+    def append(self, operands):
+        """Add one row; a string is parsed as written in the CSV ("[1.0, 2.5]")."""
+        if isinstance(operands, str):
+            operands = parse_operands(operands)
+        flat = self.flat
+        flat.extend(operands)
+        self.offsets.append(len(flat))
+
+    def extend(self, rows: Iterable):
+        if isinstance(rows, OperandColumn):
+            rows = RaggedColumn.from_arrays(rows.offsets, rows.flat)
+        if isinstance(rows, RaggedColumn):  # from NumPy code (batches, sweeps, .hcol): shift its offsets in one step
+            import numpy as np
+            base = len(self.flat)
+            self.flat.extend(rows.flat)
+            self.offsets.frombytes((np.frombuffer(rows.offsets, dtype=np.int64)[1:] + base).tobytes())
+            return
+        flat, offsets = self.flat, self.offsets
+        for operands in rows:
+            if isinstance(operands, str):
+                operands = parse_operands(operands)
+            flat.extend(operands)
+            offsets.append(len(flat))
+
+    def extend_text(self, texts: Sequence[str]):
+        """
+        Bulk `append` of operand strings as written in the CSV ("[1.0, 2.5]"):
+        one float() pass over all their values. Other spellings, and bad
+        values (reported by `parse_operands`), go row by row.
+        """
+        joined = ",".join(texts)
+        counts = [text.count(",") + (len(text) > 2) for text in texts]
+        try:
+            if joined.count("[") != len(texts) or joined.count("]") != len(texts):
+                raise ValueError
+            values = list(map(float, filter(None, joined.replace("[", "").replace("]", "").split(","))))
+            if len(values) != sum(counts):
+                raise ValueError
+        except ValueError:
+            self.extend(texts)
+            return
+        self.flat.extend(values)
+        self.offsets.extend(islice(accumulate(counts, initial=self.offsets[-1]), 1, None))
+
+    def truncate(self, n: int):
+        if n < len(self.offsets) - 1:
+            del self.flat[self.offsets[n]:]
+            del self.offsets[n + 1:]
+
+    def copy(self) -> "RaggedColumn":
+        column = RaggedColumn()
+        column.flat = self.flat[:]  # array slices are flat memory copies
+        column.offsets = self.offsets[:]
+        return column
+
+    def nbytes(self) -> int:
+        return 8 * (len(self.flat) + len(self.offsets))
@@ -0,0 +1,105 @@
+"""
+Re-evaluate stored history results with the current operation strategies.
+
+`recompute` checks that every row's `result` is still what its strategy
+produces, e.g. after a change to `operations.py` or a CSV loaded from
+another machine. Rows are grouped by operator and operand count and each
+group goes through `execute_batch` as one 2-D array gathered straight from
+the flat operands column, so a million-row history takes about a second.
+Rows with a note (see `HistoryBuffer.notes`: `eval` expressions, `stream`
+rows and `sweep` summaries keep their source there) record where they came from rather than operands their
+operator can re-run, so they are skipped, as are rows whose operator is
+not an operation symbol.
+
+The check runs on a copy taken under the history lock, so producers keep
+going meanwhile; a rewrite is one `set_results` change (one undo), and is
+refused if the history changed in between.
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from .exceptions import OperationError
+from .operations import operation_factory
+
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 0.0
+
+@dataclass
+class RecomputeReport:
+    """
+    `mismatches` holds (position, operator, stored, recomputed) in position
+    order; `errors` maps positions the strategy now rejects to its message.
+    """
+    checked: int
+    skipped: int
+    mismatches: List[Tuple[int, str, float, float]] = field(default_factory=list)
+    errors: Dict[int, str] = field(default_factory=dict)
+    seconds: float = 0.0
+    rewritten: int = 0
+
+    def to_dict(self, limit: int) -> Dict[str, Any]:
+        """JSON-serializable summary with the first `limit` mismatches and errors."""
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "mismatched": len(self.mismatches),
+            "failed": len(self.errors),
+            "rewritten": self.rewritten,
+            "seconds": self.seconds,
+            "mismatches": [{"index": i, "operator": op, "stored": old, "recomputed": new}
+                           for i, op, old, new in self.mismatches[:limit]],
+            "errors": [{"index": i, "error": msg} for i, msg in list(self.errors.items())[:limit]],
+        }
+
+def recompute(history, rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL,
+              rewrite: bool = False) -> RecomputeReport:
+    """
+    Compare each row's result with its recomputed value (`numpy.isclose`
+    with `rtol`/`atol`; NaN matches NaN). With `rewrite`, mismatched results
+    are replaced as one undoable change; rows that now fail keep theirs.
+    """
+    import numpy as np
+    start = time.perf_counter()
+    buf, version = history.versioned_copy()
+    offsets = np.asarray(buf.operands.offsets, dtype=np.int64)
+    flat = np.asarray(buf.operands.flat, dtype=np.float64)
+    stored = np.asarray(getattr(buf.results, "values", buf.results), dtype=np.float64)
+    recomputed = stored.copy()
+    checked = np.zeros(len(stored), dtype=bool)
+    widths = np.diff(offsets)
+    noted = np.zeros(len(stored), dtype=bool)
+    noted[list(buf.notes)] = True
+    report = RecomputeReport(checked=0, skipped=0)
+    errors: Dict[int, str] = {}
+    for operator, positions in buf.operator_index().items():
+        try:
+            strategy = operation_factory(operator)
+        except OperationError:
+            report.skipped += len(positions)
+            continue
+        positions = np.asarray(positions, dtype=np.int64)
+        keep = ~noted[positions]
+        report.skipped += len(positions) - int(keep.sum())
+        positions = positions[keep]
+        row_widths = widths[positions]
+        for width in np.unique(row_widths).tolist():
+            rows = positions[row_widths == width]
+            block = flat[offsets[rows][:, None] + np.arange(width)]  # one gather per group
+            batch = strategy.execute_batch(block)
+            recomputed[rows] = batch.results
+            errors.update((int(rows[j]), msg) for j, msg in batch.errors.items())
+        checked[positions] = True
+    differs = checked & ~np.isclose(recomputed, stored, rtol=rtol, atol=atol, equal_nan=True)
+    differs[list(errors)] = False
+    found = np.flatnonzero(differs).tolist()
+    operators = buf.operators
+    report.mismatches = [(i, operators[i], old, new) for i, old, new in
+                         zip(found, stored[found].tolist(), recomputed[found].tolist())]
+    report.errors = dict(sorted(errors.items()))
+    report.checked = int(checked.sum())
+    if rewrite and found:
+        history.set_results(found, recomputed[found].tolist(), version=version)
+        report.rewritten = len(found)
+    report.seconds = time.perf_counter() - start
+    return report
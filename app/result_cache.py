@@ -0,0 +1,79 @@
+"""
+Bounded LRU cache of pure operation results for CalculatorFacade.perform.
+Safe to share between threads.
+"""
+from __future__ import annotations
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Sequence, Tuple, Union
+from .exceptions import OperationError
+
+@dataclass(frozen=True)
+class _Failure:
+    """Negative entry: the operation deterministically raised OperationError."""
+    message: str
+
+def cache_key(operator: str, operands: Sequence[float]) -> Tuple[Hashable, ...]:
+    """
+    Key on the operator and float operands. Negative zeros are tracked
+    separately because -0.0 == 0.0 but can change the result's sign.
+    """
+    ops = tuple(operands)
+    neg_zeros = tuple(i for i, x in enumerate(ops) if x == 0 and math.copysign(1.0, x) < 0)
+    return (operator, ops, neg_zeros)
+
+class ResultCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Hashable, ...], Union[float, _Failure]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key) -> Optional[float]:
+        """Return the cached result, raise the cached OperationError, or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        if isinstance(entry, _Failure):
+            raise OperationError(entry.message)
+        return entry
+
+    def put(self, key, result: float):
+        self._store(key, result)
+
+    def put_error(self, key, error: OperationError):
+        self._store(key, _Failure(str(error)))
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,197 @@
+"""
+Asyncio JSON-lines server exposing CalculatorFacade to many clients from one
+process.
+
+Each request is one JSON object per line, either
+    {"id": 1, "cmd": "+", "args": [1, 2]}   or   {"id": 1, "line": "+ 1 2"}
+and gets one response line, in request order:
+    {"id": 1, "ok": true, "result": 3.0}    or   {"id": 1, "ok": false, "error": "..."}
+
+Every connection has its own in-memory History session. Clients may pipeline
+requests. A bounded per-connection queue stops reading the socket when the
+client runs ahead (backpressure), and queued requests are executed in batches
+on a thread pool so calculations never block the event loop.
+
+Run: python -m app.server [--host H] [--port P | --unix PATH] [--data-dir DIR]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+from .calculator_config import Config
+from .calculator_repl import CalculatorFacade, OPERATORS, RECOMPUTE_SHOWN, TAIL_DEFAULT, handle
+from .exceptions import CalculatorError, ValidationError
+from .expression import looks_like_expression
+from .input_validators import parse_command, parse_history_args, parse_recompute_args, parse_summary_args
+from .operand_stream import is_stream
+
+COMMANDS = OPERATORS | {"history", "undo", "redo", "save", "load", "clear", "eval", "cache"}
+MAX_LINE = 1 << 20
+
+class Session:
+    """One client's calculator state; only ever used by one thread at a time."""
+    def __init__(self, facade: CalculatorFacade, data_dir: str):
+        self.facade = facade
+        self.data_dir = os.path.realpath(data_dir)
+
+    def _path(self, name: str) -> str:
+        path = os.path.realpath(os.path.join(self.data_dir, name))
+        if os.path.commonpath([path, self.data_dir]) != self.data_dir:
+            raise ValidationError("Path must stay inside the server data directory")
+        return path
+
+    def execute(self, line: bytes) -> Dict[str, Any]:
+        rid = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValidationError("Request must be a JSON object")
+            rid = request.get("id")
+            if "line" in request:
+                cmd, args = parse_command(str(request["line"]))
+            else:
+                cmd, args = str(request.get("cmd", "")).lower(), [str(a) for a in request.get("args", [])]
+            if cmd in OPERATORS:
+                if is_stream(args) and args[0] != "@":
+                    args = ["@" + self._path(args[0][1:])] + args[1:]
+                return {"id": rid, "ok": True, "result": self.facade.perform(cmd, args)}
+            if cmd == "eval" or looks_like_expression(cmd):
+                source = " ".join(args if cmd == "eval" else [cmd] + args)
+                return {"id": rid, "ok": True, "result": self.facade.evaluate(source)}
+            if cmd == "history":
+                query = parse_history_args(args)
+                if "out" in query:
+                    raise ValidationError("history --out is not available over the server")
+                if query["tail"]:
+                    query.setdefault("limit", TAIL_DEFAULT)
+                rows = [{"index": i, "operator": op, "operands": list(ops), "result": res,
+                         **({} if note is None else {"note": note})}
+                        for i, op, ops, res, note in self.facade.history.select(**query, notes=True)]
+                return {"id": rid, "ok": True, "rows": rows}
+            if cmd == "summary":
+                return {"id": rid, "ok": True, "summary": self.facade.summary(parse_summary_args(args))}
+            if cmd == "recompute":
+                report = self.facade.recompute(**parse_recompute_args(args))
+                return {"id": rid, "ok": True, "recompute": report.to_dict(RECOMPUTE_SHOWN)}
+            if cmd in ("save", "load") and args:
+                args = [self._path(args[0])]
+            if cmd not in COMMANDS:
+                raise ValidationError(f"Unknown command: {cmd!r}")
+            return {"id": rid, "ok": True, "message": handle(self.facade, cmd, args)}
+        except (CalculatorError, OSError) as exc:
+            return {"id": rid, "ok": False, "error": str(exc)}
+        except (ValueError, TypeError) as exc:
+            return {"id": rid, "ok": False, "error": f"Bad request: {exc}"}
+
+    def close(self):
+        self.facade.close()
+
+class CalculatorServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                 max_pipeline: int = 1024, batch_size: int = 256, workers: Optional[int] = None,
+                 data_dir: str = ".", session_factory: Optional[Callable[[], Session]] = None):
+        self.host, self.port, self.unix_path = host, port, unix_path
+        self.max_pipeline = max_pipeline
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calc-server")
+        # Per-connection in-memory sessions: never the configured CSV or shared SQLite history.
+        base = dataclasses.replace(Config.load(), history_backend="csv", history_csv="", autosave=False)
+        self.session_factory = session_factory or (lambda: Session(CalculatorFacade(base), data_dir))
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    async def start(self) -> "CalculatorServer":
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(self._serve, path=self.unix_path, limit=MAX_LINE)
+        else:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port, limit=MAX_LINE)
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):  # pragma: no cover - runs until cancelled
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting, let open connections finish their queued requests, then stop."""
+        if self._server is not None:
+            self._server.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    @staticmethod
+    def _run_batch(session: Session, lines: List[bytes]) -> bytes:
+        return b"".join(json.dumps(session.execute(line)).encode() + b"\n" for line in lines)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._connections.add(task)
+        session = self.session_factory()
+        queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=self.max_pipeline)
+
+        async def respond():
+            done = False
+            while not done:
+                batch = [await queue.get()]
+                while not queue.empty() and len(batch) < self.batch_size:
+                    batch.append(queue.get_nowait())
+                if batch[-1] is None:
+                    done = True
+                    batch.pop()
+                if batch:
+                    writer.write(await loop.run_in_executor(self.executor, self._run_batch, session, batch))
+                    await writer.drain()
+
+        responder = asyncio.create_task(respond())
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than MAX_LINE: protocol violation, drop the client
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await queue.put(line)  # blocks when the client outruns us
+        except ConnectionError:  # pragma: no cover - client vanished
+            pass
+        finally:
+            await queue.put(None)
+            try:
+                await responder
+            except ConnectionError:  # pragma: no cover - client vanished
+                pass
+            writer.close()
+            session.close()
+            self._connections.discard(task)
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--data-dir", default=".", help="directory that save/load paths are confined to")
+    parser.add_argument("--workers", type=int, default=None, help="threads executing requests")
+    return parser.parse_args(argv)
+
+async def _main(opts):  # pragma: no cover - CLI entry
+    server = await CalculatorServer(opts.host, opts.port, opts.unix, workers=opts.workers,
+                                    data_dir=opts.data_dir).start()
+    where = opts.unix or f"{server.host}:{server.port}"
+    print(f"Calculator server listening on {where}", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    try:
+        asyncio.run(_main(_parse_args(sys.argv[1:])))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,95 @@
+"""
+Evaluate one operation over a generated operand grid (`sweep`).
+
+Each operand is a number or a range `start:stop[:step]` (step 1 by
+default, `stop` included when the steps land on it). Several ranges form
+a grid, the last one varying fastest, so `sweep ^ 0:1e6 2` squares a
+million numbers and `sweep root 2:5 1000 8000` takes 4 x 2 roots.
+
+Nothing is materialized up front: each chunk of grid points is computed
+from its flat indices (start + i * step, so steps never accumulate
+rounding) into a 2-D array and evaluated with the strategy's
+`execute_batch`. NumPy is imported when a sweep runs.
+"""
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
+from .exceptions import ValidationError
+from .operations import BatchResult, operation_factory
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+SWEEP_CHUNK = 1 << 16  # grid points evaluated per batch
+RECORD_MODES = ("summary", "rows", "none")
+MAX_POINTS = 10 ** 10  # larger grids are almost certainly a typo
+_FUZZ = 1e-9  # of a step: absorbs rounding in (stop - start) / step
+
+@dataclass
+class SweepResult:
+    points: int
+    errors: int
+    seconds: float
+    recorded: int  # history rows added
+
+@dataclass(frozen=True)
+class Axis:
+    """`count` values start, start + step, ... for one operand."""
+    spec: str
+    start: float
+    step: float
+    count: int
+
+    @staticmethod
+    def parse(spec: str) -> "Axis":
+        parts = spec.split(":")
+        try:
+            values = [float(p) for p in parts]
+        except ValueError as exc:
+            raise ValidationError(f"Sweep operand {spec!r} must be a number or start:stop[:step]") from exc
+        if len(values) == 1:
+            return Axis(spec, values[0], 0.0, 1)
+        if len(values) > 3:
+            raise ValidationError(f"Sweep operand {spec!r} must be a number or start:stop[:step]")
+        start, stop = values[0], values[1]
+        step = values[2] if len(values) == 3 else 1.0
+        if not all(map(math.isfinite, values)) or step == 0:
+            raise ValidationError(f"Sweep range {spec!r} needs finite bounds and a non-zero step")
+        steps = (stop - start) / step
+        if steps < -_FUZZ:
+            raise ValidationError(f"Sweep range {spec!r} is empty")
+        if steps >= MAX_POINTS:
+            raise ValidationError(f"Sweep range {spec!r} has more than {MAX_POINTS} points")
+        return Axis(spec, start, step, math.floor(steps + _FUZZ) + 1)
+
+class Sweep:
+    """The grid of `axes` for `operator`; iterate `chunks()` to evaluate it."""
+
+    def __init__(self, operator: str, specs: Sequence[str], chunk_size: Optional[int] = None):
+        self.operator = operator
+        self.strategy = operation_factory(operator)
+        if not specs:
+            raise ValidationError("Usage: sweep <operator> <operand|start:stop[:step]>...")
+        self.axes: List[Axis] = [Axis.parse(spec) for spec in specs]
+        self.points = math.prod(axis.count for axis in self.axes)
+        if self.points > MAX_POINTS:
+            raise ValidationError(f"Sweep grid has more than {MAX_POINTS} points")
+        self.chunk_size = chunk_size or SWEEP_CHUNK
+
+    @property
+    def spec(self) -> str:
+        return " ".join(axis.spec for axis in self.axes)
+
+    def block(self, first: int, stop: int) -> "np.ndarray":
+        """Operand rows for grid points first..stop-1, one column per axis."""
+        import numpy as np
+        shape = tuple(axis.count for axis in self.axes)
+        indices = np.unravel_index(np.arange(first, stop), shape)
+        return np.column_stack([axis.start + i * axis.step for axis, i in zip(self.axes, indices)])
+
+    def chunks(self) -> Iterator[Tuple[int, "np.ndarray", BatchResult]]:
+        """(first grid point, operand rows, their results) per chunk, in grid order."""
+        for first in range(0, self.points, self.chunk_size):
+            block = self.block(first, min(first + self.chunk_size, self.points))
+            yield first, block, self.strategy.execute_batch(block)
@@ -0,0 +1 @@
+#makes benchmarks a package so modules run with `python -m benchmarks.<name>`
@@ -0,0 +1,5 @@
+# `python -m benchmarks` runs the whole suite; see benchmarks/suite.py
+import sys
+from .suite import main
+
+sys.exit(main())
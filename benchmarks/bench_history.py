@@ -0,0 +1,43 @@
+"""
+Benchmark: per-append latency of the History column store and of
+History.add_record end to end (column append + undo delta).
+
+Run: python -m benchmarks.bench_history [max_rows]
+"""
+from __future__ import annotations
+import sys
+import time
+from app.history import History, HistoryBuffer
+
+CHECKPOINTS = (1_000, 10_000, 100_000, 1_000_000)
+WINDOW = 1_000  # appends timed around each checkpoint
+
+def _bench(append, size, max_rows):
+    rows = []
+    for target in (c for c in CHECKPOINTS if c <= max_rows):
+        while size() < target - WINDOW:
+            append("+", (1.0, 2.0), 3.0)
+        start = time.perf_counter()
+        for _ in range(WINDOW):
+            append("+", (1.0, 2.0), 3.0)
+        elapsed = time.perf_counter() - start
+        rows.append((size(), elapsed / WINDOW * 1e9))
+    return rows
+
+def bench_append(max_rows: int = 1_000_000):
+    buf = HistoryBuffer()
+    return _bench(buf.append, buf.__len__, max_rows)
+
+def bench_add_record(max_rows: int = 1_000_000):
+    h = History(autosave=False)
+    return _bench(h.add_record, h.__len__, max_rows)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    max_rows = int(float(argv[0])) if argv else 1_000_000
+    print(f"{'rows':>10}  {'buffer ns':>10}  {'add_record ns':>14}")
+    for (n, buf_ns), (_, rec_ns) in zip(bench_append(max_rows), bench_add_record(max_rows)):
+        print(f"{n:>10}  {buf_ns:>10.1f}  {rec_ns:>14.1f}")
+
+if __name__ == "__main__":
+    main()
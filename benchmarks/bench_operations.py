@@ -0,0 +1,50 @@
+"""
+Benchmark: CalculatorFacade.perform in a loop vs perform_many (vectorized),
+both with history recording and compute-only (record=False).
+
+Run: python -m benchmarks.bench_operations [rows]
+"""
+from __future__ import annotations
+import sys
+import time
+import numpy as np
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade
+
+LOOP_SAMPLE = 50_000  # rows timed through `perform`; extrapolated per row
+
+def _facade():
+    return CalculatorFacade(Config(history_csv="", autosave=False))
+
+def bench(rows: int = 1_000_000, symbols=("+", "-", "*", "/", "^", "root")):
+    rng = np.random.default_rng(0)
+    arr = rng.uniform(1.0, 10.0, size=(rows, 2))
+    out = []
+    for symbol in symbols:
+        facade = _facade()
+        args = [[repr(a), repr(b)] for a, b in arr[:min(rows, LOOP_SAMPLE)].tolist()]
+        start = time.perf_counter()
+        for a in args:
+            facade.perform(symbol, a)
+        loop_per_row = (time.perf_counter() - start) / len(args)
+        facade = _facade()
+        start = time.perf_counter()
+        facade.perform_many(symbol, arr)
+        batch_per_row = (time.perf_counter() - start) / rows
+        start = time.perf_counter()
+        facade.perform_many(symbol, arr, record=False)
+        compute_per_row = (time.perf_counter() - start) / rows
+        out.append((symbol, loop_per_row * 1e9, batch_per_row * 1e9, compute_per_row * 1e9))
+    return out
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(float(argv[0])) if argv else 1_000_000
+    print(f"{rows} rows")
+    print(f"{'op':>5}  {'perform':>9}  {'many':>9}  {'speedup':>8}  {'compute':>9}  {'speedup':>8}  (ns/row)")
+    for symbol, loop_ns, batch_ns, compute_ns in bench(rows):
+        print(f"{symbol:>5}  {loop_ns:>9.1f}  {batch_ns:>9.1f}  {loop_ns / batch_ns:>7.1f}x"
+              f"  {compute_ns:>9.1f}  {loop_ns / compute_ns:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
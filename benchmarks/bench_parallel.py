@@ -0,0 +1,48 @@
+"""
+Benchmark: scaling of the parallel file evaluator from 1 to N worker processes.
+
+Run: python -m benchmarks.bench_parallel [lines] [max_workers]
+"""
+from __future__ import annotations
+import os
+import random
+import sys
+import tempfile
+from app.history import History
+from app.parallel import run_parallel
+
+SYMBOLS = ("+", "-", "*", "/", "^", "root")
+
+def _write_ops(path: str, lines: int):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as fh:
+        for _ in range(lines):
+            fh.write(f"{rng.choice(SYMBOLS)} {rng.uniform(1, 9):.6f} {rng.uniform(1, 3):.6f}\n")
+
+def bench(lines: int = 1_000_000, max_workers: int = 0, chunk_size: int = 10_000):
+    max_workers = max_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ops.txt")
+        _write_ops(path, lines)
+        rows = []
+        for workers in sorted({1, 2, 4, 8, 16, 32, max_workers}):
+            if workers > max_workers:
+                continue
+            with open(path, "r", encoding="utf-8") as fh:
+                report = run_parallel(History(autosave=False), fh, workers=workers, chunk_size=chunk_size)
+            rows.append((workers, report.seconds))
+        return rows
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    lines = int(float(argv[0])) if argv else 1_000_000
+    max_workers = int(argv[1]) if len(argv) > 1 else 0
+    rows = bench(lines, max_workers)
+    base = rows[0][1]
+    print(f"{lines} lines")
+    print(f"{'workers':>8}  {'seconds':>8}  {'ops/s':>10}  {'speedup':>8}")
+    for workers, seconds in rows:
+        print(f"{workers:>8}  {seconds:>8.3f}  {lines / seconds:>10.0f}  {base / seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
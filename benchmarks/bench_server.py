@@ -0,0 +1,87 @@
+"""
+Load generator for app.server: concurrent pipelined clients, reporting
+requests per second and latency percentiles.
+
+Run against a running server:
+    python -m benchmarks.bench_server --port 8765 [--clients 16] [--requests 20000] [--pipeline 64]
+or let it start an in-process server:
+    python -m benchmarks.bench_server --local
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+SYMBOLS = ("+", "-", "*", "/", "^", "root")
+
+async def _client(host, port, unix, requests: int, pipeline: int, latencies: List[float]):
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    sent_at = {}
+    window = asyncio.Semaphore(pipeline)
+
+    async def send():
+        for i in range(requests):
+            await window.acquire()
+            req = {"id": i, "cmd": rng.choice(SYMBOLS), "args": [rng.uniform(1, 9), rng.uniform(1, 3)]}
+            sent_at[i] = time.perf_counter()
+            writer.write(json.dumps(req).encode() + b"\n")
+            await writer.drain()
+
+    async def receive():
+        for _ in range(requests):
+            resp = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(resp["id"]))
+            window.release()
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+    await writer.wait_closed()
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+async def run(host="127.0.0.1", port=8765, unix=None, clients=16, requests=20_000, pipeline=64, local=False):
+    server = None
+    if local:
+        from app.server import CalculatorServer
+        server = await CalculatorServer(host, 0).start()
+        port = server.port
+    latencies: List[float] = []
+    per_client = max(1, requests // clients)
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, unix, per_client, pipeline, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        await server.close()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1e3,
+        "p99_ms": _percentile(latencies, 0.99) * 1e3,
+        "max_ms": latencies[-1] * 1e3,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--pipeline", type=int, default=64)
+    parser.add_argument("--local", action="store_true", help="start an in-process server on a free port")
+    opts = parser.parse_args(argv)
+    stats = asyncio.run(run(opts.host, opts.port, opts.unix, opts.clients, opts.requests, opts.pipeline, opts.local))
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
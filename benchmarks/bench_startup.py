@@ -0,0 +1,74 @@
+"""
+Benchmark: process startup, i.e. import time and time to first result.
+
+Each measurement is a fresh interpreter, so nothing is cached in-process:
+  bare       python -c pass (interpreter floor)
+  import     import app.calculator_repl
+  first      python -m app.calculator_repl --batch - <<< "+ 1 2", with an
+             existing history CSV of `rows` rows and autosave on
+
+Exits non-zero when the median time to first result, minus the bare
+interpreter, exceeds the budget, so it can gate CI.
+
+Run: python -m benchmarks.bench_startup [--runs N] [--rows R] [--budget-ms MS]
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 250.0
+
+def _time(args, env, stdin: str = "") -> float:
+    start = time.perf_counter()
+    subprocess.run(args, input=stdin, env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def _write_history(path: str, rows: int):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("operator,operands,result\n")
+        for i in range(rows):
+            fh.write(f'+,"[{i}.0, 1.0]",{i + 1}.0\n')
+
+def bench(runs: int = 7, rows: int = 10_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, "history.csv")
+        env = dict(os.environ, PYTHONPATH=ROOT, HISTORY_CSV=csv, AUTOSAVE="true", AUTOSAVE_MODE="snapshot")
+        cases = {
+            "bare": ([sys.executable, "-c", "pass"], ""),
+            "import": ([sys.executable, "-c", "import app.calculator_repl"], ""),
+            "first": ([sys.executable, "-m", "app.calculator_repl", "--batch", "-"], "+ 1 2\n"),
+        }
+        samples = {name: [] for name in cases}
+        for _ in range(runs):
+            _write_history(csv, rows)  # autosave appended a row last time
+            for name, (args, stdin) in cases.items():
+                samples[name].append(_time(args, env, stdin))
+        return {name: statistics.median(times) for name, times in samples.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows in the history CSV loaded at startup")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="allowed time to first result above the bare interpreter")
+    opts = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    medians = bench(opts.runs, opts.rows)
+    bare = medians["bare"]
+    print(f"{opts.runs} runs, {opts.rows} history rows (median ms)")
+    for name, ms in medians.items():
+        print(f"{name:>8}  {ms:>8.1f}  {ms - bare:>+8.1f}")
+    overhead = medians["first"] - bare
+    if overhead > opts.budget_ms:
+        print(f"FAIL: time to first result {overhead:.1f} ms > budget {opts.budget_ms:.0f} ms", file=sys.stderr)
+        return 1
+    print(f"ok: time to first result {overhead:.1f} ms <= budget {opts.budget_ms:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
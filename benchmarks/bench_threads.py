@@ -0,0 +1,66 @@
+"""
+Benchmark: throughput of one CalculatorFacade shared by 1 to N threads.
+
+Each thread runs `perform` in a loop; history appends are serialized, so
+this shows what the lock costs under contention (pure-Python strategies
+are bound by the GIL, so the total rate should stay flat, not collapse).
+
+Run: python -m benchmarks.bench_threads [ops_per_thread] [max_threads] [autosave_mode]
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import threading
+import time
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade
+
+def _run(facade: CalculatorFacade, threads: int, ops: int) -> float:
+    start = threading.Barrier(threads + 1)
+
+    def work(t: int):
+        args = [str(t), "2.5"]
+        start.wait()
+        for _ in range(ops):
+            facade.perform("+", args)
+
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    start.wait()
+    began = time.perf_counter()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - began
+
+def bench(ops: int = 20_000, max_threads: int = 0, mode: str = "background"):
+    max_threads = max_threads or min(os.cpu_count() or 1, 32)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in sorted({1, 2, 4, 8, 16, 32, max_threads}):
+            if threads > max_threads:
+                continue
+            facade = CalculatorFacade(Config(history_csv=os.path.join(tmp, f"h{threads}.csv"),
+                                             autosave=mode != "off", autosave_mode=mode, metrics=False))
+            seconds = _run(facade, threads, ops)
+            assert len(facade.history) == threads * ops, "lost history rows"
+            facade.close()
+            rows.append((threads, seconds))
+    return rows
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    ops = int(float(argv[0])) if argv else 20_000
+    max_threads = int(argv[1]) if len(argv) > 1 else 0
+    mode = argv[2] if len(argv) > 2 else "background"
+    rows = bench(ops, max_threads, mode)
+    base = ops / rows[0][1]
+    print(f"{ops} ops per thread, autosave {mode}")
+    print(f"{'threads':>8}  {'seconds':>8}  {'ops/s':>10}  {'vs 1':>7}")
+    for threads, seconds in rows:
+        rate = threads * ops / seconds
+        print(f"{threads:>8}  {seconds:>8.3f}  {rate:>10.0f}  {rate / base:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Benchmark suite over the hot paths in app/, with JSON output and a compare
+mode against a saved baseline.
+
+Every case is reported as {"value": ..., "unit": ...}; lower is better.
+Sizes grow within a group (e.g. `history.add_record[n=100000]`), so a change
+that makes an operation depend on history size shows up as a regression at
+the larger sizes even when the small ones look fine.
+
+Run:  python -m benchmarks [--quick] [-k GROUP] [-o results.json]
+      python -m benchmarks --quick -o baseline.json        # save a baseline
+      python -m benchmarks --quick --compare baseline.json  # exit 1 on regressions
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+Results = Dict[str, Dict[str, object]]
+DEFAULT_THRESHOLD = 0.25  # flag cases more than 25% slower than the baseline
+
+def _per_op(fn: Callable[[], object], number: int, repeat: int = 7) -> float:
+    """
+    Best-of-`repeat` nanoseconds per call of `fn`, timed `number` calls at a
+    time with the garbage collector paused (as timeit does).
+    """
+    best = float("inf")
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return best / number * 1e9
+
+def _ns(value: float) -> Dict[str, object]:
+    return {"value": value, "unit": "ns/op"}
+
+def _prefilled_history(rows: int, **kwargs):
+    from app.history import History
+    history = History(**kwargs)
+    if rows:
+        history.add_columns(["+"] * rows, [[float(i), 1.0] for i in range(rows)], [i + 1.0 for i in range(rows)])
+    return history
+
+# ---- cases ----------------------------------------------------------------
+def bench_history(quick: bool) -> Results:
+    from app.recompute import recompute
+    out: Results = {}
+    for n in (1_000, 10_000) if quick else (1_000, 10_000, 100_000, 1_000_000):
+        history = _prefilled_history(n, autosave=False)
+        out[f"history.add_record[n={n}]"] = _ns(_per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 1_000))
+        out[f"history.select.page[n={n}]"] = _ns(_per_op(lambda: list(history.select(limit=100, offset=n // 2)), 100))
+        out[f"history.select.operator_tail[n={n}]"] = _ns(
+            _per_op(lambda: list(history.select(operator="+", tail=True, limit=100)), 100))
+        history.summary()  # builds the aggregates; appends keep them current from here on
+        out[f"history.summary[n={n}]"] = _ns(_per_op(history.summary, 1_000))
+        out[f"history.summary.last_1000[n={n}]"] = _ns(_per_op(lambda: history.summary(last=1_000), 20))
+        out[f"history.add_record.with_summary[n={n}]"] = _ns(
+            _per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 1_000))
+        out[f"history.recompute[n={n}]"] = _ns(_per_op(lambda: recompute(history), 1, 3))
+    out.update(_bench_observers(10_000))
+    return out
+
+def _bench_observers(n: int) -> Results:
+    """add_record with one observer: the legacy DataFrame callback vs a bus subscriber per policy."""
+    out: Results = {}
+    history = _prefilled_history(n, autosave=False)
+    history.attach(lambda df: None)
+    out[f"history.add_record.attach_df[n={n}]"] = _ns(_per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 20))
+    for policy in ("block", "drop", "coalesce"):
+        history = _prefilled_history(n, autosave=False)
+        history.subscribe(lambda event: None, maxsize=64, policy=policy)
+        out[f"history.add_record.subscribe_{policy}[n={n}]"] = _ns(
+            _per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 1_000))
+        history.close()
+    return out
+
+def bench_caretaker(quick: bool) -> Results:
+    from app.calculator_memento import AppendDelta, Caretaker
+    out: Results = {}
+    for depth in (10, 1_000) if quick else (10, 1_000, 100_000):
+        caretaker = Caretaker()
+        for i in range(depth):
+            caretaker.push(AppendDelta(i, ("+",), ((1.0, 2.0),), (3.0,), nbytes=80))
+
+        def undo_redo():
+            caretaker.undo()
+            caretaker.redo()
+        out[f"caretaker.undo_redo[depth={depth}]"] = _ns(_per_op(undo_redo, 1_000))
+    return out
+
+def bench_memento(quick: bool) -> Results:
+    from app.calculator_memento import HistoryMemento
+    out: Results = {}
+    for n in (100, 1_000) if quick else (100, 10_000):
+        df = _prefilled_history(n, autosave=False).df
+        memento = HistoryMemento.from_df(df)
+        number = 20 if n <= 1_000 else 3
+        out[f"memento.from_df[n={n}]"] = _ns(_per_op(lambda: HistoryMemento.from_df(df), number, 3))
+        out[f"memento.to_df[n={n}]"] = _ns(_per_op(memento.to_df, number, 3))
+    return out
+
+def bench_autosave(quick: bool) -> Results:
+    out: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (100, 10_000) if quick else (100, 10_000, 100_000):
+            for ext in ("csv", "hcol"):
+                history = _prefilled_history(n, csv_path=os.path.join(tmp, f"h{n}.{ext}"), autosave=True)
+                number = 20 if n <= 10_000 else 3
+                out[f"history.autosave.{ext}[n={n}]"] = _ns(
+                    _per_op(lambda: history._buffer.write_file(history.csv_path), number, 3))
+                history.close()
+            for mode in ("snapshot", "background"):
+                history = _prefilled_history(n, csv_path=os.path.join(tmp, f"{mode}{n}.csv"), autosave=True,
+                                             autosave_mode=mode)
+                out[f"history.add_record.{mode}_autosave[n={n}]"] = _ns(
+                    _per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 1_000))
+                history.close()
+            out.update(_bench_sqlite(n, os.path.join(tmp, f"h{n}.sqlite3")))
+    return out
+
+def _bench_sqlite(n: int, path: str) -> Results:
+    from app.history_sqlite import SqliteStorage
+    history = _prefilled_history(n, storage=SqliteStorage(path, fsync="never"))
+
+    def undo_redo():
+        history.undo()
+        history.redo()
+
+    def clear_undo():
+        history.clear()
+        history.undo()
+    out = {
+        f"history.add_record.sqlite[n={n}]": _ns(_per_op(lambda: history.add_record("+", (1.0, 2.0), 3.0), 1_000)),
+        f"history.undo_redo.sqlite[n={n}]": _ns(_per_op(undo_redo, 1_000)),
+        f"history.clear_undo.sqlite[n={n}]": _ns(_per_op(clear_undo, 100)),
+    }
+    history.close()
+    return out
+
+def bench_operations(quick: bool) -> Results:
+    import numpy as np
+    from app.operations import _FACTORY, operation_factory
+    out: Results = {}
+    rows = 10_000
+    for symbol, cls in _FACTORY.items():
+        strategy = operation_factory(symbol)
+        for count in (2,) if symbol in ("^", "root") else ((2, 8) if quick else (2, 8, 64)):
+            operands = [2.0 + i / count for i in range(count)]
+            out[f"operations.{cls.name}.execute[operands={count}]"] = _ns(
+                _per_op(lambda: strategy.execute(operands), 10_000))
+            arr = np.tile(np.asarray(operands), (rows, 1))
+            out[f"operations.{cls.name}.execute_batch_per_row[operands={count}]"] = _ns(
+                _per_op(lambda: strategy.execute_batch(arr), 5) / rows)
+    from app.operand_stream import OperandStream
+    values = np.arange(1.0, 200_001.0 if quick else 2_000_001.0)
+    add = operation_factory("+")
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("f64", "txt"):
+            path = os.path.join(tmp, f"values.{ext}")
+            if ext == "f64":
+                values.tofile(path)
+            else:
+                np.savetxt(path, values, fmt="%.17g")
+            out[f"operations.addition.reduce_stream_per_value[{ext}]"] = _ns(
+                _per_op(lambda: add.reduce_stream(OperandStream("@" + path).chunks()), 1, 3) / len(values))
+    from app.calculator_config import Config
+    from app.calculator_repl import CalculatorFacade
+    facade = CalculatorFacade(Config(history_csv="", autosave=False, metrics=False))
+    points = 100_000 if quick else 1_000_000
+    for record in ("summary", "rows"):
+        out[f"facade.sweep.{record}_per_point[points={points}]"] = _ns(
+            _per_op(lambda: facade.sweep("^", [f"1:{points}", "2"], record=record), 1, 3) / points)
+    return out
+
+def bench_parse(quick: bool) -> Results:
+    from app.input_validators import parse_command, parse_operation_args
+    line = "+ 1.5 2.25 3 -4e2"
+    args = parse_command(line)[1]
+    return {
+        "parse.command": _ns(_per_op(lambda: parse_command(line), 20_000)),
+        "parse.operation_args": _ns(_per_op(lambda: parse_operation_args(args), 20_000)),
+    }
+
+def bench_threads(quick: bool) -> Results:
+    from app.calculator_config import Config
+    from app.calculator_repl import CalculatorFacade
+    from .bench_threads import _run
+    out: Results = {}
+    ops = 5_000 if quick else 20_000
+    for threads in (1, 4) if quick else (1, 4, 16):
+        facade = CalculatorFacade(Config(history_csv="", autosave=False, metrics=False))
+        seconds = _run(facade, threads, ops)
+        out[f"facade.perform.shared[threads={threads}]"] = _ns(seconds / (threads * ops) * 1e9)
+    return out
+
+def bench_startup(quick: bool) -> Results:
+    from . import bench_startup as startup
+    medians = startup.bench(runs=3 if quick else 7, rows=1_000 if quick else 10_000)
+    return {
+        "repl.startup.import": {"value": medians["import"] - medians["bare"], "unit": "ms"},
+        "repl.startup.first_result": {"value": medians["first"] - medians["bare"], "unit": "ms"},
+    }
+
+GROUPS: Dict[str, Callable[[bool], Results]] = {
+    "history": bench_history,
+    "caretaker": bench_caretaker,
+    "memento": bench_memento,
+    "autosave": bench_autosave,
+    "operations": bench_operations,
+    "parse": bench_parse,
+    "threads": bench_threads,
+    "startup": bench_startup,
+}
+
+# ---- runner ---------------------------------------------------------------
+def run(groups: Optional[List[str]] = None, quick: bool = False) -> Dict[str, object]:
+    results: Results = {}
+    for name, fn in GROUPS.items():
+        if groups and name not in groups:
+            continue
+        print(f"running {name} ...", file=sys.stderr)
+        results.update(fn(quick))
+    return {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, object]]:
+    """One row per case present in both runs; `regression` when current/baseline > 1 + threshold."""
+    rows = []
+    old, new = baseline["results"], current["results"]
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name]["value"], new[name]["value"]
+        ratio = after / before if before else float("inf")
+        rows.append({"case": name, "baseline": before, "current": after, "unit": new[name]["unit"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+def _print_comparison(rows: List[Dict[str, object]], out=sys.stderr):
+    width = max((len(r["case"]) for r in rows), default=4)
+    print(f"{'case':<{width}}  {'baseline':>12}  {'current':>12}  {'ratio':>6}", file=out)
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        print(f"{r['case']:<{width}}  {r['baseline']:>12.1f}  {r['current']:>12.1f}  {r['ratio']:>5.2f}x  "
+              f"{r['unit']}{flag}", file=out)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for CI and quick checks")
+    parser.add_argument("-k", dest="groups", action="append", choices=sorted(GROUPS),
+                        help="run only this group (repeatable)")
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default 0.25)")
+    opts = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    current = run(opts.groups, opts.quick)
+    text = json.dumps(current, indent=2)
+    if opts.output:
+        with open(opts.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if not opts.compare:
+        return 0
+    with open(opts.compare, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    rows = compare(baseline, current, opts.threshold)
+    _print_comparison(rows)
+    regressions = [r["case"] for r in rows if r["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {opts.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,103 @@
+import math, random, pytest
+from app.aggregates import Aggregate, HistoryAggregates, _BULK_MIN
+from app.history import History, HistoryBuffer
+
+def _state(agg):
+    return (agg.count, agg.nan, agg.pinf, agg.ninf, agg._sum, agg._min_pos, agg._min, agg._max_pos, agg._max)
+
+def _same(a, b):
+    assert _state(a.total) == _state(b.total)
+    assert {op: _state(x) for op, x in a.by_operator.items()} == {op: _state(x) for op, x in b.by_operator.items()}
+
+def test_sum_is_exact_and_reversible():
+    agg = Aggregate()
+    for pos, x in enumerate([1e300, 1.0, -1e300, 5e-324, -0.0, 3]):
+        agg.add(pos, x)
+    assert agg.sum == 4.0 and agg.mean == 4.0 / 6 and agg.min == -1e300 and agg.max == 1e300
+    agg.remove(5, 3)
+    agg.remove(4, -0.0)
+    agg.remove(3, 5e-324)
+    assert agg.sum == 1.0 and agg.count == 3  # no drift after adding and removing huge values
+    agg.remove(2, -1e300)
+    assert agg.sum == 1e300 and agg.min == 1.0 and agg.max == 1e300
+    empty = Aggregate()
+    assert math.isnan(empty.mean) and math.isnan(empty.min) and empty.stats()["count"] == 0
+
+def test_non_finite_results():
+    agg = Aggregate()
+    agg.add(0, 1e308)
+    agg.add(1, 1e308)
+    assert agg.sum == math.inf and agg.max == 1e308  # the exact sum overflows a float
+    agg.add(2, -math.inf)
+    assert agg.sum == -math.inf and agg.min == -math.inf and agg.stats()["inf"] == 1
+    agg.add(3, math.inf)
+    assert math.isnan(agg.sum) and agg.max == math.inf
+    agg.add(4, math.nan)
+    assert agg.stats()["nan"] == 1 and agg.max == math.inf and agg.count == 5
+    for pos, x in ((4, math.nan), (3, math.inf), (2, -math.inf)):
+        agg.remove(pos, x)
+    assert agg.sum == math.inf and (agg.nan, agg.pinf, agg.ninf) == (0, 0, 0)
+
+@pytest.mark.parametrize("rows", [10, _BULK_MIN * 20])
+def test_vectorized_build_matches_row_by_row(rows):
+    rng = random.Random(rows)
+    operators = [rng.choice("+-*/") if i % 7 else f"expr {i % 3}" for i in range(rows)]
+    results = [rng.choice([1.0, -1.0, 1e-310, 1e300]) * rng.random() for _ in range(rows)]
+    results[1], results[3], results[5], results[-1] = math.nan, math.inf, -0.0, -math.inf
+    operators += ["void"] * _BULK_MIN  # a group with no min or max
+    results += [math.nan] * _BULK_MIN
+    expected = HistoryAggregates()
+    expected.extend(0, operators, results)
+    _same(HistoryAggregates.build(operators, results), expected)
+
+def test_history_keeps_aggregates_through_undo_redo_clear_load(tmp_path):
+    h = History(autosave=False)
+    h.add_columns(["+", "*"] * 100, [[i, 1] for i in range(200)], [float(i % 17) for i in range(200)])
+    assert h.summary()["all"]["count"] == 200  # builds the aggregates once
+    built = h._buffer._aggregates
+    checks = []
+
+    def check():
+        _same(h._buffer.aggregates(), HistoryAggregates.build(h._buffer.operators, h._buffer.results))
+        checks.append(len(h))
+
+    h.add_record("-", [2, 1], 1.0)
+    h.undo()  # the operator's only row: its aggregate goes with it
+    assert "-" not in h._buffer.aggregates().by_operator
+    h.add_record("/", [1, 0.5], 2.0)
+    h.add_record("+", [1e300, 1], 1e300)
+    check()
+    h.undo()
+    check()
+    assert h._buffer._aggregates is built  # updated in place, not rebuilt
+    h.redo()
+    h.save(str(tmp_path / "h.csv"))
+    h.clear()
+    assert h.summary()["all"]["count"] == 0
+    h.undo()  # restores the copied aggregates
+    check()
+    h.load(str(tmp_path / "h.csv"))
+    check()
+    h.undo()
+    check()
+    assert checks == [202, 201, 202, 202, 202]
+    stats = h.summary(top=1)
+    assert list(stats["by_operator"]) == ["+"] and stats["operators"] == 3
+    assert stats["by_operator"]["+"] == {"count": 101, "sum": math.fsum([i % 17 for i in range(0, 200, 2)]) + 1e300,
+                                         "mean": stats["by_operator"]["+"]["sum"] / 101, "min": 0.0, "max": 1e300,
+                                         "nan": 0, "inf": 0}
+
+def test_summary_window_and_mapped_history(tmp_path):
+    path = str(tmp_path / "h.hcol")
+    h = History(autosave=False)
+    h.add_columns(["+"] * 90 + ["-"] * 10, [[1]] * 100, [float(i) for i in range(100)])
+    h.save(path)
+    mapped = History(csv_path=path, autosave=False)
+    assert mapped.summary()["by_operator"]["-"]["min"] == 90.0  # built from the mapped views
+    last = mapped.summary(last=15)
+    assert last["all"]["count"] == 15 and last["by_operator"]["+"]["sum"] == 85 + 86 + 87 + 88 + 89
+    assert h.summary(last=500)["all"]["count"] == 100
+    buf = HistoryBuffer.read_file(path)
+    buf.aggregates()
+    buf.append("*", [2], 2.0)  # decodes the views, keeps the aggregates
+    assert buf.aggregates().by_operator["*"].count == 1 and buf.copy().aggregates().total.count == 101
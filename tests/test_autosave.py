@@ -0,0 +1,94 @@
+import threading, time, pytest
+from app.autosave import BackgroundAutosave
+from app.history import History, HistoryBuffer
+from app.metrics import Metrics
+
+def _history(tmp_path, interval_ms=20):
+    return History(csv_path=str(tmp_path / "bg.csv"), autosave=True, autosave_mode="background",
+                   autosave_interval_ms=interval_ms)
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def test_background_autosave_coalesces_a_burst(tmp_path):
+    h = _history(tmp_path)
+    h.metrics = Metrics()
+    for i in range(200):
+        h.add_record("+", [i, 1], i + 1.0)
+    _wait_for(lambda: h.storage.autosaver.writes and len(HistoryBuffer.read_file(h.csv_path)) == 200)
+    assert h.storage.autosaver.writes < 200 and h.metrics.snapshot()["history.add_record"]["autosave"]["count"] == 200
+    assert [t.name for t in threading.enumerate()].count("history-autosave") == 1
+    h.close()
+    assert not any(t.name == "history-autosave" for t in threading.enumerate())
+
+def test_background_autosave_flushes_on_close_and_save(tmp_path):
+    h = _history(tmp_path, interval_ms=60_000)  # never due on its own during the test
+    h.add_record("+", [1, 2], 3.0)
+    h.save()
+    assert HistoryBuffer.read_file(h.csv_path).rows() == [("+", [1.0, 2.0], 3.0)]
+    h.add_record("*", [2, 3], 6.0)
+    h.undo()
+    h.redo()
+    h.close()
+    assert len(History(csv_path=h.csv_path, autosave=False)) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["bg.csv"]  # no temp files left behind
+
+def test_background_autosave_keeps_latest_state(tmp_path):
+    h = _history(tmp_path, interval_ms=0)
+    for i in range(50):
+        h.add_record("+", [i, 1], i + 1.0)
+        if i % 10 == 9:
+            h.clear()
+    h.add_record("-", [5, 1], 4.0)
+    h.close()
+    assert HistoryBuffer.read_file(h.csv_path).rows() == [("-", [5.0, 1.0], 4.0)]
+
+def test_background_autosave_surfaces_and_retries_write_errors(tmp_path, monkeypatch):
+    calls = []
+
+    def failing(self, path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        original(self, path)
+    original = HistoryBuffer.write_file
+    monkeypatch.setattr(HistoryBuffer, "write_file", failing)
+    h = _history(tmp_path, interval_ms=60_000)
+    h.add_record("+", [1, 2], 3.0)
+    with pytest.raises(OSError, match="disk full"):
+        h.storage.autosaver.flush()
+    h.close()  # still dirty, so retried
+    assert len(calls) == 2 and len(HistoryBuffer.read_file(h.csv_path)) == 1
+
+def test_flush_waits_for_an_in_flight_write(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    buf = HistoryBuffer()
+    buf.append("+", [1.0, 2.0], 3.0)
+
+    def slow_snapshot():
+        started.set()
+        release.wait(5)
+        return buf
+    saver = BackgroundAutosave(slow_snapshot, str(tmp_path / "s.csv"), interval=0)
+    saver.mark_dirty()
+    saver.mark_dirty()  # already dirty: no second write queued
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    saver.flush()
+    assert saver.writes == 1
+    saver.close()
+    saver.mark_dirty()  # after close: no new thread, written by the next flush
+    saver.flush()
+    assert saver.writes == 2 and saver.subscription._thread is None
+
+def test_close_during_the_interval_writes_once(tmp_path):
+    saver = BackgroundAutosave(HistoryBuffer, str(tmp_path / "c.csv"), interval=60)
+    saver.close()  # never started
+    saver = BackgroundAutosave(HistoryBuffer, str(tmp_path / "c.csv"), interval=60)
+    saver.mark_dirty()
+    time.sleep(0.02)  # let the writer start waiting out the interval
+    saver.close()
+    assert saver.writes == 1 and (tmp_path / "c.csv").read_text() == "operator,operands,result\n"
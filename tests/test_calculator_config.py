@@ -14,3 +14,82 @@ def test_config_validation(monkeypatch):
     monkeypatch.setenv("AUTOSAVE", "maybe")
     with pytest.raises(ConfigurationError):
         Config.load()
+
+def test_config_undo_limits(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE", "false")
+    monkeypatch.setenv("UNDO_MAX_DEPTH", "50")
+    monkeypatch.setenv("UNDO_MAX_BYTES", "")
+    cfg = Config.load()
+    assert cfg.undo_max_depth == 50 and cfg.undo_max_bytes is None
+    for bad in ("0", "many"):
+        monkeypatch.setenv("UNDO_MAX_BYTES", bad)
+        with pytest.raises(ConfigurationError):
+            Config.load()
+
+def test_config_autosave_mode(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE", "true")
+    monkeypatch.setenv("AUTOSAVE_MODE", "journal")
+    monkeypatch.setenv("JOURNAL_FSYNC", "periodic")
+    cfg = Config.load()
+    assert cfg.autosave_mode == "journal" and cfg.journal_fsync == "periodic"
+    assert cfg.journal_max_bytes == 1 << 20
+    monkeypatch.setenv("JOURNAL_FSYNC", "sometimes")
+    with pytest.raises(ConfigurationError):
+        Config.load()
+    monkeypatch.setenv("JOURNAL_FSYNC", "always")
+    monkeypatch.setenv("AUTOSAVE_MODE", "background")
+    monkeypatch.setenv("AUTOSAVE_INTERVAL_MS", "50")
+    cfg = Config.load()
+    assert cfg.autosave_mode == "background" and cfg.autosave_interval_ms == 50
+    monkeypatch.setenv("AUTOSAVE_INTERVAL_MS", "soon")
+    with pytest.raises(ConfigurationError):
+        Config.load()
+    monkeypatch.setenv("AUTOSAVE_MODE", "cloud")
+    with pytest.raises(ConfigurationError):
+        Config.load()
+
+def test_config_cache_size(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE", "true")
+    monkeypatch.delenv("CACHE_SIZE", raising=False)
+    assert Config.load().cache_size == 0
+    monkeypatch.setenv("CACHE_SIZE", "256")
+    assert Config.load().cache_size == 256
+    for bad in ("-1", "lots"):
+        monkeypatch.setenv("CACHE_SIZE", bad)
+        with pytest.raises(ConfigurationError):
+            Config.load()
+
+def test_config_metrics_toggle(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE", "true")
+    monkeypatch.delenv("METRICS", raising=False)
+    assert Config.load().metrics is True
+    monkeypatch.setenv("METRICS", "false")
+    assert Config.load().metrics is False
+    monkeypatch.setenv("METRICS", "sometimes")
+    with pytest.raises(ConfigurationError):
+        Config.load()
+
+def test_config_history_backend(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE", "true")
+    monkeypatch.delenv("HISTORY_BACKEND", raising=False)
+    monkeypatch.delenv("HISTORY_DB", raising=False)
+    cfg = Config.load()
+    assert (cfg.history_backend, cfg.history_db) == ("csv", "history.sqlite3")
+    monkeypatch.setenv("HISTORY_BACKEND", "SQLite")
+    monkeypatch.setenv("HISTORY_DB", "calc.db")
+    cfg = Config.load()
+    assert (cfg.history_backend, cfg.history_db) == ("sqlite", "calc.db")
+    monkeypatch.setenv("HISTORY_BACKEND", "redis")
+    with pytest.raises(ConfigurationError):
+        Config.load()
+
+def test_dotenv_is_read_on_first_load(monkeypatch):
+    import dotenv
+    import app.calculator_config as config_module
+    calls = []
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda: calls.append(1))
+    monkeypatch.setattr(config_module, "_dotenv_loaded", False)
+    monkeypatch.setenv("AUTOSAVE", "true")
+    Config.load()
+    Config.load()
+    assert calls == [1]
@@ -15,3 +15,20 @@ def test_memento_roundtrip_and_stacks():
     cur = HistoryMemento.from_df(pd.DataFrame())
     prev = ct.undo(cur)
     assert isinstance(prev, HistoryMemento)
+
+def test_caretaker_bounded_depth_and_bytes():
+    from app.calculator_memento import AppendDelta
+    ct = Caretaker(max_depth=3)
+    for i in range(5):
+        ct.push(AppendDelta.of(i, [("+", [i], float(i))]))
+    assert ct.undo_depth == 3
+    assert ct.undo().start == 4
+    assert ct.redo_depth == 1 and ct.redo().start == 4
+    ct = Caretaker(max_bytes=200)
+    for i in range(5):
+        ct.push(AppendDelta.of(i, [("+", [1.0, 2.0], 3.0)]))  # 80 bytes each
+    assert ct.undo_depth == 2 and ct.nbytes == 160
+    ct.undo(); ct.undo()
+    assert ct.nbytes == 0
+    with pytest.raises(UndoRedoError):
+        ct.undo()
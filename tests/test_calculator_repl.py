@@ -2,14 +2,351 @@
 import builtins, io, contextlib, pytest, os, tempfile
 from app.calculator_repl import CalculatorFacade
 from app.calculator_config import Config
+from app.history import History
 
 def test_facade_and_history(tmp_path):
     cfg = Config(history_csv=str(tmp_path / "h.csv"), autosave=True)
     facade = CalculatorFacade(cfg)
     res = facade.perform("+", ["1","2","3"])
     assert res == 6.0
+    assert facade.perform("/", [1.0, 2.0]) == 0.5  # numeric operands from embedding code
+    facade.history.undo()
     assert len(facade.history.df) == 1
     facade.history.undo()
     assert len(facade.history.df) == 0
     facade.history.redo()
     assert len(facade.history.df) == 1
+    facade.close()
+
+def test_handle_commands(tmp_path):
+    from app.calculator_repl import handle, HELP_TEXT
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    assert handle(facade, "*", ["2", "4"]) == "8.0"
+    assert "8.0" in handle(facade, "history", [])
+    assert handle(facade, "save", []) == "Saved."
+    assert handle(facade, "load", []).startswith("Usage")
+    assert handle(facade, "load", [str(tmp_path / "h.csv")]) == "Loaded."
+    assert handle(facade, "undo", []) == "Undone."
+    assert handle(facade, "redo", []) == "Redone."
+    assert handle(facade, "clear", []) == "Cleared."
+    assert handle(facade, "help", []) == HELP_TEXT
+    assert handle(facade, "frobnicate", []).startswith("Unknown")
+
+@pytest.mark.parametrize("defer", [False, True])
+def test_run_batch_streams_and_reports(tmp_path, defer):
+    from app.calculator_repl import run_batch
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=True))
+    lines = ["+ 1 2", "", "# comment", "/ 1 0", "* 2 3", "undo", "^ 2 10", "exit", "+ 9 9"]
+    out = io.StringIO()
+    stats = run_batch(facade, iter(lines), out, defer=defer)
+    assert out.getvalue().splitlines() == ["3.0", "Error: Division by zero", "6.0", "Undone.", "1024.0"]
+    assert stats["commands"] == 6 and stats["errors"] == 1 and stats["per_second"] > 0
+    assert facade.history.df["result"].tolist() == [3.0, 1024.0]
+    facade.close()
+
+@pytest.mark.parametrize("cache_size", [0, 8])
+def test_run_batch_reports_complex_results_and_bad_paths(tmp_path, cache_size):
+    from app.calculator_repl import run_batch
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False, cache_size=cache_size))
+    missing = tmp_path / "no" / "such"
+    lines = ["root 3 -8", "^ -8 0.5", "root 3 -8", f"save {missing / 'h.csv'}", f"load {missing / 'f.csv'}", "+ 1 2"]
+    out = io.StringIO()
+    stats = run_batch(facade, lines, out)
+    assert out.getvalue().splitlines() == [
+        "Error: Result is not a real number", "Error: Result is not a real number", "Error: Result is not a real number",
+        f"Error: Cannot save history to {missing / 'h.csv'}: No such file or directory",
+        f"Error: Cannot load history from {missing / 'f.csv'}: No such file or directory", "3.0"]
+    assert stats["errors"] == 5 and facade.history.rows() == [("+", [1.0, 2.0], 3.0)]
+    assert facade.failures == {"root": 2, "^": 1}
+
+def test_run_batch_defer_autosaves_once(tmp_path):
+    from app.calculator_repl import run_batch
+    import app.calculator_repl as repl
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    seen = []
+    facade.history.attach(lambda df: seen.append(len(df)))
+    out = io.StringIO()
+    old = repl.OUTPUT_CHUNK
+    repl.OUTPUT_CHUNK = 2
+    try:
+        run_batch(facade, [f"+ {i} 1" for i in range(4)], out, defer=True)
+    finally:
+        repl.OUTPUT_CHUNK = old
+    assert len(out.getvalue().splitlines()) == 4  # flushed in chunks, nothing left over
+    assert len(facade.history) == 4 and seen == [4]
+    facade.history.undo()
+    assert len(facade.history) == 3 and seen == [4, 3]
+
+def test_parse_cli_args():
+    from app.calculator_repl import _parse_args
+    opts = _parse_args(["--batch", "-", "--defer-autosave"])
+    assert opts.batch == "-" and opts.defer_autosave is True
+    assert _parse_args([]).batch is None
+
+def test_perform_many_records_successful_rows(tmp_path):
+    import numpy as np
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    batch = facade.perform_many("/", np.array([[8.0, 2.0], [1.0, 0.0], [9.0, 3.0]]))
+    assert batch.errors == {1: "Division by zero"}
+    assert facade.history.df["result"].tolist() == [4.0, 3.0]
+    assert facade.history.df["operands"].tolist() == [[8.0, 2.0], [9.0, 3.0]]
+    facade.perform_many("+", [[1, 2], [3]])
+    assert len(facade.history) == 4
+    facade.history.undo()  # one bulk change
+    assert len(facade.history) == 2
+    facade.perform_many("+", [[1, 2]], record=False)
+    facade.perform_many("/", np.array([[1.0, 0.0]]))  # nothing succeeded
+    assert len(facade.history) == 2
+    facade.perform_many("*", np.array([[1, 2], [3, 4]]).T)  # int, non-contiguous: stored as float64 rows
+    facade.history.undo()
+    facade.history.redo()
+    assert facade.history.rows(2) == [("*", [1.0, 3.0], 3.0), ("*", [2.0, 4.0], 8.0)]
+
+def test_perform_uses_result_cache(tmp_path):
+    from app.calculator_repl import handle
+    from app.exceptions import OperationError
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False, cache_size=8))
+    assert facade.perform("+", ["1", "2"]) == 3.0
+    assert facade.perform("+", ["1.0", "2"]) == 3.0  # hit on normalized operands
+    for _ in range(2):
+        with pytest.raises(OperationError):
+            facade.perform("/", ["1", "0"])
+    assert len(facade.history) == 2  # hits are still recorded, errors are not
+    assert facade.cache.stats()["hits"] == 2
+    assert "hits=2" in handle(facade, "cache", [])
+    assert handle(facade, "cache", ["clear"]) == "Cache cleared."
+    plain = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    assert plain.cache is None and "disabled" in handle(plain, "cache", [])
+
+def test_evaluate_expressions_and_compiled_cache(tmp_path):
+    from app.calculator_repl import handle
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    assert handle(facade, "2", ["^", "(3", "+", "4)", "/", "root", "2", "9"]) == str(128 / 3)
+    assert handle(facade, "eval", ["ans", "*", "3"]) == "128.0"
+    facade.perform("+", ["1", "1"])
+    assert facade.evaluate("ans * 3") == 6.0  # compiled once, reused
+    df = facade.history.df
+    assert df["operator"].tolist()[-2:] == ["+", "eval"] and df["operands"].tolist()[-1] == [2.0]
+    assert df["note"].fillna("").tolist()[-2:] == ["", "ans * 3"]
+    assert len(df) == 4  # one row per expression
+    assert facade.history.summary()["by_operator"]["eval"]["count"] == 3
+    shown = handle(facade, "history", ["--op", "eval"]).splitlines()
+    assert shown[-2].endswith("6.0  # ans * 3") and shown[-1] == "(3 of 4 row(s))"
+    out = tmp_path / "evals.csv"
+    handle(facade, "history", ["--out", str(out)])
+    assert out.read_text().splitlines()[0] == "operator,operands,result,note"
+    handle(facade, "load", [str(out)])
+    assert list(facade.history.select(operator="eval", notes=True))[-1] == (3, "eval", [2.0], 6.0, "ans * 3")
+    out = handle(facade, "cache", [])
+    assert "expressions: size=2/256 hits=1 misses=2" in out and "results: disabled" in out
+    assert handle(facade, "cache", ["clear"]) == "Cache cleared."
+
+def test_parallel_command(tmp_path):
+    from app.calculator_repl import handle, format_parallel, run_batch
+    from app.exceptions import ValidationError
+    from app.parallel import ParallelResult
+    src = tmp_path / "ops.txt"
+    src.write_text("+ 1 2\n/ 1 0\n* 3 3\n")
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    assert handle(facade, "parallel", []).startswith("Usage")
+    out = handle(facade, "parallel", [str(src), "1", "2"])
+    assert out.startswith("3 operations (1 errors)") and "line 2: Division by zero" in out
+    assert facade.history.df["result"].tolist() == [3.0, 9.0]
+    with pytest.raises(ValidationError, match="workers"):
+        handle(facade, "parallel", [str(src), "x", "100"])  # not silently 100 workers
+    out = io.StringIO()
+    stats = run_batch(facade, [f"parallel {tmp_path / 'nope.txt'}", "+ 1 1"], out)
+    assert stats["errors"] == 1 and out.getvalue().startswith(f"Error: Cannot read operations from {tmp_path / 'nope.txt'}")
+    assert out.getvalue().endswith("2.0\n")  # the batch went on
+    many = ParallelResult(operations=12, errors=[(i, "x") for i in range(12)], seconds=0.0, workers=1)
+    assert format_parallel(many).endswith("... 2 more")
+
+def test_startup_does_not_import_heavy_modules(tmp_path):
+    import subprocess, sys
+    code = ("import sys\n"
+            "from app.calculator_repl import CalculatorFacade\n"
+            "from app.calculator_config import Config\n"
+            "calc = CalculatorFacade(Config.load())\n"
+            "calc.perform('+', ['1', '2'])\n"
+            "print(sorted(m for m in ('numpy', 'pandas') if m in sys.modules))\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, HISTORY_CSV=str(tmp_path / "h.csv"), AUTOSAVE="true")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+    assert (tmp_path / "h.csv").read_text() == 'operator,operands,result\n+,"[1.0, 2.0]",3.0\n'
+
+def test_stats_command_reports_stage_latencies(tmp_path):
+    import json
+    from app.calculator_repl import handle
+    from app.exceptions import ValidationError
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=True))
+    handle(facade, "+", ["1", "2"])
+    handle(facade, "2", ["*", "ans"])
+    handle(facade, "undo", [])
+    handle(facade, "bogus", [])
+    snap = json.loads(handle(facade, "stats", ["json"]))
+    assert set(snap["+"]) == {"parse", "compute", "history", "total"}
+    assert set(snap["eval"]) == {"compile", "compute", "history"} and "total" in snap["expression"]
+    assert snap["history.add_record"]["autosave"]["count"] == 2
+    assert snap["history.undo"]["autosave"]["count"] == 1 and "unknown" in snap
+    assert "p99 us" in handle(facade, "stats", [])
+    assert handle(facade, "stats", ["json", str(tmp_path / "s.json")]).startswith("Exported")
+    assert json.loads((tmp_path / "s.json").read_text())["+"]["total"]["count"] == 1
+    with pytest.raises(ValidationError, match="Cannot write to"):
+        handle(facade, "stats", ["json", str(tmp_path / "no" / "s.json")])
+    assert handle(facade, "stats", ["reset"]) == "Stats reset."
+    off = CalculatorFacade(Config(history_csv="", autosave=False, metrics=False))
+    assert handle(off, "+", ["1", "2"]) == "3.0" and handle(off, "eval", ["ans", "+", "1"]) == "4.0"
+    assert handle(off, "stats", []).startswith("Metrics are disabled")
+
+def test_profile_command_wraps_next_commands(tmp_path):
+    from app.calculator_repl import handle
+    from app.exceptions import ValidationError
+    facade = CalculatorFacade(Config(history_csv="", autosave=False))
+    assert handle(facade, "profile", ["off"]) == "Profiling is off."
+    assert handle(facade, "profile", ["2"]) == "Profiling the next 2 command(s)."
+    assert handle(facade, "+", ["1", "2"]) == "3.0"
+    out = handle(facade, "*", ["2", "3"])
+    assert out.startswith("6.0\nProfile of 2 command(s):") and "perform" in out
+    assert facade.profiler is None
+    handle(facade, "profile", [])
+    with pytest.raises(ValidationError):
+        handle(facade, "+", ["x"])  # closes the window by failing
+    assert handle(facade, "+", ["1", "1"]).startswith("Profile of 1 command(s):")
+    handle(facade, "profile", ["5"])
+    assert handle(facade, "profile", ["stop"]) == "Profile of 0 command(s): nothing was run."
+
+def test_history_command_pages_filters_and_exports(tmp_path):
+    from app.calculator_repl import handle, run_batch, HISTORY_HEADER
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    for i in range(15):
+        facade.perform("+" if i % 3 else "*", [str(i), "2"])
+    lines = handle(facade, "history", ["2", "--offset", "4"]).splitlines()
+    assert lines == [HISTORY_HEADER, "      4  +        [4.0, 2.0]               6.0",
+                     "      5  +        [5.0, 2.0]               7.0", "(2 of 15 row(s))"]
+    assert len(handle(facade, "history", ["tail"]).splitlines()) == 12
+    assert handle(facade, "history", ["tail", "1", "--op", "*", "--max", "12"]).splitlines()[1].startswith("      6  *")
+    assert handle(facade, "history", ["--out", str(tmp_path / "x.csv"), "--op", "*"]) == f"Wrote 5 row(s) to {tmp_path / 'x.csv'}."
+    assert handle(facade, "load", [str(tmp_path / "x.csv")]) == "Loaded." and len(facade.history) == 5
+    out = io.StringIO()
+    stats = run_batch(facade, [f"history --out {tmp_path / 'no' / 'x.csv'}", "history 1"], out)
+    assert stats["errors"] == 1 and out.getvalue().startswith(f"Error: Cannot write to {tmp_path / 'no' / 'x.csv'}")
+    assert out.getvalue().endswith("(1 of 5 row(s))\n")  # the batch went on
+
+def test_history_command_streams_chunks(tmp_path, monkeypatch):
+    import app.calculator_repl as repl
+    monkeypatch.setattr(repl, "OUTPUT_CHUNK", 4)
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=False))
+    out = io.StringIO()
+    stats = repl.run_batch(facade, iter(["+ 1 1", "+ 2 2", "+ 3 3", "+ 4 4", "+ 5 5", "history"]), out)
+    lines = out.getvalue().splitlines()
+    assert lines[:5] == ["2.0", "4.0", "6.0", "8.0", "10.0"] and lines[5] == repl.HISTORY_HEADER
+    assert len(lines) == 12 and lines[-1] == "(5 of 5 row(s))" and stats["errors"] == 0
+    out = io.StringIO()
+    repl.run_batch(facade, iter(["history 1"]), out)
+    assert out.getvalue().splitlines()[-1] == "(1 of 5 row(s))"
+
+def test_perform_streamed_operands(tmp_path):
+    from app.calculator_repl import handle
+    from app.exceptions import ValidationError
+    facade = CalculatorFacade(Config(history_csv=str(tmp_path / "h.csv"), autosave=True))
+    (tmp_path / "v.txt").write_text("\n".join(str(i) for i in range(1, 1001)))
+    assert handle(facade, "+", [f"@{tmp_path / 'v.txt'}"]) == "500500.0"
+    assert list(facade.history.select(notes=True)) == [
+        (0, "stream", [], 500500.0, f"+ @{tmp_path / 'v.txt'} (1000 values)")]
+    assert facade.evaluate("ans / 2") == 250250.0
+    with pytest.raises(ValidationError):
+        facade.perform("+", ["@a", "@b"])
+    assert handle(facade, "*", [f"@{tmp_path / 'v.txt'}"]) == "inf"
+    assert facade.summary()["by_operator"]["stream"]["count"] == 2 and facade.recompute().skipped == 3
+    facade.close()
+    reopened = History(csv_path=str(tmp_path / "h.csv"))
+    assert [op for op, *_ in reopened.rows()] == ["stream", "eval", "stream"]
+    assert [note for *_, note in reopened.select(operator="stream", notes=True)][1].startswith("* @")
+
+@pytest.mark.parametrize("mode", ["background", "journal"])
+def test_facade_is_safe_for_concurrent_producers(tmp_path, mode):
+    import sys, threading
+    from app.calculator_repl import handle
+    path = str(tmp_path / "h.csv")
+    facade = CalculatorFacade(Config(history_csv=path, autosave=True, autosave_mode=mode,
+                                     autosave_interval_ms=1, cache_size=64))
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    start = threading.Barrier(8)
+
+    def work(t):
+        start.wait()
+        for i in range(150):
+            if i % 3 == 0:
+                assert facade.evaluate(f"{t} * 1000 + {i}") == t * 1000 + i
+            elif i % 3 == 1:
+                assert facade.perform("+", [str(t * 1000), str(i)]) == t * 1000 + i
+            else:
+                assert handle(facade, "+", ["0", "1"]) == "1.0"  # cached after the first call
+                assert handle(facade, "undo", []) == "Undone."
+
+    try:
+        threads = [threading.Thread(target=work, args=(t,)) for t in range(8)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    finally:
+        sys.setswitchinterval(interval)
+    rows = facade.history.rows()
+    assert len(rows) == 8 * 100  # every undo reverted exactly one (the latest) row
+    assert all(res == (sum(ops) if op == "+" else eval(note)) for _, op, ops, res, note
+               in facade.history.select(notes=True))  # no torn rows, notes still on their own rows
+    assert facade.cache.stats()["hits"] + facade.cache.stats()["misses"] >= 8 * 100
+    stats = facade.metrics.snapshot()["+"]
+    assert stats["parse"]["count"] == 8 * 100 and stats["total"]["count"] == 8 * 50  # no lost samples
+    facade.close()
+    assert History(csv_path=path, autosave_mode=mode).rows() == rows  # autosave recorded the final state
+
+def test_summary_command_reports_aggregates_and_error_rates(monkeypatch):
+    from app.calculator_repl import handle, SUMMARY_HEADER
+    import numpy as np
+    facade = CalculatorFacade(Config(history_csv="", autosave=False))
+    for cmd, args in (("+", ["1", "2"]), ("/", ["1", "0"]), ("/", ["9", "3"]), ("^", ["x"]), ("+", ["4", "4"])):
+        try:
+            handle(facade, cmd, args)
+        except Exception:
+            pass
+    facade.perform_many("/", np.array([[1.0, 0.0], [8.0, 2.0]]))
+    text = handle(facade, "summary", [])
+    lines = text.splitlines()
+    assert lines[:2] == ["All rows:", SUMMARY_HEADER]
+    assert lines[2].split() == ["+", "2", "11", "5.5", "3", "8", "0", "0", "(0.0%)"]
+    assert lines[3].split() == ["/", "2", "7", "3.5", "3", "4", "0", "2", "(50.0%)"]
+    assert lines[4].split() == ["^", "0", "0", "nan", "nan", "nan", "0", "1", "(100.0%)"]
+    assert lines[5].split()[:2] == ["all", "4"] and lines[5].endswith("3 (42.9%)")
+    window = handle(facade, "summary", ["last", "1"]).splitlines()
+    assert window[0] == "Last 1 row(s):" and window[2].split()[:3] == ["/", "1", "4"] and window[-1].endswith("-")
+    facade.evaluate("2 ^ 5")
+    assert facade.summary(top=1)["operators"] == 4 and len(facade.summary(top=1)["by_operator"]) == 1
+    assert handle(facade, "summary", []).count("\n") == 6
+    monkeypatch.setattr("app.calculator_repl.SUMMARY_TOP", 2)
+    assert handle(facade, "summary", []).splitlines()[-2] == "(2 more operator(s))"
+
+def test_summary_error_counts_follow_clear_load_and_undo(tmp_path):
+    from app.calculator_repl import handle
+    from app.exceptions import OperationError
+    facade = CalculatorFacade(Config(history_csv="", autosave=False))
+    facade.perform("+", ["1", "2"])
+    with pytest.raises(OperationError):
+        facade.perform("/", ["1", "0"])
+    handle(facade, "save", [str(tmp_path / "a.csv")])
+    handle(facade, "clear", [])
+    summary = facade.summary()
+    assert summary["all"]["errors"] == 0 and summary["by_operator"] == {}
+    handle(facade, "undo", [])
+    assert facade.summary()["by_operator"]["/"]["errors"] == 1 and facade.failures == {"/": 1}
+    handle(facade, "redo", [])
+    assert facade.failures == {}
+    handle(facade, "load", [str(tmp_path / "a.csv")])
+    assert facade.failures == {} and facade.summary()["all"]["error_rate"] == 0.0
+    with pytest.raises(OperationError):
+        facade.perform("/", ["2", "0"])
+    handle(facade, "undo", [])  # back to before the load: the cleared state, no failures
+    assert facade.failures == {}
@@ -0,0 +1,116 @@
+import threading, pytest
+from app.events import EventBus, HistoryEvent, Subscription
+from app.exceptions import ConfigurationError
+from app.history import History
+from app.metrics import Metrics
+
+def _gated(seen):
+    """A callback that holds its first event until `gate` is set."""
+    gate, entered = threading.Event(), threading.Event()
+
+    def callback(event):
+        entered.set()
+        gate.wait(5)
+        seen.append(event)
+    return callback, gate, entered
+
+def test_subscription_rejects_bad_settings():
+    with pytest.raises(ConfigurationError, match="overflow policy"):
+        Subscription(print, policy="spill")
+    with pytest.raises(ConfigurationError, match="at least 1"):
+        Subscription(print, maxsize=0)
+
+def test_drop_and_coalesce_overflow_policies():
+    for policy, expected in (("drop", [0, 1, 2]), ("coalesce", [0, 1, 5])):
+        seen = []
+        callback, gate, entered = _gated(seen)
+        sub = Subscription(callback, maxsize=2, policy=policy)
+        sub.publish(0)
+        entered.wait(5)  # 0 is in flight, so 1 and 2 fill the queue
+        results = [sub.publish(i) for i in range(1, 6)]
+        gate.set()
+        assert sub.flush(timeout=5) and seen == expected and sub.delivered == 3
+        assert results == ([True, True, False, False, False] if policy == "drop" else [True] * 5)
+        assert (sub.dropped, sub.coalesced) == ((3, 0) if policy == "drop" else (0, 3))
+        sub.close()
+        assert not sub.publish(9) and sub._thread is None
+
+def test_block_policy_applies_backpressure():
+    seen = []
+    callback, gate, entered = _gated(seen)
+    sub = Subscription(callback, maxsize=1)
+    sub.publish(0)
+    entered.wait(5)
+    sub.publish(1)
+    producer = threading.Thread(target=sub.publish, args=(2,))
+    producer.start()
+    producer.join(0.05)
+    assert producer.is_alive()  # waits for room in the queue
+    gate.set()
+    producer.join(5)
+    sub.flush()
+    assert seen == [0, 1, 2]
+    blocked = threading.Thread(target=sub.publish, args=(3,))
+    gate.clear()
+    sub.publish(4)
+    entered.wait(5)
+    sub.publish(5)
+    blocked.start()
+    blocked.join(0.05)
+    threading.Timer(0.05, gate.set).start()
+    sub.close(drain=False)  # releases the blocked producer, discards the queue
+    blocked.join(5)
+    assert seen == [0, 1, 2, 4] and sub.dropped == 1
+
+def test_callback_may_publish_to_its_own_full_queue():
+    seen = []
+    sub = Subscription(lambda e: (seen.append(e), e == 0 and [sub.publish(i) for i in (1, 2, 3)]), maxsize=1)
+    sub.publish(0)
+    sub.flush(timeout=5)
+    assert seen == [0, 1, 2, 3]
+    sub.close()
+
+def test_flush_reraises_the_first_callback_error_and_keeps_delivering():
+    seen = []
+
+    def callback(event):
+        if event < 2:
+            raise ValueError(f"bad {event}")
+        seen.append(event)
+    bus = EventBus()
+    sub = bus.subscribe(callback, name="events-test")
+    other = bus.subscribe(seen.append)
+    assert bool(bus) and len(bus) == 2
+    for i in range(3):
+        bus.publish(i)
+    with pytest.raises(ValueError, match="bad 0"):
+        bus.flush()
+    assert sub.flush() and sub.delivered == 3 and sorted(seen) == [0, 1, 2, 2]
+    bus.unsubscribe(other)
+    bus.publish(1)
+    with pytest.raises(ValueError, match="bad 1"):
+        bus.close()
+    assert not bus and other._thread is None
+
+def test_history_publishes_change_events(tmp_path):
+    h = History(csv_path=str(tmp_path / "e.csv"), autosave=False)
+    h.metrics = Metrics()
+    events = []
+    sub = h.subscribe(events.append, policy="coalesce")
+    h.add_record("+", [1, 2], 3.0)
+    with h.deferred():
+        h.add_record("*", [2, 3], 6.0)
+        h.add_record("*", [2, 4], 8.0)
+    h.undo()
+    h.clear()
+    h.undo()
+    h.redo()
+    h.events.flush()
+    assert [(e.op, e.length, e.reverse) for e in events] == [
+        ("add_record", 1, False), ("deferred", 3, False), ("undo", 2, True), ("clear", 0, False),
+        ("undo", 2, True), ("redo", 0, False)]
+    assert [e.version for e in events] == sorted(e.version for e in events) and events[-1].version == h.version
+    assert list(events[1].change.operators) == ["*", "*"] and isinstance(events[0], HistoryEvent)
+    assert "publish" in h.metrics.snapshot()["history.add_record"]
+    h.close()
+    assert sub._thread is None and not h.events
@@ -0,0 +1,45 @@
+import pytest
+from app.expression import compile_expression, looks_like_expression, tokenize
+from app.exceptions import OperationError, ValidationError
+
+@pytest.mark.parametrize("source,expected", [
+    ("2 ^ (3 + 4) / root 2 9", 128 / 3),
+    ("1 + 2 * 3", 7.0),
+    ("(1 + 2) * 3", 9.0),
+    ("10 - 4 - 3", 3.0),
+    ("2 ^ 3 ^ 2", 512.0),
+    ("-2 ^ 2", -4.0),
+    ("2 ^ -1", 0.5),
+    ("root 3 8 * -1", -2.0),
+    (".5e1 + 1.", 6.0),
+])
+def test_compile_and_run(source, expected):
+    assert compile_expression(source).run() == pytest.approx(expected)
+
+def test_constant_folding_and_variables():
+    folded = compile_expression("2 ^ (3 + 4) / root 2 9")
+    assert folded.code == (("const", pytest.approx(128 / 3)),)
+    with_ans = compile_expression("ans * (2 ^ 10) - -ans")
+    assert ("const", 1024.0) in with_ans.code and with_ans.names == ("ans",)
+    assert with_ans.run({"ans": 2.0}) == 2050.0
+    with pytest.raises(ValidationError):
+        with_ans.run({"ans": None})
+
+def test_runtime_errors_are_not_folded_away():
+    compiled = compile_expression("1 + 1 / 0")
+    with pytest.raises(OperationError, match="Division by zero"):
+        compiled.run()
+    with pytest.raises(OperationError, match="not a real number"):
+        compile_expression("root 3 (-8)").run()
+    with pytest.raises(OperationError):
+        compile_expression("0 ^ -1").run()
+
+@pytest.mark.parametrize("source", ["", "1 +", "(1 + 2", "(1 2)", "1 2", "* 3", "1 $ 2", "root 2"])
+def test_syntax_errors(source):
+    with pytest.raises(ValidationError):
+        compile_expression(source)
+
+def test_tokenize_and_detection():
+    assert [t for t, _ in tokenize("root(2)+ans")] == ["root", "(", "2", ")", "+", "ans"]
+    assert looks_like_expression("2^3") and looks_like_expression("(1") and looks_like_expression("-5")
+    assert looks_like_expression("ans*2") and not looks_like_expression("history")
@@ -1,7 +1,7 @@
 
 import os, pandas as pd, pytest, tempfile
 from app.history import History
-from app.exceptions import ValidationError
+from app.exceptions import ValidationError, UndoRedoError
 from app.calculator_memento import HistoryMemento
 
 def test_history_add_clear_undo_redo(tmp_path):
@@ -35,3 +35,254 @@ def test_history_validation(tmp_path):
         h.add_record(None, [1], 1.0)
     with pytest.raises(ValidationError):
         h.save("")  # no configured path
+    h.close()  # no autosave resources to release
+
+def test_history_df_is_lazy_view(tmp_path):
+    from app.history import HistoryBuffer
+    h = History(csv_path=str(tmp_path / "y.csv"), autosave=False)
+    for i in range(5):
+        h.add_record("+", [i, 1], i + 1.0)
+    assert len(h) == 5
+    df = h.df
+    assert df is h.df  # cached until the next mutation
+    assert list(df.columns) == ["operator", "operands", "result"]
+    assert df["result"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    h.add_record("-", [3, 1], 2.0)
+    assert h.df is not df and len(h.df) == 6
+    buf = HistoryBuffer.from_frame(h.df)
+    assert len(buf) == 6 and buf.operands[-1] == [3, 1]
+    buf.clear()
+    assert len(buf) == 0
+    h.df = pd.DataFrame({"operator": ["^"], "operands": [[2, 3]], "result": [8.0]})
+    assert len(h) == 1 and h.df["operator"].tolist() == ["^"]
+
+def test_history_delta_undo_redo_across_clear_and_load(tmp_path):
+    csv = tmp_path / "d.csv"
+    h = History(csv_path=str(csv), autosave=False)
+    h.add_record("+", [1, 2], 3.0)
+    h.add_record("*", [2, 3], 6.0)
+    h.save()
+    h.clear()
+    assert len(h) == 0
+    h.undo()
+    assert h.df["result"].tolist() == [3.0, 6.0]
+    h.redo()
+    assert len(h) == 0
+    h.load(str(csv))
+    assert len(h) == 2
+    h.undo()
+    assert len(h) == 0
+    h.undo()
+    h.add_record("-", [5, 1], 4.0)  # new change drops the redo branch
+    assert h.df["result"].tolist() == [3.0, 6.0, 4.0]
+    assert h.caretaker.redo_depth == 0
+
+def test_history_undo_depth_limit(tmp_path):
+    h = History(autosave=False, max_undo=2)
+    for i in range(4):
+        h.add_record("+", [i], float(i))
+    h.undo(); h.undo()
+    with pytest.raises(UndoRedoError):
+        h.undo()
+    assert h.df["result"].tolist() == [0.0, 1.0]
+
+def test_history_add_records_bulk():
+    h = History(autosave=False)
+    h.add_records([])
+    h.add_records([("+", [1, 2], 3.0), ("*", [2, 2], 4.0)])
+    assert h.df["result"].tolist() == [3.0, 4.0]
+    h.flush()  # nothing to write without storage
+    with pytest.raises(ValidationError):
+        h.add_records([(None, [1], 1.0)])
+    with h.deferred():
+        h.add_records([("-", [3, 1], 2.0)])
+        h.add_records([("-", [5, 1], 4.0)])
+    h.undo()
+    assert h.df["result"].tolist() == [3.0, 4.0, 2.0]
+
+def test_history_loads_csv_on_first_use(tmp_path):
+    csv = tmp_path / "lazy.csv"
+    csv.write_text('operator,operands,result\n+,"[1.0, 2.0]",3.0\n')
+    h = History(csv_path=str(csv), autosave=True)
+    assert h._loaded is False
+    h.add_record("*", [2, 3], 6.0)  # appends after the rows already on disk
+    assert len(h) == 2 and h.rows()[0] == ("+", [1.0, 2.0], 3.0)
+    h.undo()
+    h.undo()  # the initial load is undoable, as before
+    assert len(h) == 0
+    h.redo()
+    assert h.rows() == [("+", [1.0, 2.0], 3.0)]  # checkpoint copies keep the loaded operands intact
+    h.flush()  # autosave writes on its own thread
+    assert History(csv_path=str(csv), autosave=False).rows() == h.rows()
+
+def test_history_csv_matches_pandas(tmp_path):
+    import io, math
+    from app.history import HistoryBuffer
+    buf = HistoryBuffer()
+    for ops, res in (([1, 2.5], 3.5), ([0.1, 0.2], 0.1 + 0.2), ((1e16,), 1e16), ([], math.nan),
+                     ([2, 1e300], math.inf), ([-0.0], -0.0)):
+        buf.append("+", ops, res)
+    buf.extend_columns(["2 ^ ans"], ["[3.0]"], [8.0])  # operands as read back from CSV
+    out = io.StringIO()
+    buf.write_csv(out)
+    assert out.getvalue() == buf.to_frame().assign(
+        operands=lambda d: d["operands"].map(lambda o: o if isinstance(o, str) else str(list(o)))
+    ).to_csv(index=False)
+    path = tmp_path / "b.csv"
+    path.write_text(out.getvalue())
+    back = HistoryBuffer.read_csv(str(path))
+    expected = pd.read_csv(path, float_precision="round_trip")  # stdlib float() is exact
+    assert back.operators == expected["operator"].tolist()
+    assert [str(ops) for ops in back.operands] == expected["operands"].tolist()
+    assert [repr(x) for x in back.results] == [repr(x) for x in expected["result"].tolist()]
+
+def test_history_notes_follow_rows(tmp_path):
+    import io
+    from app.history import HistoryBuffer
+    h = History(autosave=False)
+    h.add_record("+", [1, 2], 3.0)
+    assert not h.has_notes()
+    h.add_record("eval", [3.0], 9.0, note="ans ^ 2")
+    with h.deferred():
+        h.add_columns(["eval", "*"], [[], [2, 2]], [1.0, 4.0], notes={0: "2 - 1"})
+        h.add_record("eval", [], 5.0, note="2 + 3")
+    h.undo()  # per record: the deferred "2 + 3" row goes, its note with it
+    assert list(h.select(notes=True))[1:] == [(1, "eval", [3.0], 9.0, "ans ^ 2"), (2, "eval", [], 1.0, "2 - 1"),
+                                            (3, "*", [2.0, 2.0], 4.0, None)]
+    h.undo()
+    h.redo()
+    h.clear()
+    h.undo()
+    assert h._buffer.notes == {1: "ans ^ 2", 2: "2 - 1"} and h.has_notes()
+    buf = h._buffer.copy()
+    buf.truncate(2)  # removes as many rows as there are notes, so scans the notes (undo walked the rows)
+    assert buf.notes == {1: "ans ^ 2"} and buf.notes_from(1) == {0: "ans ^ 2"}
+    out = io.StringIO()
+    h._buffer.write_csv(out)
+    assert out.getvalue().splitlines()[:3] == ["operator,operands,result,note", '+,"[1.0, 2.0]",3.0,',
+                                               "eval,[3.0],9.0,ans ^ 2"]
+    assert out.getvalue() == h.df.to_csv(index=False)
+    path = tmp_path / "notes.csv"
+    path.write_text(out.getvalue())
+    back = HistoryBuffer.read_csv(str(path))
+    assert back.notes == h._buffer.notes and back.rows() == h.rows()
+    assert HistoryBuffer.from_frame(h.df).notes == h._buffer.notes
+    h.df = h.df.drop(columns="note")
+    assert not h.has_notes()
+
+def test_history_reads_csv_with_other_column_order(tmp_path):
+    from app.history import HistoryBuffer
+    path = tmp_path / "cols.csv"
+    path.write_text('result,operator\n3.0,+\n,-\n')
+    buf = HistoryBuffer.read_csv(str(path))
+    assert buf.operators == ["+", "-"] and buf.operands == [[], []] and buf.results[0] == 3.0
+    assert buf.copy().operands == [[], []]
+
+def test_history_times_journal_and_notify_stages(tmp_path):
+    from app.metrics import Metrics
+    h = History(csv_path=str(tmp_path / "m.csv"), autosave=True, autosave_mode="journal")
+    h.attach(lambda df: None)
+    h.add_record("+", [1, 2], 3.0)  # untimed until metrics are attached
+    h.metrics = Metrics()
+    h.add_record("+", [1, 2], 3.0)
+    h.clear()
+    snap = h.metrics.snapshot()
+    assert set(snap["history.add_record"]) == {"journal", "notify"} and "journal" in snap["history.clear"]
+    h.close()
+
+def test_history_select_pages_and_filters(tmp_path):
+    h = History(autosave=False)
+    h.add_columns(["+", "*"] * 5, [[i, 1] for i in range(10)], [float(i) for i in range(10)])
+    pick = lambda **kw: [row[0] for row in h.select(**kw)]
+    assert pick() == list(range(10)) and pick(limit=3, offset=8) == [8, 9]
+    assert pick(tail=True, limit=3) == [7, 8, 9] and pick(tail=True, limit=2, offset=9) == [0]
+    assert pick(operator="*", offset=1, limit=2) == [3, 5] and pick(operator="-") == []
+    assert pick(min_result=2, max_result=6, offset=1, limit=2) == [3, 4]
+    assert pick(operator="+", min_result=4, tail=True, limit=2) == [6, 8]
+    assert pick(tail=True, max_result=1) == [0, 1] and pick(tail=True, offset=20) == []
+    assert next(h.select(operator="*")) == (1, "*", [1, 1], 1.0)
+
+def test_history_select_stops_at_rows_undone_meanwhile():
+    h = History(autosave=False)
+    h.add_columns(["+"] * 600, [[i, 0] for i in range(600)], [float(i) for i in range(600)])
+    h.add_columns(["-"] * 100, [[1, 1]] * 100, [0.0] * 100)
+    for kw in ({}, {"min_result": 0}):
+        rows = h.select(**kw)
+        assert next(rows) == (0, "+", [0.0, 0.0], 0.0)
+        h.undo()  # drops rows 600..699 while the generator is paused
+        assert [row[0] for row in rows] == list(range(1, 600))
+        h.redo()
+
+def test_history_operator_index_tracks_changes(tmp_path):
+    h = History(autosave=False)
+    h.add_record("+", [1, 2], 3.0)
+    assert h._buffer.operator_index() == {"+": [0]}
+    h.add_record("-", [5, 1], 4.0)
+    h.add_columns(["+", "+"], [[1, 1], [2, 2]], [2.0, 4.0])
+    assert h._buffer.operator_index() == {"+": [0, 2, 3], "-": [1]}
+    h.undo()
+    h.undo()
+    assert h._buffer.operator_index() == {"+": [0]}
+    h.redo()
+    assert [row[0] for row in h.select(operator="-")] == [1]
+    h.clear()
+    assert list(h.select(operator="+")) == []
+    h.undo()
+    assert [row[0] for row in h.select(operator="+")] == [0]  # rebuilt after the restore
+
+def test_history_operator_index_on_mapped_file(tmp_path):
+    path = str(tmp_path / "i.hcol")
+    h = History(autosave=False)
+    h.add_columns(["root", "+", "root"], [[2, 9], [1, 1], [3, 8]], [3.0, 2.0, 2.0])
+    h.save(path)
+    mapped = History(csv_path=path, autosave=False)
+    assert len(mapped) == 3
+    assert [row[0] for row in mapped.select(operator="root")] == [0, 2]
+    mapped.add_record("+", [2, 2], 4.0)  # decodes the views, keeps the index
+    assert mapped._buffer.operator_index() == {"root": [0, 2], "+": [1, 3]}
+
+def test_history_concurrent_appends_undo_and_select():
+    import sys, threading
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        h = History(autosave=False)
+        seen = []
+        h.attach(lambda df: seen.append(len(df)))
+        start = threading.Barrier(9)
+
+        def produce(t):
+            start.wait()
+            with h.deferred():
+                for i in range(200):
+                    h.add_record("+" if i % 2 else "*", [t, i], float(t * 1000 + i))
+
+        def page():
+            start.wait()
+            for _ in range(50):
+                for i, op, ops, res in h.select(min_result=0, tail=True, limit=5):
+                    assert res == ops[0] * 1000 + ops[1] and op == ("+" if ops[1] % 2 else "*")
+
+        threads = [threading.Thread(target=produce, args=(t,)) for t in range(8)] + [threading.Thread(target=page)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        assert len(h) == 1600 and h.caretaker.undo_depth == 1600
+        assert sorted(res for _, _, res in h.rows()) == sorted(t * 1000.0 + i for t in range(8) for i in range(200))
+        assert seen and seen[-1] == 1600  # one deferred change once the last block ended
+
+        def churn():
+            start.wait()
+            for _ in range(100):
+                h.add_record("-", [1, 1], 0.0)
+                h.undo()  # reverts the latest change in lock order, never a row from `produce`
+
+        threads = [threading.Thread(target=churn) for _ in range(9)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        assert len(h) == 1600 and "-" not in h._buffer.operator_index()
+    finally:
+        sys.setswitchinterval(interval)
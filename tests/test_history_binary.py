@@ -0,0 +1,107 @@
+import math, pytest
+from app.history import History, HistoryBuffer
+from app.history_binary import OperandColumn, parse_operands
+from app.exceptions import ValidationError
+
+def _sample():
+    buf = HistoryBuffer()
+    buf.append("+", [1.0, 2.5], 3.5)
+    buf.append("root", [2.0, 9.0], 3.0)
+    buf.append("eval", [], math.inf, note="2 ^ ans")
+    buf.append("+", [0.1, -0.0, 1e300], math.nan)
+    buf.extend_columns(["*"], ["[2.0, 4.0]"], [8.0])  # string operands, as read from CSV
+    return buf
+
+def test_binary_round_trips_csv_losslessly(tmp_path):
+    csv_a, hcol, csv_b = tmp_path / "a.csv", tmp_path / "h.hcol", tmp_path / "b.csv"
+    _sample().write_file(str(csv_a))
+    HistoryBuffer.read_file(str(csv_a)).write_file(str(hcol))
+    mapped = HistoryBuffer.read_file(str(hcol))
+    assert isinstance(mapped.operands, OperandColumn)
+    mapped.write_file(str(csv_b))
+    assert csv_b.read_text() == csv_a.read_text()
+    assert mapped.rows(4) == [("*", [2.0, 4.0], 8.0)] and mapped.operands[3] == [0.1, -0.0, 1e300]
+    assert math.isnan(mapped.results[-2]) and math.copysign(1.0, mapped.operands[3][1]) < 0
+    assert mapped.notes == {2: "2 ^ ans"} and mapped.copy().notes == mapped.notes
+    decoded = mapped.copy()
+    decoded.extend_columns([], [], [])  # decodes the views into lists
+    assert decoded.operands == [list(ops) for ops in mapped.operands] and decoded.nbytes() == mapped.nbytes()
+
+def test_mapped_views_index_and_slice(tmp_path):
+    path = str(tmp_path / "v.hcol")
+    buf = HistoryBuffer()
+    for i in range(10_000):
+        buf.append("+" if i % 2 else "-", [float(i)] * (i % 3), float(i))
+    buf.write_file(path)
+    view = HistoryBuffer.read_binary(path)
+    assert len(view) == 10_000 and list(view) == list(buf)
+    assert view.operators[-1] == "+" and view.operands[5] == [5.0, 5.0]
+    assert view.results[::5000] == [0.0, 5000.0] and view.operands[7:3] == []
+    with pytest.raises(IndexError):
+        view.results[10_000]
+    copy = view.copy()
+    assert copy.operands is view.operands  # shared read-only columns
+    copy.truncate(2)
+    assert len(copy) == 2 and len(view) == 10_000
+    copy.write_file(path)  # rename over the mapped file; `view` keeps its contents
+    assert len(HistoryBuffer.read_file(path)) == 2 and view.results[9_999] == 9_999.0
+    view.write_file(path)  # straight from the mapped arrays
+    assert list(HistoryBuffer.read_file(path)) == list(buf)
+
+def test_history_save_load_by_extension(tmp_path):
+    hcol = str(tmp_path / "h.hcol")
+    h = History(csv_path=str(tmp_path / "h.csv"), autosave=True)
+    h.add_record("+", [1, 2], 3.0)
+    h.add_record("*", [2, 3], 6.0)
+    h.save(hcol)
+    h.clear()
+    h.load(hcol)
+    assert h.rows() == [("+", [1.0, 2.0], 3.0), ("*", [2.0, 3.0], 6.0)]
+    h.add_record("-", [5, 1], 4.0)  # mapped rows become editable lists
+    h.undo()
+    h.undo()
+    assert len(h) == 0  # undo of the load
+    auto = History(csv_path=hcol, autosave=True)
+    assert len(auto) == 2
+    auto.add_record("/", [8, 2], 4.0)
+    auto.flush()
+    assert HistoryBuffer.read_file(hcol).rows(2) == [("/", [8.0, 2.0], 4.0)]
+
+def test_journal_compacts_into_binary_snapshot(tmp_path):
+    hcol = str(tmp_path / "j.hcol")
+    h = History(csv_path=hcol, autosave=True, autosave_mode="journal")
+    h.add_record("+", [1, 2], 3.0)
+    h.save()
+    h.close()
+    assert HistoryBuffer.read_binary(hcol).rows() == [("+", [1.0, 2.0], 3.0)]
+    h2 = History(csv_path=hcol, autosave=True, autosave_mode="journal")
+    h2.add_record("^", [2, 3], 8.0)
+    h2.close()
+    assert len(History(csv_path=hcol, autosave=True, autosave_mode="journal")) == 2
+
+def test_write_file_leaves_no_partial_file(tmp_path, monkeypatch):
+    path = tmp_path / "keep.csv"
+    path.write_text("old")
+    buf = _sample()
+    monkeypatch.setattr(HistoryBuffer, "write_csv", lambda self, fh: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        buf.write_file(str(path))
+    assert path.read_text() == "old" and [p.name for p in tmp_path.iterdir()] == ["keep.csv"]
+    with pytest.raises(OSError):
+        HistoryBuffer().write_file(str(tmp_path / "missing" / "h.hcol"))
+
+def test_binary_rejects_bad_files(tmp_path):
+    short, bad, cut = tmp_path / "s.hcol", tmp_path / "b.hcol", tmp_path / "c.hcol"
+    short.write_bytes(b"CALC")
+    bad.write_bytes(b"X" * 64)
+    _sample().write_file(str(cut))
+    cut.write_bytes(cut.read_bytes()[:-8])
+    for path in (short, bad, cut):
+        with pytest.raises(ValidationError):
+            HistoryBuffer.read_file(str(path))
+
+def test_parse_operands():
+    assert parse_operands("[1, 2.5, nan, -inf]")[:2] == [1.0, 2.5]
+    assert parse_operands("(3.0,)") == [3.0] and parse_operands("") == [] and parse_operands((1, 2)) == [1.0, 2.0]
+    with pytest.raises(ValidationError):
+        parse_operands("[a, b]")
@@ -0,0 +1,114 @@
+import json, os, pytest
+from app.history import History
+from app.history_journal import HistoryJournal
+from app.exceptions import ConfigurationError
+
+def _open(csv, **kw):
+    return History(csv_path=str(csv), autosave=True, autosave_mode="journal", **kw)
+
+def test_journal_rebuilds_state_after_restart(tmp_path):
+    csv = tmp_path / "h.csv"
+    h = _open(csv)
+    h.add_record("+", [1, 2], 3.0)
+    h.add_record("*", [2, 3], 6.0)
+    h.add_record("-", [5, 1], 4.0)
+    h.undo()
+    h.redo()
+    h.undo()
+    h.close()
+    assert not csv.exists()  # nothing but the journal written so far
+    lines = (tmp_path / "h.csv.journal").read_text().splitlines()
+    assert [json.loads(l)["op"] for l in lines] == ["add", "add", "add", "truncate", "add", "truncate"]
+    h2 = _open(csv)
+    assert h2.df["result"].tolist() == [3.0, 6.0]
+    h2.clear()
+    h2.undo()
+    h2.close()
+    assert _open(csv).df["result"].tolist() == [3.0, 6.0]
+
+def test_journal_replays_row_notes(tmp_path):
+    csv = tmp_path / "h.csv"
+    h = _open(csv)
+    h.add_record("eval", [2.0], 4.0, note="ans * 2")
+    h.add_record("+", [1, 2], 3.0)
+    h.clear()
+    h.undo()  # a replace record carrying the notes
+    h.close()
+    ops = [json.loads(l) for l in (tmp_path / "h.csv.journal").read_text().splitlines()]
+    assert ops[0]["notes"] == {"0": "ans * 2"} and "notes" not in ops[1] and ops[3]["notes"] == {"0": "ans * 2"}
+    h2 = _open(csv)
+    assert list(h2.select(notes=True)) == [(0, "eval", [2.0], 4.0, "ans * 2"), (1, "+", [1.0, 2.0], 3.0, None)]
+    h2.close()
+
+def test_journal_save_and_load_compact(tmp_path):
+    csv = tmp_path / "h.csv"
+    other = tmp_path / "other.csv"
+    h = _open(csv)
+    h.add_record("+", [1, 2], 3.0)
+    h.save(str(other))
+    h.save()  # compacts into the snapshot
+    assert csv.exists() and (tmp_path / "h.csv.journal").read_text() == ""
+    h.add_record("^", [2, 3], 8.0)
+    h.load(str(other))
+    h.close()
+    h2 = _open(csv)
+    assert h2.df["result"].tolist() == [3.0]
+    h2.close()
+
+def test_journal_background_compaction(tmp_path):
+    csv = tmp_path / "h.csv"
+    h = _open(csv, journal_max_bytes=200, journal_fsync="never")
+    for i in range(50):
+        h.add_record("+", [i, 1], i + 1.0)
+    h.close()
+    assert csv.exists()
+    assert os.path.getsize(tmp_path / "h.csv.journal") <= 200
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("h.csv.journal.")]
+    h2 = _open(csv)
+    assert h2.df["result"].tolist() == [i + 1.0 for i in range(50)]
+    h2.close()
+
+def test_journal_recovers_from_crash_leftovers(tmp_path):
+    csv = tmp_path / "h.csv"
+    h = _open(csv, journal_fsync="periodic")
+    h.add_record("+", [1, 1], 2.0)
+    h.add_record("+", [2, 2], 4.0)
+    h.close()
+    # simulate a crash after rotation, before the snapshot committed,
+    # and a torn final write in the live journal
+    os.replace(tmp_path / "h.csv.journal", tmp_path / "h.csv.journal.1")
+    with open(tmp_path / "h.csv.journal", "w") as fh:
+        fh.write(json.dumps({"op": "add", "i": 2, "rows": [["*", [3, 3], 9.0]]}) + "\n")
+        fh.write('{"op": "add", "i"')
+    h2 = _open(csv)
+    assert h2.df["result"].tolist() == [2.0, 4.0, 9.0]
+    h2.close()
+    assert not (tmp_path / "h.csv.journal.1").exists()
+    # crash after the commit point: the commit file names folded segments
+    h3 = _open(csv)
+    h3.add_record("/", [8, 2], 4.0)
+    h3.close()
+    journal = HistoryJournal(str(csv))
+    os.replace(tmp_path / "h.csv.journal", tmp_path / "h.csv.journal.1")
+    h3.df.to_csv(str(csv) + ".tmp", index=False)
+    (tmp_path / "h.csv.journal.commit").write_text(json.dumps([journal.path + ".1"]))
+    h4 = _open(csv)
+    assert h4.df["result"].tolist() == [2.0, 4.0, 9.0, 4.0]
+    h4.close()
+
+def test_journal_rejects_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ConfigurationError):
+        HistoryJournal(str(tmp_path / "h.csv"), fsync="sometimes")
+
+def test_journal_commit_file_after_replace_and_idempotent_close(tmp_path):
+    csv = tmp_path / "h.csv"
+    journal = HistoryJournal(str(csv))
+    # the CSV was already replaced and the segment removed before the crash
+    (tmp_path / "h.csv.journal.commit").write_text(json.dumps([journal.path + ".1"]))
+    journal.finish_pending()
+    assert not (tmp_path / "h.csv.journal.commit").exists()
+    from app.history import HistoryBuffer
+    journal.compact(HistoryBuffer())  # no live journal yet
+    assert csv.exists()
+    journal.close()
+    journal.close()
@@ -0,0 +1,125 @@
+import math, sqlite3, pytest
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade
+from app.history import History
+from app.history_sqlite import SqliteStorage
+from app.metrics import Metrics
+from app.exceptions import ConfigurationError
+
+def _history(path, **kw):
+    return History(storage=SqliteStorage(str(path), **kw))
+
+def _stored(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        rows = conn.execute("SELECT position, operator, operands, result FROM history ORDER BY position").fetchall()
+        return [(i, op, len(blob) // 8, res) for i, op, blob, res in rows], conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_sqlite_round_trip_and_schema(tmp_path):
+    db = tmp_path / "h.db"
+    h = _history(db)
+    h.metrics = Metrics()
+    h.add_record("+", [1, 2], 3)
+    h.add_columns(["-", "/"], [[5, 1], [1, 0, 2]], [4.0, math.nan])
+    assert _stored(db) == ([(0, "+", 2, 3.0), (1, "-", 2, 4.0), (2, "/", 3, None)], 3)  # readable while open
+    assert set(h.metrics.snapshot()["history.add_columns"]) == {"sqlite"}
+    h.close()
+    h.close()
+    again = _history(db)
+    assert again.rows()[:2] == [("+", [1.0, 2.0], 3.0), ("-", [5.0, 1.0], 4.0)] and math.isnan(again.rows()[2][2])
+    conn = sqlite3.connect(str(db))
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    indexes = {row[1] for row in conn.execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+    assert {"rows_operator", "rows_ts"} <= indexes
+    conn.close()
+    again.close()
+
+def test_sqlite_undo_redo_are_row_ranges(tmp_path):
+    db = tmp_path / "h.db"
+    h = _history(db, fsync="never")
+    h.add_columns(["+"] * 3, [[1, 1]] * 3, [2.0] * 3)
+    h.add_record("*", [2, 3], 6.0)
+    h.undo()
+    assert _stored(db)[1] == 3
+    h.redo()
+    h.clear()
+    assert _stored(db) == ([], 4)  # cleared rows stay below the live range
+    h.undo()
+    assert [row[1] for row in _stored(db)[0]] == ["+", "+", "+", "*"]
+    h.redo()
+    h.undo()
+    h.save(str(tmp_path / "h.csv"))  # an export; the table is untouched
+    h.load(str(tmp_path / "h.csv"))
+    assert _stored(db) == ([(i, op, 2, res) for i, (op, _, res) in enumerate(h.rows())], 8)
+    h.save()  # drops the replaced rows
+    assert _stored(db)[1] == 4
+    h.undo()  # the load's "before" is written back from memory
+    assert _stored(db) == ([(0, "+", 2, 2.0), (1, "+", 2, 2.0), (2, "+", 2, 2.0), (3, "*", 2, 6.0)], 4)
+    h.set_results([1, 3], [5.0, math.inf])  # updates in place, no new rows
+    assert _stored(db) == ([(0, "+", 2, 2.0), (1, "+", 2, 5.0), (2, "+", 2, 2.0), (3, "*", 2, math.inf)], 4)
+    h.undo()
+    h.close()
+    assert [row[2] for row in _history(db).rows()] == [2.0, 2.0, 2.0, 6.0]
+
+def test_sqlite_without_autosave_and_mapped_rows(tmp_path):
+    hcol = str(tmp_path / "h.hcol")
+    src = History(autosave=False)
+    src.add_columns(["+", "-"], [[1, 2], [3]], [3.0, 3.0])
+    src.save(hcol)
+    db = tmp_path / "h.db"
+    h = _history(db, autosave=False)
+    h.load(hcol)
+    assert _stored(db) == ([], 0)
+    h.save()
+    assert _stored(db) == ([(0, "+", 2, 3.0), (1, "-", 1, 3.0)], 2)
+    h.close()
+    auto = _history(db)
+    auto.clear()
+    auto.load(hcol)  # mapped column views go in as bytes
+    assert _stored(db)[0] == [(0, "+", 2, 3.0), (1, "-", 1, 3.0)]
+    auto.close()
+    with pytest.raises(ConfigurationError):
+        SqliteStorage(str(db), fsync="sometimes")
+
+def test_sqlite_stores_row_notes_and_upgrades_old_tables(tmp_path):
+    db = tmp_path / "old.db"
+    conn = sqlite3.connect(str(db))
+    conn.executescript("""
+        CREATE TABLE rows (seq INTEGER PRIMARY KEY, operator TEXT NOT NULL, operands BLOB NOT NULL,
+                           result REAL, ts REAL NOT NULL);
+        CREATE TABLE state (id INTEGER PRIMARY KEY CHECK (id = 0), lo INTEGER NOT NULL, hi INTEGER NOT NULL);
+        INSERT INTO state VALUES (0, 0, 1);
+        INSERT INTO rows VALUES (0, '+', zeroblob(0), 3.0, 0);
+        CREATE VIEW history AS SELECT seq - state.lo AS position, operator, operands, result, ts
+            FROM rows, state WHERE seq >= state.lo AND seq < state.hi;
+    """)
+    conn.close()
+    h = _history(db)
+    assert h.rows() == [("+", [], 3.0)]
+    h.add_record("eval", [3.0], 9.0, note="ans ^ 2")
+    h.clear()
+    h.save()  # drops the replaced rows, so the undo writes them back with their notes
+    h.undo()
+    h.add_columns(["eval"], [[]], [1.0], notes={0: "2 - 1"})
+    h.undo()
+    h.redo()
+    h.close()
+    conn = sqlite3.connect(str(db))
+    assert conn.execute("SELECT position, note FROM history ORDER BY position").fetchall() == [
+        (0, None), (1, "ans ^ 2"), (2, "2 - 1")]
+    conn.close()
+    again = _history(db)
+    assert again.has_notes() and again._buffer.notes == {1: "ans ^ 2", 2: "2 - 1"}
+    again.close()
+
+def test_facade_selects_sqlite_backend(tmp_path):
+    cfg = Config(history_csv=str(tmp_path / "h.csv"), history_backend="sqlite", history_db=str(tmp_path / "calc.db"))
+    facade = CalculatorFacade(cfg)
+    facade.perform("+", ["1", "2"])
+    facade.close()
+    assert not (tmp_path / "h.csv").exists()
+    reopened = CalculatorFacade(cfg)
+    assert reopened.history.rows() == [("+", [1.0, 2.0], 3.0)] and reopened.history.storage.fsync == "always"
+    reopened.close()
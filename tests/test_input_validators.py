@@ -1,6 +1,7 @@
 
 import pytest
-from app.input_validators import parse_command, parse_operation_args
+from app.input_validators import (parse_command, parse_history_args, parse_operation_args, parse_parallel_args,
+                                  parse_recompute_args, parse_summary_args, parse_sweep_args)
 from app.exceptions import ValidationError
 
 def test_parse_command_and_args():
@@ -13,3 +14,41 @@ def test_parse_command_and_args():
         parse_operation_args([])
     with pytest.raises(ValidationError):
         parse_operation_args(["x"])
+
+def test_parse_history_args():
+    assert parse_history_args([]) == {"tail": False}
+    assert parse_history_args(["100", "--offset", "5000"]) == {"tail": False, "limit": 100, "offset": 5000}
+    assert parse_history_args(["tail", "--op", "root", "--min", "-1", "--max", "2e3", "--out", "f.csv"]) == {
+        "tail": True, "operator": "root", "min_result": -1.0, "max_result": 2000.0, "out": "f.csv"}
+    for bad in (["--offset"], ["5", "6"], ["-3"], ["--offset", "x"], ["--max", "big"]):
+        with pytest.raises(ValidationError):
+            parse_history_args(bad)
+
+def test_parse_summary_args():
+    assert parse_summary_args([]) is None and parse_summary_args(["last", "50"]) == 50
+    for bad in (["last"], ["last", "0"], ["50"], ["last", "x"], ["last", "5", "6"]):
+        with pytest.raises(ValidationError):
+            parse_summary_args(bad)
+
+def test_parse_parallel_args():
+    assert parse_parallel_args(["ops.txt"]) == ("ops.txt", [])
+    assert parse_parallel_args(["ops.txt", "4", "100"]) == ("ops.txt", [4, 100])
+    for bad in ([], ["ops.txt", "x", "100"], ["ops.txt", "-1"], ["ops.txt", "1", "2", "3"]):
+        with pytest.raises(ValidationError):
+            parse_parallel_args(bad)
+
+def test_parse_recompute_args():
+    assert parse_recompute_args([]) == {}
+    assert parse_recompute_args(["--fix", "--rtol", "1e-6", "--atol", "0"]) == {"rewrite": True, "rtol": 1e-6, "atol": 0.0}
+    for bad in (["--rtol"], ["--atol", "x"], ["--rtol", "-1"], ["--rtol", "nan"], ["fix"]):
+        with pytest.raises(ValidationError):
+            parse_recompute_args(bad)
+
+def test_parse_sweep_args():
+    assert parse_sweep_args(["^", "0:1e6", "2"]) == {
+        "operator": "^", "specs": ["0:1e6", "2"], "record": "summary", "out": None, "quiet": False}
+    assert parse_sweep_args(["+", "--record", "rows", "1:3", "--out", "t.csv", "--quiet"]) == {
+        "operator": "+", "specs": ["1:3"], "record": "rows", "out": "t.csv", "quiet": True}
+    for bad in ([], ["+", "--out"], ["+", "--record", "some"], ["+", "--fast"]):
+        with pytest.raises(ValidationError):
+            parse_sweep_args(bad)
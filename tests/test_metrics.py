@@ -0,0 +1,48 @@
+import random, pytest
+from app.metrics import CommandProfiler, Histogram, Metrics, profile_request
+
+def test_histogram_percentiles_within_bucket_error():
+    rng = random.Random(1)
+    samples = [int(rng.lognormvariate(10, 1.5)) + 1 for _ in range(20_000)]
+    hist = Histogram()
+    for ns in samples:
+        hist.add(ns)
+    ordered = sorted(samples)
+    for q in (50, 95, 99):
+        exact = ordered[-(-len(ordered) * q // 100) - 1]
+        assert exact <= hist.percentile(q) <= exact * 1.07
+    assert hist.percentile(100) == hist.max == ordered[-1]
+    small = Histogram()
+    for ns in (3, 7, 31):
+        small.add(ns)
+    assert (small.percentile(50), small.percentile(99)) == (7, 31)  # exact below 32 ns
+    assert Histogram().percentile(50) == 0 and Histogram().summary()["mean_us"] == 0.0
+
+def test_metrics_snapshot_format_and_reset():
+    metrics = Metrics()
+    assert metrics.format() == "No timings recorded yet."
+    for ns in (1_000, 2_000, 3_000):
+        metrics.record("+", "compute", ns)
+    metrics.record("+", "parse", 500)
+    snap = metrics.snapshot()
+    assert list(snap["+"]) == ["compute", "parse"]
+    assert snap["+"]["compute"]["count"] == 3 and snap["+"]["compute"]["max_us"] == 3.0
+    assert "compute" in metrics.format() and len(metrics) == 2
+    held = metrics.series("+", "compute")
+    metrics.reset()
+    assert len(metrics) == 0 and metrics.snapshot() == {}
+    held.add(4_000)  # handles kept by callers keep feeding the same series
+    assert metrics.snapshot()["+"]["compute"]["count"] == 1
+    for ns in range(1, 3_000):  # past the fold threshold
+        metrics.record("-", "compute", ns)
+    assert metrics.snapshot()["-"]["compute"]["max_us"] == 2.999
+
+def test_command_profiler_counts_commands():
+    profiler = CommandProfiler(2, top=5)
+    assert profiler.run(sum, [1, 2]) == 3 and not profiler.done
+    with pytest.raises(ZeroDivisionError):
+        profiler.run(divmod, 1, 0)
+    assert profiler.done
+    assert profiler.report().startswith("Profile of 2 command(s):")
+    assert profile_request(["5"]) == 5 and profile_request([]) == 1 and profile_request(["0"]) == 1
+    assert profile_request(["off"]) is None
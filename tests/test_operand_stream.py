@@ -0,0 +1,61 @@
+import io, sys, pytest
+import numpy as np
+from app.operand_stream import OperandStream, is_stream
+from app.operations import operation_factory
+from app.exceptions import OperationError, ValidationError
+
+def _reduce(symbol, spec, chunk=4):
+    stream = OperandStream(spec, chunk=chunk)
+    return operation_factory(symbol).reduce_stream(stream.chunks()), stream.count
+
+def test_text_source_is_reduced_chunk_by_chunk(tmp_path):
+    path = tmp_path / "v.txt"
+    path.write_text("1 2, 3\n\n4,5\n6 7 8 9 10\n")
+    assert _reduce("+", f"@{path}") == (55.0, 10)
+    assert _reduce("-", f"@{path}") == (1.0 - 54.0, 10)
+    assert _reduce("*", f"@{path}", chunk=3) == (3628800.0, 10)
+    path.write_text("1000 10 10 2.5")
+    assert _reduce("/", f"@{path}", chunk=1)[0] == 4.0
+    path.write_text("0.123456789012345678 1e-300,-2.5e+300\n")  # numbers straddle the 16-char blocks
+    assert _reduce("+", f"@{path}", chunk=1) == (0.123456789012345678 + 1e-300 - 2.5e300, 3)
+    assert is_stream(["@x"]) and not is_stream(["1"]) and not is_stream([]) and not is_stream([1.0, 2.0])
+
+def test_raw_float64_source(tmp_path):
+    values = np.arange(1, 100_001, dtype="<f8")
+    path = tmp_path / "v.f64"
+    values.tofile(path)
+    assert _reduce("+", f"@{path}", chunk=4096) == (float(values.sum()), 100_000)
+    with open(path, "ab") as fh:
+        fh.write(b"\0\0\0")
+    with pytest.raises(ValidationError, match="truncated at byte 800000"):
+        _reduce("+", f"@{path}")
+
+def test_errors_report_the_operand_position(tmp_path):
+    path = tmp_path / "bad.txt"
+    path.write_text("1 2 3\n4 oops 6\n")
+    with pytest.raises(ValidationError, match=r"operand 5 \(line 2\) is not numeric: 'oops'"):
+        _reduce("+", f"@{path}", chunk=2)
+    path.write_text("8 2 1 0 5")
+    with pytest.raises(OperationError, match=r"Division by zero \(operand 4\)"):
+        _reduce("/", f"@{path}", chunk=2)
+    path.write_text("0 5")
+    assert _reduce("/", f"@{path}")[0] == 0.0  # only divisors must be non-zero
+    path.write_text("")
+    with pytest.raises(OperationError, match="Subtraction requires at least one operand"):
+        _reduce("-", f"@{path}")
+    for spec in ("@", "values.txt", f"@{tmp_path / 'missing.txt'}", f"@{tmp_path / 'missing.bin'}"):
+        with pytest.raises(ValidationError):
+            _reduce("+", spec)
+
+def test_fixed_arity_operations_read_only_what_they_need(tmp_path):
+    path = tmp_path / "p.txt"
+    path.write_text("2 10")
+    assert _reduce("^", f"@{path}")[0] == 1024.0 and _reduce("root", f"@{path}")[0] == 10 ** 0.5
+    path.write_text(" ".join(["2"] * 100))
+    with pytest.raises(OperationError, match="exactly two operands"):
+        _reduce("^", f"@{path}", chunk=2)
+
+def test_stdin_source(monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("1.5\n2.5\n"))
+    stream = OperandStream("@-")
+    assert operation_factory("+").reduce_stream(stream.chunks()) == 4.0 and stream.name == "stdin"
@@ -14,3 +14,49 @@ def test_factory_success():
 def test_factory_failure():
     with pytest.raises(OperationError):
         operation_factory("%")
+
+def test_factory_reuses_stateless_instances():
+    assert operation_factory("+") is operation_factory("+")
+
+@pytest.mark.parametrize("symbol,rows", [
+    ("+", [[1, 2, 3], [0.1, 0.2], [-5, 5]]),
+    ("-", [[10, 2, 3], [5, 0.5], [1, 1]]),
+    ("*", [[2, 3, 4], [7, 0.5], [1e3, 1e-3]]),
+    ("/", [[8, 2], [1, 3], [9, 3, 3]]),
+    ("^", [[2, 3], [9, 0.5], [1.5, -2]]),
+    ("root", [[2, 9], [3, 27], [-2, 4]]),
+])
+def test_execute_batch_matches_scalar(symbol, rows):
+    import numpy as np
+    strategy = operation_factory(symbol)
+    batch = strategy.execute_batch(rows)
+    assert not batch.errors
+    # numpy's vectorized pow may differ from libm in the last ulp
+    assert batch.results.tolist() == pytest.approx([strategy.execute(r) for r in rows], rel=1e-12)
+    if len({len(r) for r in rows}) == 1:
+        arr = np.array(rows, dtype=float)
+        assert strategy.execute_batch(arr).results.tolist() == batch.results.tolist()
+
+def test_execute_batch_reports_errors_per_row():
+    import math
+    div = Divide().execute_batch([[1, 0], [4, 2], [1, 2, 0]])
+    assert div.errors == {0: "Division by zero", 2: "Division by zero"}
+    assert div.results[1] == 2.0 and math.isnan(div.results[0])
+    assert div.ok.tolist() == [False, True, False]
+    root = Root().execute_batch([[0, 9], [2, -4], [3, -8], [2, 16]])
+    assert root.errors == {
+        0: "Root degree cannot be zero",
+        1: "Even-degree root of negative number is not real",
+        2: "Result is not a real number",
+    }
+    assert root.results[3] == 4.0
+    power = Power().execute_batch([[0, -1], [10, 400], [2, 2]])
+    assert power.errors == {0: "0.0 cannot be raised to a negative power", 1: "Numerical result out of range"}
+    assert power.results[2] == 4.0
+
+@pytest.mark.parametrize("strategy", [Subtract(), Multiply(), Divide(), Power(), Root()])
+def test_execute_batch_arity_errors(strategy):
+    import numpy as np
+    batch = strategy.execute_batch(np.empty((2, 0)))
+    assert sorted(batch.errors) == [0, 1]
+    assert Add().execute_batch(np.empty((2, 0))).results.tolist() == [0.0, 0.0]
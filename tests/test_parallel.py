@@ -0,0 +1,33 @@
+import pytest
+from app.history import History
+from app.parallel import evaluate_chunk, evaluate_lines, run_parallel
+
+LINES = ["+ 1 2", "", "# comment", "/ 1 0", "* 2 3", "history", "^ 2 10", "root 3 -8", "^ 10 400", "- 9 x"]
+
+def test_evaluate_chunk_reports_errors_by_line():
+    out = evaluate_chunk(1, LINES)
+    assert out.results == [3.0, 6.0, 1024.0]
+    assert out.operators == ["+", "*", "^"] and out.operands[0] == [1.0, 2.0]
+    assert [n for n, _ in out.errors] == [4, 6, 8, 9, 10]
+    assert out.errors[0][1] == "Division by zero"
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_parallel_keeps_input_order(workers):
+    lines = [f"+ {i} 1" for i in range(200)] + ["/ 1 0"]
+    h = History(autosave=False)
+    report = run_parallel(h, lines, workers=workers, chunk_size=7)
+    assert report.operations == 201 and report.errors == [(201, "Division by zero")]
+    assert h.df["result"].tolist() == [i + 1.0 for i in range(200)]
+    h.undo()  # one bulk change
+    assert len(h) == 0
+
+def test_run_parallel_with_nothing_to_record():
+    h = History(autosave=False)
+    assert run_parallel(h, ["/ 1 0"], workers=1).operations == 1
+    assert len(h) == 0
+
+def test_evaluate_lines_with_external_executor():
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(2) as pool:
+        chunks = list(evaluate_lines([f"* {i} 2" for i in range(10)], workers=2, chunk_size=3, executor=pool))
+    assert [r for c in chunks for r in c.results] == [i * 2.0 for i in range(10)]
@@ -0,0 +1,69 @@
+import io, sys, pytest
+from app.history import HistoryBuffer
+from app.history_binary import write_binary
+from app.ragged import OperandRow, RaggedColumn
+from app.exceptions import ValidationError
+
+def test_rows_are_views_over_one_float64_buffer():
+    col = RaggedColumn([[1, 2.5], (), "[3.0, 4.0, 5.0]"])
+    assert len(col) == 3 and col.flat.typecode == "d" and col.nbytes() == 8 * (5 + 4)
+    row = col[2]
+    assert isinstance(row, OperandRow) and len(row) == 3 and row[-1] == 5.0 and row[1:] == [4.0, 5.0]
+    assert row == [3.0, 4.0, 5.0] and row == (3.0, 4.0, 5.0) and row == col[-1] and row != "345"
+    assert list(row) == [3.0, 4.0, 5.0] and repr(row) == str(row) == "[3.0, 4.0, 5.0]"
+    assert col[1] == [] and col[0:2] == [[1.0, 2.5], []] and col[::2] == [[1.0, 2.5], [3.0, 4.0, 5.0]]
+    assert col == [[1.0, 2.5], [], [3.0, 4.0, 5.0]] and col != [[1.0, 2.5]] and col != "x"
+    with pytest.raises(IndexError):
+        col[3]
+    with pytest.raises(TypeError):
+        hash(row)
+
+def test_truncate_extend_and_copy_are_independent():
+    col = RaggedColumn([[1.0], [2.0, 3.0], [4.0]])
+    copy = col.copy()
+    col.truncate(1)
+    col.truncate(5)  # past the end: no-op
+    col.append([9.0, 9.0])
+    assert col == [[1.0], [9.0, 9.0]] and copy == [[1.0], [2.0, 3.0], [4.0]]
+    col.extend(copy)
+    assert col[2:] == [[1.0], [2.0, 3.0], [4.0]] and list(col.offsets) == [0, 1, 3, 4, 6, 7]
+
+def test_mapped_columns_are_copied_not_decoded(tmp_path):
+    path = str(tmp_path / "m.hcol")
+    buf = HistoryBuffer()
+    for i in range(1000):
+        buf.append("+", [float(i)] * (i % 4), float(i))
+    buf.write_file(path)
+    mapped = HistoryBuffer.read_binary(path)
+    col = RaggedColumn()
+    col.extend(mapped.operands)
+    assert col == buf.operands and col.flat == buf.operands.flat
+    mapped.append("-", [1.0], 0.0)  # materializes into a RaggedColumn
+    assert isinstance(mapped.operands, RaggedColumn) and mapped.operands[:1000] == list(buf.operands)
+
+def test_plain_columns_still_encode_to_binary():
+    out = io.BytesIO()
+    write_binary(out, ["+"], [[1.0, 2.0]], [3.0])
+    assert out.getvalue().endswith(b"".join(x.to_bytes(8, "little") for x in (0, 2)) +
+                                   bytes(memoryview(RaggedColumn([[1.0, 2.0]]).flat).cast("B")))
+
+def test_operands_cost_close_to_raw_floats():
+    buf = HistoryBuffer()
+    for i in range(10_000):
+        buf.append("+", [float(i)] * 8, float(i))
+    per_row = (sys.getsizeof(buf.operands.flat) + sys.getsizeof(buf.operands.offsets)) / 10_000
+    assert per_row < 8 * 8 * 1.25 + 8 * 1.25  # 8 operands + one offset, plus array over-allocation
+
+def test_csv_operands_are_parsed_in_batches(tmp_path, monkeypatch):
+    import app.history as history
+    monkeypatch.setattr(history, "_PARSE_CHUNK", 2)
+    path = tmp_path / "p.csv"
+    path.write_text('operator,operands,result\n+,"[1.0, 2.0]",3.0\n-,[],0.0\n*,"(2, 3)",6.0\n/,"[nan, -inf]",\n')
+    buf = HistoryBuffer.read_csv(str(path))
+    assert buf.operands[:3] == [[1.0, 2.0], [], [2.0, 3.0]] and str(buf.operands[3]) == "[nan, -inf]"
+    col = RaggedColumn()
+    col.append("[4.0, 5.0]")
+    col.extend_text(["[6.0]", "[7.0,]"])  # trailing comma: counted apart, parsed row by row
+    assert col == [[4.0, 5.0], [6.0], [7.0]]
+    with pytest.raises(ValidationError, match="oops"):
+        col.extend_text(["[1.0, oops]"])
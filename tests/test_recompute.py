@@ -0,0 +1,85 @@
+import math, pytest
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade, handle
+from app.history import History
+from app.recompute import recompute
+from app.exceptions import ValidationError
+
+def _tampered(tmp_path):
+    """A CSV as if written by another build: two wrong results and a row that now fails."""
+    path = tmp_path / "h.csv"
+    path.write_text("operator,operands,result\n"
+                    "+,\"[1.0, 2.0]\",3.0\n"
+                    "+,\"[1.0, 2.0, 3.0]\",7.0\n"
+                    "/,\"[1.0, 0.0]\",5.0\n"
+                    "^,\"[2.0, 10.0]\",1024.00001\n"
+                    "2 ^ 5,[],32.0\n"
+                    "+ @v.txt (3 values),[],6.0\n"
+                    "root,\"[2.0, -4.0]\",\n"
+                    "*,[],1.0\n")
+    return str(path)
+
+def test_recompute_reports_and_rewrites_as_one_change(tmp_path):
+    h = History(csv_path=_tampered(tmp_path), autosave=False)
+    report = recompute(h)
+    assert (report.checked, report.skipped) == (6, 2)
+    assert report.mismatches == [(1, "+", 7.0, 6.0), (3, "^", 1024.00001, 1024.0)]
+    assert report.errors == {2: "Division by zero", 6: "Even-degree root of negative number is not real",
+                             7: "Multiplication requires at least one operand"}
+    assert recompute(h, rtol=1e-6).mismatches == [(1, "+", 7.0, 6.0)]
+    assert not recompute(h, atol=2).mismatches and report.rewritten == 0
+    assert h.summary()["all"]["max"] == 1024.00001
+    fixed = recompute(h, rewrite=True)
+    assert fixed.rewritten == 2 and [r[2] for r in h.rows()][:4] == [3.0, 6.0, 5.0, 1024.0]
+    assert h.summary()["all"]["max"] == 1024.0  # aggregates rebuilt after the rewrite
+    assert not recompute(h).mismatches
+    h.undo()
+    assert len(recompute(h).mismatches) == 2
+    h.redo()
+    assert recompute(h, rewrite=True).rewritten == 0
+    h.add_record("eval", [1.0, 2.0], 4.0, note="ans + 2 + 1")
+    h.add_record("+", [1.0, 2.0], 4.0, note="copied from a report")  # a note means: not from its operands
+    report = recompute(h)
+    assert (report.checked, report.skipped, report.mismatches) == (6, 4, [])
+
+def test_recompute_mapped_history_and_concurrent_change(tmp_path):
+    src = History(autosave=False)
+    src.add_columns(["*"] * 200, [[i, 2.0] for i in range(200)], [2.0 * i for i in range(200)])
+    src.add_record("*", [3, 3], 10.0)
+    hcol = str(tmp_path / "h.hcol")
+    src.save(hcol)
+    mapped = History(csv_path=hcol, autosave=False)
+    assert recompute(mapped, rewrite=True).rewritten == 1 and mapped.rows(200) == [("*", [3.0, 3.0], 9.0)]
+    buf, version = src.versioned_copy()
+    src.add_record("+", [1], 1.0)
+    with pytest.raises(ValidationError):
+        src.set_results([200], [9.0], version=version)
+    assert src.rows(200, 201)[0][2] == 10.0 and len(src.caretaker._undo_stack) == 3
+
+@pytest.mark.parametrize("mode", ["journal", "snapshot"])
+def test_rewrite_is_persisted(tmp_path, mode):
+    path = str(tmp_path / "h.csv")
+    h = History(csv_path=path, autosave=True, autosave_mode=mode)
+    h.add_record("+", [1, 2], 4.0)
+    recompute(h, rewrite=True)
+    h.close()
+    assert History(csv_path=path, autosave=True, autosave_mode=mode).rows() == [("+", [1.0, 2.0], 3.0)]
+    h = History(csv_path=path, autosave=True, autosave_mode=mode)
+    h.set_results([0], [math.inf])
+    h.undo()
+    h.close()
+    assert History(csv_path=path, autosave=False).rows() == [("+", [1.0, 2.0], 3.0)] or mode == "journal"
+
+def test_recompute_command(tmp_path, monkeypatch):
+    facade = CalculatorFacade(Config(history_csv=_tampered(tmp_path), autosave=False))
+    text = handle(facade, "recompute", ["--rtol", "1e-6"])
+    lines = text.splitlines()
+    assert lines[0].startswith("Checked 6 row(s) in") and lines[0].endswith("(2 skipped): 1 mismatch(es), 3 now failing")
+    assert lines[2].split() == ["1", "+", "7.0", "6.0"] and lines[3] == "  row 2: Division by zero"
+    monkeypatch.setattr("app.calculator_repl.RECOMPUTE_SHOWN", 1)
+    lines = handle(facade, "recompute", ["--fix"]).splitlines()
+    assert lines[3:] == ["  ... 1 more", "  row 2: Division by zero", "  ... 2 more",
+                         "Rewrote 2 result(s); 'undo' restores them."]
+    assert handle(facade, "recompute", []).splitlines()[0].endswith("0 mismatch(es), 3 now failing")
+    with pytest.raises(ValidationError):
+        handle(facade, "recompute", ["--fix", "--rtol"])
@@ -0,0 +1,27 @@
+import pytest
+from app.result_cache import ResultCache, cache_key
+from app.exceptions import OperationError
+
+def test_lru_eviction_and_stats():
+    cache = ResultCache(maxsize=2)
+    a, b, c = cache_key("+", [1.0]), cache_key("+", [2.0]), cache_key("+", [3.0])
+    assert cache.get(a) is None
+    cache.put(a, 1.0)
+    cache.put(b, 2.0)
+    assert cache.get(a) == 1.0  # a becomes most recent
+    cache.put(c, 3.0)           # evicts b
+    assert cache.get(b) is None and len(cache) == 2
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["evictions"]) == (1, 2, 1)
+    assert st["hit_rate"] == pytest.approx(1 / 3)
+    cache.clear()
+    assert len(cache) == 0 and ResultCache(1).stats()["hit_rate"] == 0.0
+
+def test_negative_entries_and_signed_zero_keys():
+    cache = ResultCache(maxsize=4)
+    key = cache_key("/", [1.0, 0.0])
+    cache.put_error(key, OperationError("Division by zero"))
+    with pytest.raises(OperationError, match="Division by zero"):
+        cache.get(key)
+    assert cache_key("*", [-0.0, 5.0]) != cache_key("*", [0.0, 5.0])
+    assert cache_key("*", [1, 2]) == cache_key("*", [1.0, 2.0])
@@ -0,0 +1,102 @@
+import asyncio, json
+import pytest
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade
+from app.server import CalculatorServer, Session, MAX_LINE, _parse_args
+
+def _session(tmp_path):
+    return Session(CalculatorFacade(Config(history_csv="", autosave=False)), str(tmp_path))
+
+def _run(session, req):
+    return session.execute(json.dumps(req).encode())
+
+def test_session_commands(tmp_path):
+    s = _session(tmp_path)
+    assert _run(s, {"id": 1, "cmd": "+", "args": [1, 2]}) == {"id": 1, "ok": True, "result": 3.0}
+    assert _run(s, {"id": 2, "line": "2 ^ (1 + 2)"})["result"] == 8.0
+    assert _run(s, {"id": 3, "cmd": "eval", "args": ["ans", "*", "2"]})["result"] == 16.0
+    assert _run(s, {"id": 4, "cmd": "/", "args": [1, 0]}) == {"id": 4, "ok": False, "error": "Division by zero"}
+    rows = _run(s, {"cmd": "history"})["rows"]
+    assert [r["result"] for r in rows] == [3.0, 8.0, 16.0] and rows[0]["operands"] == [1.0, 2.0]
+    assert [r.get("note") for r in rows] == [None, "2 ^ ( 1 + 2 )", "ans * 2"] and rows[1]["operator"] == "eval"
+    assert [r["index"] for r in _run(s, {"line": "history tail 2 --min 10"})["rows"]] == [2]
+    assert _run(s, {"line": "history --out x.csv"})["error"] == "history --out is not available over the server"
+    summary = _run(s, {"line": "summary"})["summary"]
+    assert summary["all"]["count"] == 3 and summary["by_operator"]["/"]["errors"] == 1
+    assert _run(s, {"line": "summary last 1"})["summary"]["all"]["sum"] == 16.0
+    audit = _run(s, {"line": "recompute --fix"})["recompute"]
+    assert (audit["checked"], audit["skipped"], audit["mismatched"], audit["mismatches"], audit["errors"]) == (1, 2, 0, [], [])
+    assert _run(s, {"cmd": "undo"})["message"] == "Undone."
+    assert _run(s, {"cmd": "save", "args": ["h.csv"]})["message"] == "Saved."
+    assert (tmp_path / "h.csv").exists()
+    assert _run(s, {"cmd": "clear"})["ok"]
+    assert _run(s, {"cmd": "load", "args": ["h.csv"]})["message"] == "Loaded."
+    assert not _run(s, {"cmd": "load", "args": ["../escape.csv"]})["ok"]
+    (tmp_path / "v.txt").write_text("1 2 3")
+    assert _run(s, {"line": "+ @v.txt"})["result"] == 6.0
+    assert not _run(s, {"line": "+ @../escape.txt"})["ok"]
+    assert not _run(s, {"cmd": "exit"})["ok"]
+    assert _run(s, {"cmd": "+", "args": 5})["error"].startswith("Bad request")
+    assert s.execute(b"[1, 2]")["error"] == "Request must be a JSON object"
+    assert s.execute(b"{not json")["error"].startswith("Bad request")
+    s.close()
+
+async def _exchange(server, payload: bytes, expect: int):
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    writer.write(payload)
+    await writer.drain()
+    out = [json.loads(await reader.readline()) for _ in range(expect)]
+    writer.close()
+    return out
+
+def test_server_pipelines_in_order_per_connection(tmp_path):
+    async def main():
+        server = await CalculatorServer(port=0, max_pipeline=4, batch_size=3, workers=2,
+                                        session_factory=lambda: _session(tmp_path)).start()
+        try:
+            reqs = b"".join(json.dumps({"id": i, "cmd": "*", "args": [i, 2]}).encode() + b"\n" for i in range(50))
+            a, b = await asyncio.gather(_exchange(server, reqs + b"\n", 50),
+                                        _exchange(server, b'{"id": "x", "line": "history"}\n', 1))
+        finally:
+            await server.close()
+        return a, b
+    a, b = asyncio.run(main())
+    assert [r["id"] for r in a] == list(range(50))
+    assert [r["result"] for r in a] == [i * 2.0 for i in range(50)]
+    assert b == [{"id": "x", "ok": True, "rows": []}]  # separate session
+
+def test_server_unix_socket_and_oversized_line(tmp_path):
+    async def main():
+        path = str(tmp_path / "calc.sock")
+        server = await CalculatorServer(unix_path=path, data_dir=str(tmp_path)).start()
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"line": "root 2 9"}\n')
+            first = json.loads(await reader.readline())
+            writer.write(b"x" * (MAX_LINE + 10) + b"\n")
+            await writer.drain()
+            rest = await reader.read()
+            writer.close()
+        finally:
+            await server.close()
+        return first, rest
+    first, rest = asyncio.run(main())
+    assert first == {"id": None, "ok": True, "result": 3.0}
+    assert rest == b""  # connection dropped
+
+def test_server_sessions_stay_private_under_the_sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("HISTORY_BACKEND", "sqlite")
+    monkeypatch.setenv("HISTORY_DB", str(tmp_path / "shared.sqlite3"))
+    server = CalculatorServer(data_dir=str(tmp_path))
+    a, b = server.session_factory(), server.session_factory()
+    assert _run(a, {"line": "+ 1 2"})["result"] == 3.0
+    assert not _run(a, {"cmd": "save"})["ok"]  # no default storage to write to
+    assert _run(b, {"cmd": "history"})["rows"] == []
+    assert not (tmp_path / "shared.sqlite3").exists()
+    a.close(), b.close()
+    asyncio.run(server.close())
+
+def test_server_cli_args():
+    opts = _parse_args(["--unix", "/tmp/s", "--workers", "3"])
+    assert opts.unix == "/tmp/s" and opts.workers == 3 and opts.port == 8765
+    asyncio.run(CalculatorServer().close())  # closing a never-started server is harmless
@@ -0,0 +1,76 @@
+import io, pytest
+from app.calculator_config import Config
+from app.calculator_repl import CalculatorFacade, handle, run_batch
+from app.history import History
+from app.sweep import Axis, Sweep, MAX_POINTS
+from app.exceptions import OperationError, ValidationError
+
+def _facade(**kw):
+    return CalculatorFacade(Config(history_csv="", autosave=False, **kw))
+
+def test_axis_ranges():
+    assert Axis.parse("0:1e6").count == 1_000_001 and Axis.parse("5").count == 1
+    assert Axis.parse("0:0.3:0.1").count == 4  # 0.3 / 0.1 rounds below 3
+    assert Axis.parse("10:0:-2.5").count == 5 and Axis.parse("0:0.99").count == 1
+    for bad in ("a:3", "1:2:3:4", "0:5:0", "5:0", "0:inf", f"0:{MAX_POINTS}"):
+        with pytest.raises(ValidationError):
+            Axis.parse(bad)
+    with pytest.raises(ValidationError):
+        Sweep("+", ["0:1e5", "0:1e5"])  # grid too large
+    with pytest.raises(ValidationError):
+        Sweep("+", [])
+    with pytest.raises(OperationError):
+        Sweep("%", ["1"])
+
+def test_sweep_grid_in_chunks():
+    sweep = Sweep("root", ["2:3", "0:4:2"], chunk_size=4)
+    chunks = list(sweep.chunks())
+    assert [first for first, _, _ in chunks] == [0, 4]
+    assert [row for _, rows, _ in chunks for row in rows.tolist()] == [
+        [2, 0], [2, 2], [2, 4], [3, 0], [3, 2], [3, 4]]
+    assert chunks[1][2].results.tolist() == pytest.approx([2 ** (1 / 3), 4 ** (1 / 3)])
+    assert Sweep("^", ["-1e9:1e9:1e9", "2"]).block(1, 3).tolist() == [[0.0, 2.0], [1e9, 2.0]]
+
+def test_sweep_records_summary_rows_or_nothing():
+    facade = _facade()
+    report = facade.sweep("/", ["1", "-2:2"])
+    assert (report.points, report.errors, report.recorded) == (5, 1, 1)
+    assert list(facade.history.select(notes=True)) == [(0, "sweep", [], 0.5, "/ 1 -2:2 (5 points)")]
+    assert facade.failures == {"/": 1} and facade.last_result == 0.5
+    facade.sweep("/", ["12", "-2:2"], record="rows")
+    assert facade.history.rows(1) == [("/", [12.0, -2.0], -6.0), ("/", [12.0, -1.0], -12.0),
+                                      ("/", [12.0, 1.0], 12.0), ("/", [12.0, 2.0], 6.0)]
+    facade.history.undo()  # one change
+    assert len(facade.history) == 1
+    assert facade.sweep("^", ["0:9", "2"], record="none").recorded == 0 and len(facade.history) == 1
+    assert facade.sweep("/", ["1", "0"], record="rows").recorded == 0 and len(facade.history) == 1
+    assert facade.sweep("/", ["1", "0"]).recorded == 0 and facade.last_result == 81.0
+    with pytest.raises(ValidationError):
+        facade.sweep("+", ["1"], record="all")
+    facade.sweep("*", ["2", "1:3"])
+    assert facade.history.summary()["by_operator"]["sweep"]["count"] == 2 and facade.recompute().skipped == 2
+
+def test_sweep_command_streams(tmp_path, monkeypatch):
+    facade = _facade()
+    text = handle(facade, "sweep", ["/", "1", "-1:1"])
+    lines = text.splitlines()
+    assert lines[1].split() == ["0", "/", "[1.0,", "-1.0]", "-1.0"] and lines[2].endswith("error: Division by zero")
+    assert lines[-1].startswith("Swept 3 point(s) (1 errors) in") and lines[-1].endswith("; 1 history row(s) added")
+    monkeypatch.setattr("app.calculator_repl.OUTPUT_CHUNK", 3)
+    monkeypatch.setattr("app.sweep.SWEEP_CHUNK", 2)
+    out = io.StringIO()
+    tail = handle(facade, "sweep", ["+", "1:5", "1", "--record", "rows"], out)
+    assert out.getvalue().count("\n") == 6 and tail.startswith("Swept 5 point(s)")  # header + 5 rows, then totals
+    assert handle(facade, "sweep", ["+", "1:5", "--quiet"]).count("\n") == 0
+    path = tmp_path / "sweep.csv"
+    text = handle(facade, "sweep", ["/", "0:2", "0:1", "--out", str(path), "--record", "none"])
+    assert text.endswith(f"; 0 history row(s) added; rows written to {path}")
+    assert History(csv_path=str(path), autosave=False).rows() == [
+        ("/", [0.0, 1.0], 0.0), ("/", [1.0, 1.0], 1.0), ("/", [2.0, 1.0], 2.0)]  # one header, no failed points
+    for bad in ([], ["+", "1", "--record"], ["+", "1", "--bogus"], ["+", "1", "--record", "all"],
+                ["+", "1", "--out", str(tmp_path / "no" / "s.csv")]):
+        with pytest.raises(ValidationError):
+            handle(facade, "sweep", bad)
+    batch_out = io.StringIO()
+    run_batch(facade, ["sweep ^ 2:3 2", "history tail 1"], batch_out)
+    assert batch_out.getvalue().splitlines()[3].startswith("Swept 2 point(s)")